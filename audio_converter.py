@@ -5,9 +5,12 @@ archivos FLAC a formato WAV de alta calidad compatible con equipos de DJ
 como el Denon DS-1200, manteniendo la calidad óptima del audio.
 '''
 
+import asyncio
+import functools
 import os
 import subprocess
 import threading
+import time
 import concurrent.futures  # Para procesamiento paralelo de múltiples archivos
 
 # Hacer psutil opcional
@@ -19,10 +22,29 @@ except ImportError:
     import multiprocessing     # Alternativa a psutil
 
 from PyQt5.QtCore import QObject, pyqtSignal
-from platform_utils import get_ffmpeg_binary  # Utilidad para encontrar ffmpeg en diferentes sistemas
+from platform_utils import get_app_data_directory, get_ffmpeg_binary  # Utilidades dependientes de la plataforma
+from output_profiles import (DEFAULT_PROFILE_NAME, OutputProfile, get_profile,
+                             build_ffmpeg_command, output_path_for,
+                             output_paths_for)  # Perfiles de salida
+from audio_metadata import read_audio_metadata       # Lectura rápida de cabeceras
+from passthrough import can_passthrough, passthrough_convert  # Conversión sin ffmpeg
+from stream_analysis import StreamAnalyzer, can_tee, stream_convert  # Conversión y análisis en una pasada
+from loudness import (DEFAULT_TARGET_LUFS, DEFAULT_TRUE_PEAK_CEILING,
+                      LoudnessCache, normalization_gain)  # Normalización de sonoridad
+from dedup import DedupStats, group_duplicates, materialize_copy  # Deduplicación por contenido
+from verification import can_verify, verify_output  # Verificación MD5 contra STREAMINFO
+from triage import STATUS_LABELS, triage_files      # Triaje previo de archivos dañados
+from job_queue import JobQueue                      # Cola persistente para reanudar lotes
+from ffmpeg_engine import FfmpegEngine              # Procesos ffmpeg concurrentes con asyncio
+import tracing                                      # Tramos de rendimiento (--trace)
+from metrics import ConversionMetrics               # Contadores e histogramas de los lotes
+import profiling                                    # Perfiles por fase (--profile)
+
+# Segundos sin ninguna salida de ffmpeg tras los que se considera bloqueado y se mata
+FFMPEG_STALL_TIMEOUT = 120
 
 class AudioConverter(QObject):
-    """Clase para convertir archivos FLAC a WAV usando ffmpeg."""
+    """Clase para convertir archivos FLAC a WAV (u otros perfiles de salida) usando ffmpeg."""
     
     # Señales para comunicar el progreso a la interfaz gráfica
     conversion_started = pyqtSignal(str)                # Emitida cuando inicia una conversión
@@ -30,6 +52,9 @@ class AudioConverter(QObject):
     conversion_completed = pyqtSignal(str, str)         # archivo original, archivo convertido
     conversion_error = pyqtSignal(str, str)             # archivo, mensaje de error
     batch_completed = pyqtSignal()                      # Emitida cuando se completa un lote
+    deduplication_report = pyqtSignal(object)           # DedupStats del lote (antes de batch_completed)
+    triage_completed = pyqtSignal(object, str)          # TriageReport, ruta del informe JSON
+    analysis_ready = pyqtSignal(str, object)            # archivo convertido, AnalysisResult
     
     def __init__(self):
         """Inicializa el conversor de audio."""
@@ -37,9 +62,28 @@ class AudioConverter(QObject):
         self._cancel_conversion = False                 # Flag para cancelar conversiones
         self._current_conversions = {}                  # Diccionario: archivo -> proceso
         self._ffmpeg_path = get_ffmpeg_binary()         # Ruta a ffmpeg según la plataforma
+        self._thread_count = self._get_optimal_thread_count()  # Calculado una sola vez
         self._thread_pool = concurrent.futures.ThreadPoolExecutor(
-            max_workers=self._get_optimal_thread_count()  # Optimizar número de hilos
+            max_workers=self._thread_count              # Optimizar número de hilos
+        )
+        self.default_profile = get_profile(DEFAULT_PROFILE_NAME)  # Perfil de salida predeterminado
+        self.allow_passthrough = True                   # Copiar PCM sin ffmpeg cuando no hay que remuestrear
+        # Remuestrear en proceso si solo cambia la frecuencia; desactivado hasta compararlo
+        # con el remuestreador de ffmpeg (cuantiza a 16 bits sin dither)
+        self.resample_in_process = False
+        self.loudness_target = DEFAULT_TARGET_LUFS      # Objetivo de la normalización (LUFS)
+        self.true_peak_ceiling = DEFAULT_TRUE_PEAK_CEILING  # Pico real máximo tras la ganancia (dBTP)
+        self.loudness_cache = LoudnessCache()           # Medidas persistentes por huella de archivo
+        self.triage_report_dir = os.path.join(get_app_data_directory(), 'triage')  # Informes de triaje
+        self.job_queue = JobQueue()                     # Estado de los lotes para reanudarlos tras un cierre
+        self.ffmpeg_engine = FfmpegEngine(              # Un hilo de asyncio vigila todos los ffmpeg del lote
+            max_concurrency=self._thread_count,
+            stall_timeout=FFMPEG_STALL_TIMEOUT
         )
+        self._batch_phase = None                        # Fase de perfilado del lote en curso (--profile)
+        self.metrics = ConversionMetrics()              # Exportables por HTTP (Prometheus) o JSON
+        self.metrics.registry.gauge('flac2wav_ffmpeg_running', "Procesos ffmpeg en curso",
+                                    lambda: self.ffmpeg_engine.running)
         
     def _get_optimal_thread_count(self):
         """Determina el número óptimo de hilos para la conversión basado en CPU y memoria."""
@@ -86,23 +130,40 @@ class AudioConverter(QObject):
             # Si ocurre un error, ffmpeg no está disponible
             return False
     
-    def convert_file(self, input_file, output_dir=None, output_file=None):
+    def _can_passthrough(self, input_file, outputs):
+        """
+        Indica si todas las salidas pueden generarse sin ffmpeg: copiando las
+        muestras PCM o, si resample_in_process está activo, remuestreándolas en
+        proceso (nunca con cambio de profundidad), según la cabecera de la entrada.
         """
-        Convierte un archivo FLAC a WAV manteniendo la calidad original.
+        if not self.allow_passthrough:
+            return False
+        try:
+            metadata = read_audio_metadata(input_file)
+        except (OSError, ValueError):
+            return False
+        return all(can_passthrough(metadata, profile, self.resample_in_process) for profile, _ in outputs)
+    
+    def convert_file(self, input_file, output_dir=None, output_file=None, profile=None):
+        """
+        Convierte un archivo FLAC al formato de un perfil de salida manteniendo la calidad original.
         
         Args:
             input_file: Ruta al archivo FLAC de entrada
             output_dir: Directorio de salida (opcional)
             output_file: Nombre del archivo de salida (opcional)
+            profile: OutputProfile a usar (opcional, por defecto WAV para Denon DS-1200)
             
         Returns:
-            La ruta del archivo WAV creado
+            La ruta del archivo creado
         """
         # Verificar que el archivo exista
         if not os.path.exists(input_file):
             self.conversion_error.emit(input_file, "El archivo no existe")
             return None
             
+        profile = profile or self.default_profile
+            
         try:
             # Determinar el directorio de salida
             if not output_dir:
@@ -111,34 +172,24 @@ class AudioConverter(QObject):
             # Asegurar que el directorio de salida exista
             os.makedirs(output_dir, exist_ok=True)
             
-            # Determinar el nombre del archivo de salida
-            if not output_file:
-                base_name = os.path.basename(input_file)
-                name_without_ext = os.path.splitext(base_name)[0]
-                output_file = f"{name_without_ext}.wav"
-                
             # Ruta completa del archivo de salida
-            output_path = os.path.join(output_dir, output_file)
+            if output_file:
+                output_path = os.path.join(output_dir, output_file)
+            else:
+                output_path = output_path_for(input_file, output_dir, profile)
             
-            # Definir el comando ffmpeg con configuraciones optimizadas específicamente para Denon DS-1200
-            cmd = [
-                self._ffmpeg_path,
-                '-i', input_file,              # Archivo de entrada
-                '-c:a', 'pcm_s16le',           # Codec PCM 16-bit (formato CD)
-                '-ar', '44100',                # Frecuencia de muestreo 44.1kHz (estándar CD)
-                '-ac', '2',                    # 2 canales (estéreo)
-                '-map_metadata', '-1',         # Eliminar todos los metadatos
-                '-fflags', '+bitexact',        # Modo bit-exacto para mayor compatibilidad
-                '-flags:a', '+bitexact',       # Modo bit-exacto para el audio
-                '-f', 'wav',                   # Formato WAV explícito
-                '-bitexact',                   # Asegura salida bit-exacta sin datos adicionales
-                '-rf64', 'never',              # Evitar RF64 (menos compatible)
-                '-y',                          # Sobrescribir archivos sin preguntar
-                '-loglevel', 'error',          # Minimizar salida para mejor rendimiento
-                '-threads', str(max(2, self._get_optimal_thread_count() - 1)),  # Usar hilos óptimos por archivo
-                '-nostdin',                    # No usar entrada estándar (mejora rendimiento)
-                output_path
-            ]
+            # Camino rápido: solo cambia el contenedor (y quizá la frecuencia), no la profundidad
+            if self._can_passthrough(input_file, [(profile, output_path)]):
+                self.conversion_started.emit(input_file)
+                passthrough_convert(input_file, [(profile, output_path)])
+                self.conversion_completed.emit(input_file, output_path)
+                return output_path
+            
+            # Comando ffmpeg compilado a partir del perfil
+            cmd = build_ffmpeg_command(
+                self._ffmpeg_path, input_file, [(profile, output_path)],
+                threads=max(2, self._thread_count - 1)  # Usar hilos óptimos por archivo
+            )
             
             # Emitir señal de inicio de conversión
             self.conversion_started.emit(input_file)
@@ -177,126 +228,555 @@ class AudioConverter(QObject):
             self.conversion_error.emit(input_file, str(e))
             return None
     
-    def _convert_single_file_for_batch(self, file_path, output_dir, total_files, current_index):
-        """Convierte un solo archivo como parte de un lote."""
-        # Verificar si se ha solicitado cancelar la conversión
+    @tracing.traced("convert.measure_gain")
+    def _measure_gain(self, file_path):
+        """
+        Primera pasada de la normalización: mide (o lee de la caché) la sonoridad
+        de un archivo y devuelve la ganancia a aplicar.
+
+        Returns:
+            Ganancia en dB, o None si no se pudo medir
+        """
         if self._cancel_conversion:
             return None
+        try:
+            measurement = self.loudness_cache.measure(file_path)
+        except Exception as e:
+            print(f"Error al medir la sonoridad de {file_path}: {e}")
+            return None
+        return normalization_gain(measurement, self.loudness_target, self.true_peak_ceiling)
+
+    def convert_to_profiles(self, file_path, output_dir=None, profiles=None, verify=False):
+        """
+        Convierte un archivo a uno o varios perfiles de forma síncrona, en el hilo
+        que llama (sin el hilo ni el pool del lote). Lo usan los modos sin interfaz,
+        que gestionan su propia concurrencia. Las salidas existentes no se regeneran.
+        
+        Args:
+            file_path: Archivo de entrada
+            output_dir: Directorio de salida (opcional, por defecto el de la entrada)
+            profiles: OutputProfile o lista de perfiles (opcional)
+            verify: Verificar las salidas sin remuestreo con la firma MD5 del FLAC
             
+        Returns:
+            Lista de rutas de salida o None si hubo un error
+        """
+        if not profiles:
+            profiles = [self.default_profile]
+        elif isinstance(profiles, OutputProfile):
+            profiles = [profiles]
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        return self._convert_single_file_for_batch(file_path, output_dir, 1, 1, profiles, verify=verify)
+    
+    @tracing.traced("convert.verify")
+    def _verify_outputs(self, file_path, outputs, gain_db=None):
+        """
+        Comprueba las salidas verificables contra la firma MD5 del FLAC de entrada.
+        Las salidas que no coinciden se borran (para que se regeneren en el
+        siguiente lote) y se notifican como error.
+        
+        Returns:
+            True si todas las salidas verificables son correctas
+        """
+        try:
+            metadata = read_audio_metadata(file_path)
+        except (OSError, ValueError):
+            return True
+        valid = True
+        for profile, output_path in outputs:
+            if not can_verify(metadata, profile, gain_db):
+                continue
+            result = verify_output(file_path, output_path)
+            if not result.ok:
+                os.remove(output_path)
+                self.conversion_error.emit(
+                    file_path, f"Verificación MD5 fallida en {os.path.basename(output_path)}: "
+                               f"esperado {result.expected}, obtenido {result.actual}")
+                valid = False
+        return valid
+    
+    async def _in_pool(self, func, *args, **kwargs):
+        """Ejecuta trabajo bloqueante (disco, NumPy, SQLite) en el pool sin detener el bucle del motor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread_pool,
+                                          functools.partial(self._profiled(func), *args, **kwargs))
+    
+    def _profiled(self, func):
+        """Con --profile, hace que el trabajo enviado al pool cuente en el perfil del lote en curso."""
+        phase = self._batch_phase
+        return phase.wrap(func) if phase is not None else func
+    
+    @tracing.traced("convert.plan")
+    def _plan_conversion(self, file_path, output_dir, profiles, gain_db=None):
+        """
+        Deriva las salidas de un archivo y decide cómo generar las que faltan.
+        Con gain_db se regeneran todas: una salida existente puede no tener la
+        ganancia aplicada.
+        
+        Returns:
+            Tupla (salidas, pendientes, passthrough, duración en segundos o None)
+        """
+        outputs = output_paths_for(file_path, output_dir or os.path.dirname(file_path), profiles)
+        pending = [(profile, output_path) for profile, output_path in outputs
+                   if gain_db is not None or not os.path.exists(output_path)]
+        if not pending:
+            return outputs, pending, False, None
+        try:
+            duration = read_audio_metadata(file_path).duration
+        except (OSError, ValueError):
+            duration = None
+        return outputs, pending, self._can_passthrough(file_path, pending), duration
+    
+    @tracing.traced("convert.stream")
+    def _stream_convert(self, file_path, pending, gain_db=None):
+        """
+        Genera las salidas pendientes con ffmpeg y analiza el audio de la misma
+        decodificación: la primera salida WAV/AIFF se escribe desde la tubería de
+        PCM crudo y el resto las escribe ffmpeg directamente.
+        
+        Returns:
+            AnalysisResult del audio convertido
+        """
+        metadata = read_audio_metadata(file_path)
+        tee_output = next((output for output in pending if can_tee(output[0])), None)
+        direct = [output for output in pending if output is not tee_output]
+        
+        def register(process):
+            self._current_conversions[file_path] = process
+        
+        start = time.perf_counter()
+        try:
+            analysis = stream_convert(self._ffmpeg_path, file_path, metadata, direct, tee_output,
+                                      threads=max(2, self._thread_count // 2), gain_db=gain_db,
+                                      register_process=register)
+            self.metrics.ffmpeg_seconds.observe(time.perf_counter() - start)
+            return analysis
+        finally:
+            self._current_conversions.pop(file_path, None)
+    
+    @tracing.traced("convert.passthrough_analyze")
+    def _passthrough_analyze(self, file_path, pending, gain_db=None):
+        """Conversión directa que además analiza los bloques decodificados."""
+        metadata = read_audio_metadata(file_path)
+        analyzer = StreamAnalyzer(metadata.sample_rate, metadata.channels, metadata.frames)
+        passthrough_convert(file_path, pending, gain_db=gain_db, analyzer=analyzer)
+        return analyzer.result()
+    
+    def _convert_single_file_for_batch(self, file_path, output_dir, total_files, current_index, profiles,
+                                       gain_db=None, verify=False):
+        """
+        Versión síncrona de _convert_single_file_async para llamar desde otros
+        hilos (no desde los del pool ni desde el del motor).
+        
+        Returns:
+            Lista de rutas generadas o None si hubo un error
+        """
+        return self.ffmpeg_engine.run_coroutine(self._convert_single_file_async(
+            file_path, output_dir, total_files, current_index, profiles, gain_db, verify))
+    
+    async def _convert_single_file_async(self, file_path, output_dir, total_files, current_index, profiles,
+                                         gain_db=None, verify=False, analyze=False):
+        """
+        Convierte un solo archivo como parte de un lote, en el bucle del motor.
+        Todas las salidas pendientes se generan con una única invocación de
+        ffmpeg, de modo que la entrada se lee y decodifica una sola vez.
+        Si se indica gain_db, se aplica esa ganancia a todas las salidas; con
+        verify, las salidas sin remuestreo se comparan con la firma MD5 del FLAC.
+        Con analyze, la misma decodificación alimenta el análisis de picos, BPM
+        y sonoridad, que se emite con analysis_ready.
+        
+        Returns:
+            Lista de rutas generadas o None si hubo un error
+        """
+        # Verificar si se ha solicitado cancelar la conversión
+        if self._cancel_conversion:
+            return None
+        
+        start = time.perf_counter()
+        converted = await self._convert_file_async(file_path, output_dir, total_files, current_index,
+                                                   profiles, gain_db, verify, analyze)
+        # Lo interrumpido por una cancelación no cuenta como fallo
+        if converted or not self._cancel_conversion:
+            self.metrics.file_finished(time.perf_counter() - start, bool(converted))
+        return converted
+    
+    async def _convert_file_async(self, file_path, output_dir, total_files, current_index, profiles,
+                                  gain_db=None, verify=False, analyze=False):
+        """Cuerpo de _convert_single_file_async (sin las métricas)."""
         # Calcular y emitir el progreso
         progress = int((current_index / total_files) * 100)
         self.conversion_progress.emit(file_path, progress)
         
         try:
-            # Derivar el nombre del archivo de salida (mismo nombre, extensión .wav)
-            base_name = os.path.basename(file_path)
-            name_without_ext = os.path.splitext(base_name)[0]
-            output_path = os.path.join(output_dir, f"{name_without_ext}.wav")
+            # Derivar una ruta de salida distinta por perfil; las que ya existen no se
+            # regeneran, salvo al normalizar
+            outputs, pending, passthrough, duration = await self._in_pool(
+                self._plan_conversion, file_path, output_dir, profiles, gain_db)
+            for profile, output_path in outputs:
+                if (profile, output_path) not in pending:
+                    # Emitir señal de que ya está convertido
+                    self.conversion_completed.emit(file_path, output_path)
             
-            # Optimización: comprobar si el archivo ya existe
-            if os.path.exists(output_path):
-                # Emitir señal de que ya está convertido
-                self.conversion_completed.emit(file_path, output_path)
-                return output_path
+            if not pending:
+                return [output_path for _, output_path in outputs]
             
-            # Definir comando ffmpeg optimizado para Denon DS-1200
-            cmd = [
-                self._ffmpeg_path,
-                '-i', file_path,
-                '-c:a', 'pcm_s16le',           # Codec PCM 16-bit (formato CD)
-                '-ar', '44100',                # Frecuencia de muestreo 44.1kHz 
-                '-ac', '2',                    # 2 canales (estéreo)
-                '-map_metadata', '-1',         # Eliminar todos los metadatos
-                '-fflags', '+bitexact',        # Modo bit-exacto para mayor compatibilidad
-                '-flags:a', '+bitexact',       # Modo bit-exacto para el audio
-                '-f', 'wav',                   # Formato WAV explícito
-                '-bitexact',                   # Asegura salida bit-exacta
-                '-rf64', 'never',              # Evitar RF64 (menos compatible)
-                '-y',
-                '-loglevel', 'error',
-                '-threads', str(max(2, self._get_optimal_thread_count() // 2)),
-                '-nostdin',
-                output_path
-            ]
+            # Camino rápido: la entrada ya tiene la profundidad y los canales de todas
+            # las salidas, así que basta con reescribir el contenedor (remuestreando
+            # en proceso si hace falta) sin ffmpeg
+            if passthrough:
+                self.conversion_started.emit(file_path)
+                analysis = None
+                if analyze:
+                    analysis = await self._in_pool(self._passthrough_analyze, file_path, pending, gain_db)
+                else:
+                    await self._in_pool(passthrough_convert, file_path, pending, gain_db=gain_db)
+                return await self._finish_outputs(file_path, outputs, pending, gain_db, verify, analysis)
+            
+            # Con análisis: ffmpeg entrega además PCM crudo por una tubería que se
+            # reparte entre el escritor WAV y los analizadores
+            if analyze:
+                self.conversion_started.emit(file_path)
+                try:
+                    analysis = await self._in_pool(self._stream_convert, file_path, pending, gain_db)
+                except RuntimeError as e:
+                    # stream_convert ya ha borrado las salidas a medias
+                    if not self._cancel_conversion:
+                        self.conversion_error.emit(file_path, f"Error en la conversión: {e}")
+                    return None
+                return await self._finish_outputs(file_path, outputs, pending, gain_db, verify, analysis)
+            
+            # Un solo comando ffmpeg con una salida por perfil pendiente
+            cmd = build_ffmpeg_command(
+                self._ffmpeg_path, file_path, pending,
+                threads=max(2, self._thread_count // 2),
+                gain_db=gain_db
+            )
             
             # Emitir señal de inicio
             self.conversion_started.emit(file_path)
             
-            # Ejecutar conversión como proceso
-            process = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                check=False  # No lanzar excepciones, manejar el código de retorno manualmente
-            )
+            # Progreso dentro del archivo a partir de la salida -progress de ffmpeg
+            last_progress = [progress]
+            
+            def on_progress(seconds):
+                if not duration:
+                    return
+                fraction = min(1.0, seconds / duration)
+                overall = int((current_index - 1 + fraction) / total_files * 100)
+                if overall != last_progress[0]:
+                    last_progress[0] = overall
+                    self.conversion_progress.emit(file_path, overall)
+            
+            # Ejecutar ffmpeg en el motor: ningún hilo queda bloqueado esperándolo
+            with tracing.async_span("convert.ffmpeg", file=os.path.basename(file_path)):
+                result = await self.ffmpeg_engine.run_async(cmd, on_progress)
+            self.metrics.ffmpeg_seconds.observe(result.elapsed)
             
             # Verificar si la conversión fue exitosa
-            if process.returncode == 0 and os.path.exists(output_path):
-                self.conversion_completed.emit(file_path, output_path)
-                return output_path
-            else:
-                self.conversion_error.emit(file_path, f"Error en la conversión: {process.stderr}")
-                return None
+            if result.returncode == 0 and all(os.path.exists(path) for _, path in pending):
+                return await self._finish_outputs(file_path, outputs, pending, gain_db, verify)
+            
+            # No dejar salidas a medias de un proceso fallido, cancelado o detenido por tiempo
+            for _, output_path in pending:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+            if not self._cancel_conversion:
+                self.conversion_error.emit(file_path, f"Error en la conversión: {result.stderr}")
+            return None
         except Exception as e:
             self.conversion_error.emit(file_path, str(e))
             return None
     
-    def convert_batch(self, file_list, output_dir=None):
+    async def _finish_outputs(self, file_path, outputs, pending, gain_db, verify, analysis=None):
+        """
+        Verifica (si se pidió) las salidas recién generadas y notifica su finalización.
+        
+        Returns:
+            Lista de rutas de salida o None si la verificación falló
+        """
+        if verify and not await self._in_pool(self._verify_outputs, file_path, pending, gain_db):
+            return None
+        if analysis is not None:
+            # Antes de conversion_completed, para que la interfaz ya lo tenga al cargar el archivo
+            self.analysis_ready.emit(pending[0][1], analysis)
+        for _, output_path in pending:
+            self.conversion_completed.emit(file_path, output_path)
+        return [output_path for _, output_path in outputs]
+    
+    def _record_jobs(self, method, batch_id, *args):
+        """Actualiza la cola persistente; un fallo de la base de datos no detiene el lote."""
+        if batch_id is None:
+            return
+        try:
+            method(batch_id, *args)
+        except Exception as e:
+            print(f"Error al actualizar la cola de trabajos: {e}")
+    
+    async def _convert_group_async(self, file_path, duplicates, output_dir, total_files, current_index,
+                                   profiles, gain_db, stats, verify=False, batch_id=None, analyze=False):
+        """
+        Convierte el representante de un grupo de archivos con el mismo audio y
+        materializa las salidas de sus duplicados a partir de las suyas. El estado
+        de todos los archivos del grupo se guarda en la cola persistente.
+        
+        Returns:
+            Lista de rutas generadas (representante y duplicados) o None si hubo un error
+        """
+        if self._cancel_conversion:
+            # Sin marcar como en curso: el grupo queda pendiente para la reanudación
+            return None
+        group = [file_path] + duplicates
+        planned = {path: [output for _, output in output_paths_for(path, output_dir or os.path.dirname(path),
+                                                                   profiles)]
+                   for path in group}
+        await self._in_pool(self._record_jobs, self.job_queue.mark_running, batch_id, planned)
+        
+        start = time.perf_counter()
+        with tracing.async_span("convert.file", file=os.path.basename(file_path)):
+            converted = await self._convert_single_file_async(
+                file_path, output_dir, total_files, current_index, profiles, gain_db, verify, analyze)
+        if not converted:
+            # Si se canceló a mitad, el grupo sigue en curso y se repite al reanudar
+            if not self._cancel_conversion:
+                await self._in_pool(self._record_jobs, self.job_queue.mark_failed, batch_id, group,
+                                    "Error en la conversión")
+                # Los duplicados no llegan a materializarse: también fallan
+                for duplicate in duplicates:
+                    self.conversion_error.emit(
+                        duplicate, f"Error al convertir {os.path.basename(file_path)}, con el mismo audio")
+            return converted
+        await self._in_pool(self._record_jobs, self.job_queue.mark_done, batch_id, [file_path], converted)
+        elapsed = time.perf_counter() - start
+        
+        results = list(converted)
+        for duplicate in duplicates:
+            try:
+                outputs = output_paths_for(duplicate, output_dir or os.path.dirname(duplicate), profiles)
+                for (_, target), source in zip(outputs, converted):
+                    # Al normalizar, una salida anterior puede no tener la ganancia
+                    if gain_db is not None and target != source and os.path.exists(target):
+                        await self._in_pool(os.remove, target)
+                    if not os.path.exists(target):
+                        method = await self._in_pool(materialize_copy, source, target)
+                        # El tiempo del representante se reparte entre sus salidas
+                        # (sin cerrojo: todas las corrutinas corren en el hilo del motor)
+                        stats.add(method, os.path.getsize(target), elapsed / len(converted))
+                    self.conversion_completed.emit(duplicate, target)
+                    results.append(target)
+                await self._in_pool(self._record_jobs, self.job_queue.mark_done, batch_id, [duplicate],
+                                    [target for _, target in outputs])
+            except Exception as e:
+                await self._in_pool(self._record_jobs, self.job_queue.mark_failed, batch_id, [duplicate], str(e))
+                self.conversion_error.emit(duplicate, str(e))
+        return results
+    
+    async def _convert_groups_async(self, groups, output_dir, profiles, gains, stats, verify, batch_id,
+                                    analyze=False):
+        """
+        Convierte todos los grupos de un lote con una ventana de concurrencia
+        igual a la del motor.
+        
+        Returns:
+            Lista de resultados de _convert_group_async, en el orden de groups
         """
-        Convierte un lote de archivos FLAC a WAV de manera optimizada.
+        window = asyncio.Semaphore(self.ffmpeg_engine.max_concurrency)
+        total_files = len(groups)
+        
+        async def bounded(index, file_path):
+            try:
+                async with window:
+                    return await self._convert_group_async(
+                        file_path, groups[file_path], output_dir, total_files, index + 1, profiles,
+                        gains.get(file_path), stats, verify, batch_id, analyze)
+            finally:
+                self.metrics.queue_depth.dec()
+        
+        self.metrics.queue_depth.inc(total_files)
+        return await asyncio.gather(*(bounded(index, file_path) for index, file_path in enumerate(groups)))
+    
+    def _preflight(self, file_list):
+        """
+        Triaje previo: decodifica de prueba todos los archivos en un pool de
+        procesos, notifica los dañados como errores y guarda el informe.
+        
+        Returns:
+            Lista de archivos válidos, en el orden original
+        """
+        report = triage_files(file_list, max_workers=self._thread_count,
+                              should_stop=lambda: self._cancel_conversion)
+        for result in report.failures:
+            self.conversion_error.emit(
+                result.path, f"Triaje: {STATUS_LABELS[result.status]} ({result.message})")
+        
+        report_path = os.path.join(
+            self.triage_report_dir, time.strftime("triage_%Y%m%d_%H%M%S.json", time.localtime(report.created_at)))
+        try:
+            report.export_json(report_path)
+        except OSError as e:
+            print(f"Error al guardar el informe de triaje: {e}")
+            report_path = ""
+        self.triage_completed.emit(report, report_path)
+        return report.good_files
+    
+    def convert_batch(self, file_list, output_dir=None, profiles=None, normalize=False, deduplicate=False,
+                      verify=False, preflight=False, analyze=False):
+        """
+        Convierte un lote de archivos FLAC de manera optimizada.
         
         Args:
             file_list: Lista de rutas a archivos FLAC
             output_dir: Directorio de salida (opcional)
+            profiles: OutputProfile o lista de perfiles a generar por cada archivo
+                      (opcional, por defecto WAV para Denon DS-1200). Con varios
+                      perfiles cada entrada se decodifica una sola vez.
+            normalize: Normalizar la sonoridad en dos pasadas (medición EBU R128
+                       con caché persistente y ganancia aplicada al convertir); las
+                       salidas que ya existan se regeneran con la ganancia
+            deduplicate: Convertir una sola vez los archivos con el mismo audio y
+                         materializar las demás salidas con reflink, enlace duro o copia
+            verify: Comparar cada salida WAV sin remuestreo con la firma MD5 del
+                    FLAC de entrada (las que no coinciden se borran y se notifican)
+            preflight: Decodificar de prueba todos los archivos antes de convertir y
+                       apartar los dañados (truncados, CRC incorrecto, no admitidos)
+            analyze: Analizar picos, BPM y sonoridad con la misma decodificación de
+                     la conversión (se emite analysis_ready por cada archivo)
+        
+        Returns:
+            Identificador del lote en la cola persistente (None si no se pudo registrar)
         """
+        if not profiles:
+            profiles = [self.default_profile]
+        elif isinstance(profiles, OutputProfile):
+            profiles = [profiles]
+        options = dict(normalize=normalize, deduplicate=deduplicate, verify=verify, preflight=preflight,
+                       analyze=analyze)
+        
+        # Registrar el lote antes de empezar: si la aplicación se cierra, se puede reanudar
+        try:
+            batch_id = self.job_queue.create_batch(file_list, output_dir, profiles, options)
+        except Exception as e:
+            print(f"Error al registrar el lote en la cola de trabajos: {e}")
+            batch_id = None
+        self._start_batch(batch_id, file_list, output_dir, profiles, **options)
+        return batch_id
+    
+    def resume_batch(self, batch_id):
+        """
+        Reanuda un lote interrumpido de la cola persistente. Los archivos ya
+        convertidos no se repiten; las salidas de los que estaban en curso al
+        interrumpirse se borran (pueden estar a medias) y se vuelven a generar.
+        
+        Args:
+            batch_id: Identificador del lote
+            
+        Returns:
+            Lista de archivos que se van a convertir
+        """
+        batch = self.job_queue.get_batch(batch_id)
+        if batch is None:
+            raise KeyError(f"Lote desconocido: {batch_id}")
+        for output in self.job_queue.reset_interrupted(batch_id):
+            if os.path.exists(output):
+                os.remove(output)
+        file_list = self.job_queue.pending_files(batch_id)
+        self._start_batch(batch_id, file_list, batch.output_dir, batch.profiles, **batch.options)
+        return file_list
+    
+    def _start_batch(self, batch_id, file_list, output_dir, profiles, normalize=False, deduplicate=False,
+                     verify=False, preflight=False, analyze=False):
+        """Lanza el hilo de un lote (nuevo o reanudado); ver convert_batch."""
         # Resetear el flag de cancelación
         self._cancel_conversion = False
         converted_files = []
         
         def convert_thread():
             """Función interna para manejar la conversión en un hilo separado."""
-            total_files = len(file_list)
-            
-            # Usar un pool de hilos para conversión en paralelo con límite óptimo
-            futures = []
-            for i, file_path in enumerate(file_list):
-                # Verificar si se ha solicitado cancelar
-                if self._cancel_conversion:
-                    break
-                    
-                # Enviar la tarea de conversión al pool de hilos
-                future = self._thread_pool.submit(
-                    self._convert_single_file_for_batch,
-                    file_path, 
-                    output_dir, 
-                    total_files,
-                    i + 1
-                )
-                futures.append(future)
+            try:
+                # Asegurar que el directorio de salida exista
+                if output_dir:
+                    os.makedirs(output_dir, exist_ok=True)
                 
-            # Esperar a que terminen todas las conversiones
-            for future in concurrent.futures.as_completed(futures):
-                if future.result():
-                    converted_files.append(future.result())
-                if self._cancel_conversion:
-                    # Cancelar todas las tareas pendientes
-                    for f in futures:
-                        f.cancel()
-                    break
-            
-            # Emitir señal de finalización del lote
-            self.batch_completed.emit()
+                # Triaje previo (opcional): el lote solo recibe archivos que se decodifican bien
+                files = file_list
+                if preflight:
+                    files = self._preflight(file_list)
+                    accepted = set(files)
+                    self._record_jobs(self.job_queue.mark_failed, batch_id,
+                                      [path for path in file_list if path not in accepted], "Apartado en el triaje")
+                
+                # Agrupar los archivos con el mismo audio (opcional): solo se convierte
+                # el primero de cada grupo
+                if deduplicate:
+                    groups = group_duplicates(files, map_func=lambda func, items: self._thread_pool.map(
+                        self._profiled(func), items))
+                else:
+                    groups = {file_path: [] for file_path in files}
+                representatives = list(groups)
+                stats = DedupStats()
+                stats.groups = sum(1 for duplicates in groups.values() if duplicates)
+                stats.duplicates = len(files) - len(representatives)
+                
+                # Primera pasada (opcional): medir la sonoridad de todos los archivos;
+                # las medidas de ejecuciones anteriores salen de la caché sin leer el audio
+                gains = {}
+                if normalize:
+                    gains = dict(zip(representatives, self._thread_pool.map(self._profiled(self._measure_gain),
+                                                                            representatives)))
+                    self.loudness_cache.save()
+                    # Sin medida no se convierte sin ganancia como si nada: el grupo falla
+                    if not self._cancel_conversion:
+                        for file_path in [path for path in representatives if gains[path] is None]:
+                            group = [file_path] + groups.pop(file_path)
+                            self._record_jobs(self.job_queue.mark_failed, batch_id, group,
+                                              "No se pudo medir la sonoridad")
+                            for path in group:
+                                self.conversion_error.emit(path, "No se pudo medir la sonoridad para normalizar")
+                
+                # Conversión concurrente en el motor asíncrono: un solo hilo vigila todos
+                # los procesos ffmpeg y el pool queda para el trabajo de disco y CPU
+                results = self.ffmpeg_engine.run_coroutine(self._convert_groups_async(
+                    groups, output_dir, profiles, gains, stats, verify, batch_id, analyze))
+                for result in results:
+                    if result:
+                        converted_files.extend(result)
+                
+                # Cerrar el lote en la cola si no queda nada pendiente (tras una cancelación sigue abierto)
+                self._record_jobs(self.job_queue.finish_batch, batch_id)
+                
+                # Emitir el resumen de la deduplicación (batch_completed se emite siempre, al final)
+                if deduplicate:
+                    self.deduplication_report.emit(stats)
+            except Exception as e:
+                # Un fallo fuera de la conversión de cada archivo (directorio de salida,
+                # triaje, deduplicación, caché de sonoridad, motor) no debe dejar el
+                # lote sin terminar: se notifica en los archivos que no llegaron a convertirse
+                print(f"Error en el lote de conversión: {e}")
+                for file_path in file_list:
+                    outputs = output_paths_for(file_path, output_dir or os.path.dirname(file_path), profiles)
+                    if not all(os.path.exists(output) for _, output in outputs):
+                        self.conversion_error.emit(file_path, f"Error en el lote: {e}")
+            finally:
+                self.batch_completed.emit()
+        
+        def profiled_thread():
+            # Con --profile todo el lote es una fase, incluido el trabajo que reparte al pool
+            with profiling.phase("batch_conversion", files=len(file_list)) as phase:
+                self._batch_phase = phase if profiling.is_enabled() else None
+                try:
+                    convert_thread()
+                finally:
+                    self._batch_phase = None
         
         # Iniciar la conversión en un hilo separado para no bloquear la interfaz
-        threading.Thread(target=convert_thread, daemon=True).start()
+        threading.Thread(target=profiled_thread, daemon=True).start()
         
     def cancel_conversions(self):
         """Cancela todas las conversiones en curso."""
         self._cancel_conversion = True
         
         # Terminar todos los procesos activos
-        for file_path, process in self._current_conversions.items():
+        for file_path, process in list(self._current_conversions.items()):
             try:
                 process.terminate()
             except:
@@ -304,3 +784,6 @@ class AudioConverter(QObject):
                 
         # Limpiar la lista de conversiones
         self._current_conversions.clear()
+        
+        # Matar los ffmpeg de los lotes (sus salidas a medias se borran al terminar)
+        self.ffmpeg_engine.cancel_all()
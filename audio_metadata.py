@@ -0,0 +1,380 @@
+'''
+Módulo de lectura rápida de metadatos para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene un lector que analiza solo las cabeceras de los archivos
+(STREAMINFO y comentarios Vorbis de FLAC, fragmentos fmt/data/LIST de WAV) en
+una única apertura, sin decodificar audio, y memoriza el resultado por huella
+del archivo (ruta, tamaño y fecha de modificación).
+'''
+
+import os
+import struct
+import threading
+from collections import OrderedDict, namedtuple
+
+# Número máximo de entradas en la caché de metadatos
+_CACHE_MAX_ENTRIES = 4096
+
+# Identificadores de formato del fragmento fmt de WAV
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Etiquetas INFO de WAV traducidas a nombres de comentario Vorbis
+_WAV_INFO_TAGS = {
+    b'INAM': 'TITLE',
+    b'IART': 'ARTIST',
+    b'IPRD': 'ALBUM',
+    b'IGNR': 'GENRE',
+    b'ICRD': 'DATE',
+    b'ICMT': 'COMMENT',
+    b'ITRK': 'TRACKNUMBER',
+}
+
+_AudioMetadataBase = namedtuple('AudioMetadata', [
+    'path',             # Ruta del archivo
+    'fingerprint',      # (ruta, tamaño, mtime_ns) usada como clave de caché
+    'format',           # 'FLAC', 'WAV' u otro formato reconocido por soundfile
+    'subtype',          # 'PCM_16', 'PCM_24', 'FLOAT'...
+    'sample_rate',      # Frecuencia de muestreo en Hz
+    'channels',         # Número de canales
+    'bits_per_sample',  # Profundidad de bits (None si no se conoce)
+    'frames',           # Número total de muestras por canal
+    'md5',              # Firma MD5 de STREAMINFO en hexadecimal (solo FLAC)
+    'tags',             # Tupla de pares (CLAVE, valor) con las etiquetas
+    'data_offset',      # Desplazamiento del fragmento data (solo WAV)
+    'data_size',        # Tamaño en bytes del fragmento data (solo WAV)
+])
+
+
+class AudioMetadata(_AudioMetadataBase):
+    """Registro inmutable y compacto con la información de cabecera de un archivo."""
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        """Duración en segundos."""
+        if not self.sample_rate:
+            return 0.0
+        return self.frames / float(self.sample_rate)
+
+    @property
+    def duration_text(self):
+        """Duración en formato legible (m:ss)."""
+        duration_seconds = self.duration
+        minutes = int(duration_seconds // 60)
+        seconds = int(duration_seconds % 60)
+        return f"{minutes}:{seconds:02d}"
+
+    def get_tag(self, name, default=None):
+        """
+        Obtiene el primer valor de una etiqueta sin distinguir mayúsculas.
+
+        Args:
+            name: Nombre de la etiqueta (por ejemplo 'BPM')
+            default: Valor devuelto si la etiqueta no existe
+        """
+        name = name.upper()
+        for key, value in self.tags:
+            if key == name:
+                return value
+        return default
+
+    def to_info_dict(self, file_name=None):
+        """
+        Convierte el registro al diccionario que usan los widgets de información.
+
+        Args:
+            file_name: Nombre a mostrar (opcional)
+        """
+        info = {
+            "samplerate": self.sample_rate,
+            "channels": self.channels,
+            "format": self.format,
+            "subtype": self.subtype or "N/A",
+            "duration": self.duration_text,
+            "duration_seconds": self.duration,
+            "bit_depth": self.bits_per_sample or "N/A",
+        }
+        if file_name is not None:
+            info["file_name"] = file_name
+        return info
+
+
+_metadata_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def file_fingerprint(path):
+    """
+    Calcula la huella de un archivo a partir de su ruta, tamaño y fecha de modificación.
+
+    Args:
+        path: Ruta al archivo
+
+    Returns:
+        Una tupla (ruta absoluta, tamaño, mtime_ns)
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def read_audio_metadata(path):
+    """
+    Lee los metadatos de un archivo de audio analizando solo su cabecera.
+    El resultado se memoriza por huella, de modo que las llamadas repetidas
+    sobre un archivo sin cambios no vuelven a abrirlo.
+
+    Args:
+        path: Ruta al archivo de audio
+
+    Returns:
+        Un AudioMetadata con la información del archivo
+
+    Raises:
+        OSError: si el archivo no existe o no se puede leer
+        ValueError: si el formato no es reconocido
+    """
+    fingerprint = file_fingerprint(path)
+
+    with _cache_lock:
+        cached = _metadata_cache.get(fingerprint)
+        if cached is not None:
+            _metadata_cache.move_to_end(fingerprint)
+            return cached
+
+    with open(path, 'rb') as f:
+        magic = f.read(12)
+        f.seek(0)
+        if magic[:3] == b'ID3' or magic[:4] == b'fLaC':
+            metadata = _parse_flac(f, path, fingerprint)
+        elif magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+            metadata = _parse_wav(f, path, fingerprint)
+        else:
+            metadata = None
+
+    if metadata is None:
+        # Formato sin analizador propio: recurrir a soundfile
+        metadata = _read_with_soundfile(path, fingerprint)
+
+    with _cache_lock:
+        _metadata_cache[fingerprint] = metadata
+        if len(_metadata_cache) > _CACHE_MAX_ENTRIES:
+            _metadata_cache.popitem(last=False)
+
+    return metadata
+
+
+def clear_metadata_cache():
+    """Vacía la caché de metadatos."""
+    with _cache_lock:
+        _metadata_cache.clear()
+
+
+def _skip_id3v2(f):
+    """Salta una etiqueta ID3v2 al inicio del archivo si existe."""
+    header = f.read(10)
+    if len(header) == 10 and header[:3] == b'ID3':
+        # Tamaño codificado en 4 bytes "syncsafe" de 7 bits
+        size = 0
+        for byte in header[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if header[5] & 0x10 else 0
+        f.seek(10 + size + footer)
+    else:
+        f.seek(0)
+
+
+def _parse_flac(f, path, fingerprint):
+    """Analiza los bloques de metadatos de un archivo FLAC."""
+    _skip_id3v2(f)
+    if f.read(4) != b'fLaC':
+        return None
+
+    streaminfo = None
+    tags = ()
+
+    while True:
+        block_header = f.read(4)
+        if len(block_header) < 4:
+            break
+        is_last = bool(block_header[0] & 0x80)
+        block_type = block_header[0] & 0x7F
+        block_length = int.from_bytes(block_header[1:4], 'big')
+
+        if block_type == 0:
+            streaminfo = f.read(block_length)
+        elif block_type == 4:
+            tags = _parse_vorbis_comment(f.read(block_length))
+        else:
+            # Saltar bloques que no interesan (imágenes, tabla de búsqueda...)
+            f.seek(block_length, os.SEEK_CUR)
+
+        if is_last:
+            break
+
+    if streaminfo is None or len(streaminfo) < 34:
+        raise ValueError(f"STREAMINFO inválido en {os.path.basename(path)}")
+
+    # Campos empaquetados: frecuencia (20 bits), canales-1 (3), bits-1 (5), muestras (36)
+    packed = int.from_bytes(streaminfo[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x07) + 1
+    bits_per_sample = ((packed >> 36) & 0x1F) + 1
+    frames = packed & 0xFFFFFFFFF
+    md5 = streaminfo[18:34].hex()
+    if md5 == '0' * 32:
+        # El codificador no calculó la firma
+        md5 = None
+
+    return AudioMetadata(
+        path=path,
+        fingerprint=fingerprint,
+        format='FLAC',
+        subtype=f'PCM_{bits_per_sample}' if bits_per_sample in (8, 16, 24) else None,
+        sample_rate=sample_rate,
+        channels=channels,
+        bits_per_sample=bits_per_sample,
+        frames=frames,
+        md5=md5,
+        tags=tags,
+        data_offset=None,
+        data_size=None,
+    )
+
+
+def _parse_vorbis_comment(block):
+    """Analiza un bloque VORBIS_COMMENT y devuelve una tupla de pares (CLAVE, valor)."""
+    tags = []
+    try:
+        vendor_length = struct.unpack_from('<I', block, 0)[0]
+        offset = 4 + vendor_length
+        count = struct.unpack_from('<I', block, offset)[0]
+        offset += 4
+        for _ in range(count):
+            length = struct.unpack_from('<I', block, offset)[0]
+            offset += 4
+            comment = block[offset:offset + length].decode('utf-8', 'replace')
+            offset += length
+            key, sep, value = comment.partition('=')
+            if sep:
+                tags.append((key.upper(), value))
+    except struct.error:
+        # Bloque truncado: conservar las etiquetas leídas hasta el momento
+        pass
+    return tuple(tags)
+
+
+def _parse_wav(f, path, fingerprint):
+    """Analiza los fragmentos RIFF de un archivo WAV."""
+    f.seek(12)
+
+    fmt = None
+    data_offset = None
+    data_size = None
+    tags = []
+
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+        if chunk_id == b'fmt ':
+            fmt = f.read(chunk_size)
+        elif chunk_id == b'data':
+            data_offset = f.tell()
+            data_size = chunk_size
+            f.seek(chunk_size, os.SEEK_CUR)
+        elif chunk_id == b'LIST':
+            tags.extend(_parse_wav_info(f.read(chunk_size)))
+        else:
+            f.seek(chunk_size, os.SEEK_CUR)
+
+        # Los fragmentos RIFF se alinean a 2 bytes
+        if chunk_size % 2:
+            f.seek(1, os.SEEK_CUR)
+
+    if fmt is None or len(fmt) < 16 or data_offset is None:
+        return None
+
+    audio_format, channels, sample_rate, _byte_rate, block_align, bits_per_sample = \
+        struct.unpack_from('<HHIIHH', fmt, 0)
+    if audio_format == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        # El subformato real son los 2 primeros bytes del GUID
+        audio_format = struct.unpack_from('<H', fmt, 24)[0]
+
+    if audio_format == _WAVE_FORMAT_PCM:
+        subtype = 'PCM_U8' if bits_per_sample == 8 else f'PCM_{bits_per_sample}'
+    elif audio_format == _WAVE_FORMAT_IEEE_FLOAT:
+        subtype = 'DOUBLE' if bits_per_sample == 64 else 'FLOAT'
+    else:
+        return None
+
+    # Cabeceras de archivos truncados pueden declarar más datos de los que hay
+    file_size = fingerprint[1]
+    data_size = min(data_size, max(0, file_size - data_offset))
+
+    return AudioMetadata(
+        path=path,
+        fingerprint=fingerprint,
+        format='WAV',
+        subtype=subtype,
+        sample_rate=sample_rate,
+        channels=channels,
+        bits_per_sample=bits_per_sample,
+        frames=data_size // block_align if block_align else 0,
+        md5=None,
+        tags=tuple(tags),
+        data_offset=data_offset,
+        data_size=data_size,
+    )
+
+
+def _parse_wav_info(chunk):
+    """Analiza un fragmento LIST/INFO de WAV."""
+    tags = []
+    if chunk[:4] != b'INFO':
+        return tags
+    offset = 4
+    while offset + 8 <= len(chunk):
+        sub_id, sub_size = struct.unpack_from('<4sI', chunk, offset)
+        offset += 8
+        value = chunk[offset:offset + sub_size].split(b'\x00', 1)[0]
+        offset += sub_size + (sub_size % 2)
+        name = _WAV_INFO_TAGS.get(sub_id)
+        if name:
+            tags.append((name, value.decode('latin-1')))
+    return tags
+
+
+def _read_with_soundfile(path, fingerprint):
+    """Obtiene los metadatos con soundfile para formatos sin analizador propio."""
+    import soundfile as sf
+
+    try:
+        info = sf.info(path)
+    except Exception as e:
+        raise ValueError(f"Formato no reconocido: {e}")
+
+    bits = None
+    if info.subtype and info.subtype.startswith('PCM_'):
+        try:
+            bits = int(info.subtype.split('_')[1])
+        except ValueError:
+            bits = None
+
+    return AudioMetadata(
+        path=path,
+        fingerprint=fingerprint,
+        format=info.format,
+        subtype=info.subtype,
+        sample_rate=info.samplerate,
+        channels=info.channels,
+        bits_per_sample=bits,
+        frames=info.frames,
+        md5=None,
+        tags=(),
+        data_offset=None,
+        data_size=None,
+    )
@@ -0,0 +1,132 @@
+'''
+Módulo de informes de lote para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene BatchReport, que acumula el resultado de cada archivo de
+una conversión por lotes (en memoria) y permite exportarlo a JSON, de modo que
+los errores se revisan al final sin interrumpir el lote con diálogos modales.
+'''
+
+import json
+import os
+import time
+from collections import namedtuple
+
+BatchReportEntry = namedtuple('BatchReportEntry', [
+    'file_path',    # Archivo de entrada
+    'status',       # 'convertido' o 'error'
+    'output_path',  # Archivo generado (None si hubo error)
+    'message',      # Mensaje de error (None si se convirtió)
+    'timestamp',    # Momento en que se registró el resultado (segundos desde epoch)
+])
+
+
+class BatchReport:
+    """Informe estructurado del resultado de un lote de conversión."""
+
+    def __init__(self, file_list=None, output_dir=None):
+        """
+        Inicializa un informe vacío.
+
+        Args:
+            file_list: Lista de archivos del lote (opcional)
+            output_dir: Directorio de salida del lote (opcional)
+        """
+        self.file_list = list(file_list or [])
+        self.output_dir = output_dir
+        self.started_at = time.time()
+        self.finished_at = None
+        self.entries = []
+        self.deduplication = None  # Resumen de DedupStats.to_dict() si el lote deduplicó
+        self.triage = None         # Resumen del triaje previo y ruta de su informe
+
+    def add_success(self, file_path, output_path):
+        """Registra un archivo convertido correctamente."""
+        self.entries.append(BatchReportEntry(file_path, "convertido", output_path, None, time.time()))
+
+    def add_error(self, file_path, message):
+        """Registra un archivo cuya conversión falló."""
+        self.entries.append(BatchReportEntry(file_path, "error", None, message, time.time()))
+
+    def set_deduplication(self, stats):
+        """Guarda el resumen de la deduplicación del lote (un DedupStats)."""
+        self.deduplication = stats.to_dict()
+
+    def set_triage(self, report, report_path):
+        """Guarda el resumen del triaje previo del lote (un TriageReport)."""
+        self.triage = dict(report.summary(), report_path=report_path)
+
+    def finish(self):
+        """Marca el lote como terminado."""
+        self.finished_at = time.time()
+
+    @property
+    def completed(self):
+        """Entradas convertidas correctamente."""
+        return [entry for entry in self.entries if entry.status == "convertido"]
+
+    @property
+    def errors(self):
+        """Entradas con error."""
+        return [entry for entry in self.entries if entry.status == "error"]
+
+    def summary(self):
+        """
+        Resume el lote.
+
+        Returns:
+            Un diccionario con totales y duración
+        """
+        # Un archivo con varias salidas cuenta una sola vez
+        converted = {entry.file_path for entry in self.entries if entry.status == "convertido"}
+        failed = {entry.file_path for entry in self.entries if entry.status == "error"} - converted
+        seen = len(converted) + len(failed)
+        end = self.finished_at or time.time()
+        return {
+            "total": len(self.file_list) or seen,
+            "converted": len(converted),
+            "failed": len(failed),
+            "pending": max(0, len(self.file_list) - seen),
+            "outputs": sum(1 for entry in self.entries if entry.status == "convertido"),
+            "elapsed_seconds": round(end - self.started_at, 3),
+        }
+
+    def summary_text(self):
+        """Resumen legible para mostrar en la interfaz."""
+        summary = self.summary()
+        text = f"{summary['converted']} convertidos, {summary['failed']} con error"
+        if summary['pending']:
+            text += f", {summary['pending']} pendientes"
+        if self.triage and self.triage['failed']:
+            text += f", {self.triage['failed']} apartados por el triaje"
+        if self.deduplication and self.deduplication['duplicates']:
+            text += (f", {self.deduplication['duplicates']} duplicados "
+                     f"({self.deduplication['bytes_saved'] / 1e6:.1f} MB ahorrados)")
+        return text + f" ({summary['elapsed_seconds']:.1f} s)"
+
+    def to_dict(self):
+        """Convierte el informe en un diccionario serializable."""
+        return {
+            "output_dir": self.output_dir,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "summary": self.summary(),
+            "deduplication": self.deduplication,
+            "triage": self.triage,
+            "entries": [entry._asdict() for entry in self.entries],
+        }
+
+    def export_json(self, path):
+        """
+        Exporta el informe a un archivo JSON.
+
+        Args:
+            path: Ruta del archivo de destino
+
+        Returns:
+            La ruta escrita
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la deduplicación por contenido.
+Genera una biblioteca sintética en la que cada pista aparece varias veces en
+carpetas distintas y convierte el lote con y sin deduplicación, informando del
+tiempo total, del espacio ocupado por las salidas y del resumen de DedupStats.
+
+Uso:
+    python benchmarks/bench_dedup.py [--tracks N] [--copies C] [--seconds S]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from audio_converter import AudioConverter
+
+
+def create_library(directory, tracks, copies, seconds):
+    """Genera FLAC de 24 bits a 48 kHz y los copia en varias carpetas."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for copy in range(copies):
+        os.makedirs(os.path.join(directory, f"carpeta_{copy}"))
+    for i in range(tracks):
+        data = (rng.standard_normal((48000 * seconds, 2)) * 0.1).astype('float32')
+        original = os.path.join(directory, "carpeta_0", f"track_{i:03d}.flac")
+        sf.write(original, data, 48000, subtype='PCM_24')
+        paths.append(original)
+        for copy in range(1, copies):
+            # Nombre distinto por copia para que las salidas no colisionen
+            target = os.path.join(directory, f"carpeta_{copy}", f"track_{i:03d} ({copy}).flac")
+            paths.append(shutil.copy(original, target))
+    return paths
+
+
+def disk_usage(directory):
+    """Bytes realmente ocupados (los enlaces duros cuentan una sola vez)."""
+    seen = set()
+    total = 0
+    for entry in os.scandir(directory):
+        stat = entry.stat()
+        if stat.st_ino not in seen:
+            seen.add(stat.st_ino)
+            total += stat.st_blocks * 512
+    return total
+
+
+def run_batch(files, output_dir, deduplicate):
+    """Convierte el lote y devuelve (segundos, DedupStats o None)."""
+    converter = AudioConverter()
+    done = threading.Event()
+    reports = []
+    converter.batch_completed.connect(done.set, Qt.DirectConnection)
+    converter.deduplication_report.connect(reports.append, Qt.DirectConnection)
+    start = time.perf_counter()
+    converter.convert_batch(files, output_dir, deduplicate=deduplicate)
+    done.wait()
+    return time.perf_counter() - start, (reports[0] if reports else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=8)
+    parser.add_argument('--copies', type=int, default=3)
+    parser.add_argument('--seconds', type=int, default=30)
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    with tempfile.TemporaryDirectory() as directory:
+        files = create_library(directory, args.tracks, args.copies, args.seconds)
+        plain_dir = os.path.join(directory, 'sin_dedup')
+        dedup_dir = os.path.join(directory, 'con_dedup')
+        for output_dir in (plain_dir, dedup_dir):
+            os.makedirs(output_dir)
+
+        plain, _ = run_batch(files, plain_dir, deduplicate=False)
+        deduped, stats = run_batch(files, dedup_dir, deduplicate=True)
+
+        print(f"Biblioteca: {args.tracks} pistas x {args.copies} copias de {args.seconds} s")
+        print(f"Sin deduplicar: {plain:7.2f} s, {disk_usage(plain_dir) / 1e6:8.1f} MB en disco")
+        print(f"Deduplicando:   {deduped:7.2f} s, {disk_usage(dedup_dir) / 1e6:8.1f} MB en disco")
+        print(f"Resumen: {stats.summary_text()} {dict(stats.methods)}")
+    del app
+
+
+if __name__ == '__main__':
+    main()
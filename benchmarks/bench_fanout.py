@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark de conversión multi-formato.
+Compara dos lotes consecutivos (uno por perfil, decodificando cada FLAC dos
+veces) con la conversión en abanico de AudioConverter (una invocación de
+ffmpeg con varias salidas por archivo). Informa tiempo de pared, CPU de los
+procesos hijos y bytes de entrada leídos.
+
+Uso:
+    python benchmarks/bench_fanout.py [--files N] [--seconds S]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from output_profiles import DEFAULT_PROFILE_NAME, build_ffmpeg_command, get_profile, output_paths_for
+from platform_utils import get_ffmpeg_binary
+
+
+def create_files(directory, count, seconds):
+    """Genera archivos FLAC sintéticos de 24 bits a 48 kHz."""
+    rng = np.random.default_rng(0)
+    data = (rng.standard_normal((48000 * seconds, 2)) * 0.1).astype('float32')
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"track_{i:03d}.flac")
+        sf.write(path, data, 48000, subtype='PCM_24')
+        paths.append(path)
+    return paths
+
+
+def run_commands(commands):
+    """Ejecuta los comandos en serie y devuelve (segundos de pared, segundos de CPU)."""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    for cmd in commands:
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return wall, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--seconds', type=int, default=60)
+    args = parser.parse_args()
+
+    ffmpeg = get_ffmpeg_binary()
+    profiles = [get_profile(DEFAULT_PROFILE_NAME), get_profile('mp3_320')]
+
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = create_files(directory, args.files, args.seconds)
+        input_bytes = sum(os.path.getsize(path) for path in inputs)
+
+        # Dos lotes: una pasada (y una decodificación) por perfil
+        sequential_dir = os.path.join(directory, 'secuencial')
+        os.makedirs(sequential_dir)
+        commands = []
+        for profile in profiles:
+            for path in inputs:
+                outputs = output_paths_for(path, sequential_dir, [profile])
+                commands.append(build_ffmpeg_command(ffmpeg, path, outputs, threads=2))
+        sequential = run_commands(commands)
+
+        # Abanico: una invocación con todas las salidas
+        fanout_dir = os.path.join(directory, 'abanico')
+        os.makedirs(fanout_dir)
+        commands = [build_ffmpeg_command(ffmpeg, path, output_paths_for(path, fanout_dir, profiles), threads=2)
+                    for path in inputs]
+        fanout = run_commands(commands)
+
+    print(f"Archivos: {args.files} x {args.seconds} s, perfiles: {', '.join(p.name for p in profiles)}")
+    print(f"Dos lotes:  {sequential[0]:7.2f} s pared, {sequential[1]:7.2f} s CPU, "
+          f"{input_bytes * len(profiles) / 1e6:8.1f} MB leídos")
+    print(f"Abanico:    {fanout[0]:7.2f} s pared, {fanout[1]:7.2f} s CPU, "
+          f"{input_bytes / 1e6:8.1f} MB leídos")
+    print(f"Mejora de tiempo de pared: {sequential[0] / fanout[0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
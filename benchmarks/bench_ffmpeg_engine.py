@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la orquestación de procesos ffmpeg.
+Lanza N procesos que esperan (simulando ffmpeg limitados por E/S) con la
+ventana de concurrencia indicada, primero con un pool de hilos bloqueados en
+subprocess.run y después con el motor de asyncio, y compara tiempo de reloj e
+hilos del proceso durante la ejecución.
+
+Uso:
+    python benchmarks/bench_ffmpeg_engine.py [--jobs N] [--concurrency C] [--sleep S]
+"""
+
+import argparse
+import concurrent.futures
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ffmpeg_engine import FfmpegEngine
+
+
+def measure(label, run, jobs):
+    """Ejecuta run() muestreando el número de hilos del proceso."""
+    peak = [threading.active_count()]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], threading.active_count())
+            time.sleep(0.005)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    # El hilo de muestreo no cuenta
+    print(f"{label:<22} {elapsed:7.2f} s ({jobs / elapsed:7.1f} procesos/s), hasta {peak[0] - 1} hilos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--sleep', type=float, default=0.5, help="Duración de cada proceso en segundos")
+    args = parser.parse_args()
+
+    cmd = ['sleep', str(args.sleep)]
+    print(f"{args.jobs} procesos de {args.sleep} s, {args.concurrency} simultáneos")
+
+    def with_threads():
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda _: subprocess.run(cmd, check=False), range(args.jobs)))
+
+    engine = FfmpegEngine(max_concurrency=args.concurrency)
+    engine.loop  # Arrancar el hilo del motor fuera de la medida
+
+    def with_engine():
+        futures = [engine.submit(engine.run_async(cmd)) for _ in range(args.jobs)]
+        for future in futures:
+            future.result()
+
+    measure("pool de hilos", with_threads, args.jobs)
+    measure("motor asyncio", with_engine, args.jobs)
+    engine.shutdown()
+
+
+if __name__ == '__main__':
+    main()
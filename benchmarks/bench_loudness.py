@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la primera pasada de normalización.
+Mide cuánto tarda en analizarse la sonoridad de un lote (EBU R128 y pico real
+por bloques) en frío y cuánto en una segunda ejecución que lee las medidas de
+la caché persistente.
+
+Uso:
+    python benchmarks/bench_loudness.py [--files N] [--seconds S]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loudness import LoudnessCache
+
+
+def create_files(directory, count, seconds):
+    """Genera archivos FLAC sintéticos de 24 bits a 48 kHz."""
+    rng = np.random.default_rng(0)
+    data = (rng.standard_normal((48000 * seconds, 2)) * 0.1).astype('float32')
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"track_{i:03d}.flac")
+        sf.write(path, data, 48000, subtype='PCM_24')
+        paths.append(path)
+    return paths
+
+
+def run_pass(cache_path, paths):
+    """Mide todos los archivos con una caché nueva (como una ejecución nueva de la aplicación)."""
+    start = time.perf_counter()
+    cache = LoudnessCache(cache_path)
+    for path in paths:
+        cache.measure(path)
+    cache.save()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--seconds', type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = create_files(directory, args.files, args.seconds)
+        cache_path = os.path.join(directory, 'loudness_cache.json')
+        cold = run_pass(cache_path, paths)
+        warm = run_pass(cache_path, paths)
+
+    audio_seconds = args.files * args.seconds
+    print(f"Archivos: {args.files} x {args.seconds} s")
+    print(f"En frío:     {cold:8.3f} s ({audio_seconds / cold:6.0f}x tiempo real)")
+    print(f"Desde caché: {warm:8.3f} s ({cold / warm:6.0f}x más rápido)")
+
+
+if __name__ == '__main__':
+    main()
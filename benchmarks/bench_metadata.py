@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark de lectura de metadatos.
+Compara la latencia por archivo del camino anterior (varias llamadas a sf.info
+más una apertura con mutagen para el BPM) con el lector de cabeceras de
+audio_metadata, en frío y con la caché caliente.
+
+Uso:
+    python benchmarks/bench_metadata.py [--files N] [--seconds S]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+from mutagen.flac import FLAC
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_metadata import read_audio_metadata, clear_metadata_cache
+
+
+def create_files(directory, count, seconds):
+    """Genera archivos FLAC sintéticos con etiqueta BPM."""
+    paths = []
+    rng = np.random.default_rng(0)
+    data = (rng.standard_normal((44100 * seconds, 2)) * 0.1).astype('float32')
+    for i in range(count):
+        path = os.path.join(directory, f"track_{i:04d}.flac")
+        sf.write(path, data, 44100, subtype='PCM_16')
+        audio = FLAC(path)
+        audio['BPM'] = '128'
+        audio.save()
+        paths.append(path)
+    return paths
+
+
+def legacy_path(path):
+    """Reproduce las aperturas repetidas del código anterior."""
+    sf.info(path)                       # _load_file_info_async
+    sf.info(path)                       # WaveformGenerator.get_audio_info
+    sf.info(path)                       # SpectrogramGenerator.get_audio_info
+    audio = FLAC(path)                  # get_bpm_from_metadata
+    return float(audio['BPM'][0])
+
+
+def fast_path(path):
+    """Un único lector de cabecera memorizado para los mismos consumidores."""
+    metadata = read_audio_metadata(path)
+    read_audio_metadata(path).to_info_dict()
+    read_audio_metadata(path).to_info_dict()
+    return float(metadata.get_tag('BPM'))
+
+
+def measure(func, paths):
+    """Devuelve la latencia media por archivo en microsegundos."""
+    start = time.perf_counter()
+    for path in paths:
+        func(path)
+    return (time.perf_counter() - start) / len(paths) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--seconds', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = create_files(directory, args.files, args.seconds)
+
+        legacy = measure(legacy_path, paths)
+        clear_metadata_cache()
+        cold = measure(fast_path, paths)
+        warm = measure(fast_path, paths)
+
+    print(f"Archivos:                {args.files}")
+    print(f"sf.info x3 + mutagen:    {legacy:9.1f} us/archivo")
+    print(f"Cabecera (caché fría):   {cold:9.1f} us/archivo  ({legacy / cold:.1f}x)")
+    print(f"Cabecera (caché caliente): {warm:7.1f} us/archivo  ({legacy / warm:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark del camino directo (sin remuestreo).
+Mide el tiempo de CPU por archivo al convertir FLAC 16-bit/44.1 kHz estéreo
+al perfil Denon DS-1200 con ffmpeg (camino anterior) y con la copia PCM
+directa de passthrough.
+
+Uso:
+    python benchmarks/bench_passthrough.py [--files N] [--seconds S]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from output_profiles import DEFAULT_PROFILE_NAME, build_ffmpeg_command, get_profile, output_paths_for
+from passthrough import passthrough_convert
+from platform_utils import get_ffmpeg_binary
+
+
+def create_files(directory, count, seconds):
+    """Genera archivos FLAC sintéticos en formato CD."""
+    rng = np.random.default_rng(0)
+    data = (rng.standard_normal((44100 * seconds, 2)) * 0.1).astype('float32')
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"track_{i:03d}.flac")
+        sf.write(path, data, 44100, subtype='PCM_16')
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--seconds', type=int, default=180)
+    args = parser.parse_args()
+
+    profile = get_profile(DEFAULT_PROFILE_NAME)
+    ffmpeg = get_ffmpeg_binary()
+
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = create_files(directory, args.files, args.seconds)
+
+        ffmpeg_dir = os.path.join(directory, 'ffmpeg')
+        os.makedirs(ffmpeg_dir)
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+        for path in inputs:
+            cmd = build_ffmpeg_command(ffmpeg, path, output_paths_for(path, ffmpeg_dir, [profile]), threads=2)
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        ffmpeg_wall = time.perf_counter() - start
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        ffmpeg_cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+        direct_dir = os.path.join(directory, 'directo')
+        os.makedirs(direct_dir)
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        for path in inputs:
+            passthrough_convert(path, output_paths_for(path, direct_dir, [profile]))
+        direct_wall = time.perf_counter() - start
+        direct_cpu = time.process_time() - cpu_start
+
+    n = len(inputs)
+    print(f"Archivos: {n} x {args.seconds} s (FLAC 16-bit/44.1 kHz estéreo)")
+    print(f"ffmpeg:  {ffmpeg_cpu / n * 1000:8.1f} ms CPU/archivo, {ffmpeg_wall / n * 1000:8.1f} ms pared/archivo")
+    print(f"Directo: {direct_cpu / n * 1000:8.1f} ms CPU/archivo, {direct_wall / n * 1000:8.1f} ms pared/archivo")
+    print(f"Ahorro de CPU: {ffmpeg_cpu / direct_cpu:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Benchmark del dibujo de la forma de onda y del espectrograma.
+Genera audio sintético de 10 s a 3 h y recorre las mismas fases que la
+interfaz con la plataforma Qt offscreen:
+  - decodificación: picos del WAV mapeado en memoria (o por bloques si es
+    FLAC) y fragmento remuestreado del espectrograma;
+  - análisis: build_waveform_render (y el BPM con --detect-bpm) y la STFT;
+  - dibujo: WaveformCanvas._update_plot y SpectrogramCanvas hasta que Agg
+    rasteriza la figura.
+Cada fase se cronometra por separado (la mejor de --repeat pasadas) y su
+memoria pico de Python/NumPy se mide con tracemalloc en una pasada aparte,
+para no alterar los tiempos. Con --budget se comprueban presupuestos de
+latencia y el proceso termina con código 1 si alguno se supera.
+
+Uso:
+    python benchmarks/bench_rendering.py [--durations 10,60,600,3600,10800] [--format wav|flac]
+                                         [--repeat N] [--budget FASE=MS] [--dir DIR] [--json RUTA]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import psutil
+import soundfile as sf
+
+# Sin pantalla: los canvas de Qt se dibujan en memoria
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt5.QtWidgets import QApplication
+
+from peaks import file_peaks
+from spectrogram import SpectrogramCanvas, compute_spectrogram, load_spectrogram_audio, render_spectrogram
+from waveform import WaveformCanvas, build_waveform_render, detect_bpm_with_librosa
+from wav_mmap import wav_peaks
+
+DEFAULT_DURATIONS = (10, 60, 600, 3600, 10800)
+SAMPLE_RATE = 44100
+# Segundos de audio sintético escritos en cada bloque
+BLOCK_SECONDS = 10
+# Tempo fijo cuando no se detecta (las marcas de compás se calculan igual)
+DEFAULT_BPM = 128.0
+STAGES = ('decode', 'analysis', 'render')
+
+
+def create_file(directory, seconds, audio_format):
+    """
+    Genera un archivo estéreo de 16 bits por bloques (tono con ruido y
+    envolvente variable) sin tenerlo entero en memoria. Si ya existe en el
+    directorio se reutiliza.
+    """
+    path = os.path.join(directory, f"sintetico_{seconds}s.{audio_format}")
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(0)
+    block = SAMPLE_RATE * BLOCK_SECONDS
+    t = np.arange(block) / SAMPLE_RATE
+    base = (0.3 * np.sin(2 * np.pi * 110 * t)[:, None] + rng.standard_normal((block, 2)) * 0.05).astype('float32')
+    total = seconds * SAMPLE_RATE
+    with sf.SoundFile(path + '.part', 'w', SAMPLE_RATE, 2, 'PCM_16', format=audio_format.upper()) as f:
+        written = 0
+        index = 0
+        while written < total:
+            count = min(block, total - written)
+            f.write(base[:count] * np.float32(0.2 + 0.8 * abs(np.sin(index * 0.7))))
+            written += count
+            index += 1
+    os.replace(path + '.part', path)
+    return path
+
+
+class StageRecorder:
+    """Tiempo (y memoria pico si tracemalloc está activo) de cada fase."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.peak_bytes = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        tracing_memory = tracemalloc.is_tracing()
+        if tracing_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        yield
+        self.seconds[name] = time.perf_counter() - start
+        if tracing_memory:
+            self.peak_bytes[name] = tracemalloc.get_traced_memory()[1] - baseline
+
+
+def run_waveform(path, canvas, app, recorder, detect_bpm):
+    """Fases de WaveformWorker y WaveformCanvas sobre un archivo."""
+    with recorder.stage('decode'):
+        try:
+            peaks, peak_rate = wav_peaks(path)
+        except ValueError:
+            # FLAC: decodificación por bloques, como hace WaveformWorker
+            peaks, peak_rate = file_peaks(path)
+    with recorder.stage('analysis'):
+        bpm = detect_bpm_with_librosa(path) if detect_bpm else DEFAULT_BPM
+        render = build_waveform_render(peaks, peak_rate, bpm)
+    with recorder.stage('render'):
+        canvas._update_plot(render)
+        # El draw_idle pendiente rasteriza la figura con Agg
+        app.processEvents()
+
+
+def run_spectrogram(path, canvas, app, recorder):
+    """Fases de SpectrogramWorker y SpectrogramCanvas sobre un archivo."""
+    with recorder.stage('decode'):
+        y, sr = load_spectrogram_audio(path)
+    with recorder.stage('analysis'):
+        D = compute_spectrogram(y)
+    with recorder.stage('render'):
+        canvas._update_from_canvas(render_spectrogram(D, sr, 1024, os.path.basename(path)))
+        app.processEvents()
+
+
+def measure(run, repeat):
+    """
+    Ejecuta run(recorder) repeat veces para los tiempos y una más con
+    tracemalloc para la memoria.
+
+    Returns:
+        Diccionario fase -> {'ms': mejor tiempo, 'peak_mb': memoria pico}
+    """
+    best = {}
+    for _ in range(repeat):
+        recorder = StageRecorder()
+        run(recorder)
+        for stage, seconds in recorder.seconds.items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+    recorder = StageRecorder()
+    tracemalloc.start()
+    try:
+        run(recorder)
+    finally:
+        tracemalloc.stop()
+    return {stage: {'ms': best[stage] * 1000, 'peak_mb': recorder.peak_bytes[stage] / 1048576}
+            for stage in STAGES}
+
+
+def parse_budgets(values):
+    """Convierte ['waveform.render=200', ...] en {('waveform', 'render'): 200.0}."""
+    budgets = {}
+    for value in values:
+        name, _, limit = value.partition('=')
+        component, _, stage = name.partition('.')
+        if component not in ('waveform', 'spectrogram') or stage not in STAGES or not limit:
+            raise SystemExit(f"Presupuesto no válido: {value} (p. ej. waveform.render=200)")
+        budgets[(component, stage)] = float(limit)
+    return budgets
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f"{seconds} s"
+    if seconds < 3600:
+        return f"{seconds / 60:g} min"
+    return f"{seconds / 3600:g} h"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--durations', default=','.join(str(seconds) for seconds in DEFAULT_DURATIONS),
+                        help="Duraciones en segundos separadas por comas")
+    parser.add_argument('--format', choices=('wav', 'flac'), default='wav')
+    parser.add_argument('--repeat', type=int, default=3, help="Pasadas cronometradas por archivo")
+    parser.add_argument('--detect-bpm', action='store_true', help="Incluir la detección de BPM en el análisis")
+    parser.add_argument('--budget', action='append', default=[], metavar='FASE=MS',
+                        help="Presupuesto de latencia, p. ej. waveform.render=200 (se puede repetir)")
+    parser.add_argument('--dir', default=None, help="Directorio donde generar y reutilizar el audio sintético")
+    parser.add_argument('--json', default=None, help="Guardar los resultados en este archivo JSON")
+    args = parser.parse_args()
+
+    durations = [int(value) for value in args.durations.split(',') if value]
+    budgets = parse_budgets(args.budget)
+    app = QApplication.instance() or QApplication([])
+    waveform_canvas = WaveformCanvas()
+    spectrogram_canvas = SpectrogramCanvas()
+
+    with contextlib.ExitStack() as stack:
+        directory = args.dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(directory, exist_ok=True)
+        paths = {}
+        for seconds in durations:
+            start = time.perf_counter()
+            paths[seconds] = create_file(directory, seconds, args.format)
+            print(f"Audio de {format_duration(seconds)} listo en {time.perf_counter() - start:.1f} s")
+
+        # Calentamiento: importaciones diferidas, caché de fuentes y núcleos de remuestreo
+        warmup = StageRecorder()
+        run_waveform(paths[durations[0]], waveform_canvas, app, warmup, args.detect_bpm)
+        run_spectrogram(paths[durations[0]], spectrogram_canvas, app, warmup)
+
+        results = []
+        for seconds in durations:
+            path = paths[seconds]
+            results.append({
+                'seconds': seconds,
+                'waveform': measure(lambda recorder: run_waveform(
+                    path, waveform_canvas, app, recorder, args.detect_bpm), args.repeat),
+                'spectrogram': measure(lambda recorder: run_spectrogram(
+                    path, spectrogram_canvas, app, recorder), args.repeat),
+            })
+
+    print()
+    print(f"Formato: {args.format.upper()} 16-bit/44.1 kHz estéreo, mejor de {args.repeat} pasadas; "
+          f"memoria pico de Python/NumPy (tracemalloc)")
+    header = f"{'Duración':>9} {'Vista':<12}" + "".join(f"{stage + ' ms':>13}{'MB':>8}" for stage in STAGES)
+    print(header)
+    print("-" * len(header))
+    exceeded = []
+    for result in results:
+        for component in ('waveform', 'spectrogram'):
+            row = f"{format_duration(result['seconds']):>9} {component:<12}"
+            for stage in STAGES:
+                values = result[component][stage]
+                limit = budgets.get((component, stage))
+                mark = '!' if limit is not None and values['ms'] > limit else ' '
+                if mark == '!':
+                    exceeded.append(f"{component}.{stage} con {format_duration(result['seconds'])}: "
+                                    f"{values['ms']:.1f} ms > {limit:g} ms")
+                row += f"{values['ms']:12.1f}{mark}{values['peak_mb']:8.1f}"
+            print(row)
+    # psutil funciona en todas las plataformas; el pico solo lo da Windows (peak_wset)
+    memory = psutil.Process().memory_info()
+    rss_line = f"RSS del proceso al terminar: {memory.rss / 1048576:.0f} MB"
+    if getattr(memory, 'peak_wset', None):
+        rss_line += f" (máximo {memory.peak_wset / 1048576:.0f} MB)"
+    print(rss_line)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'format': args.format, 'repeat': args.repeat, 'results': results}, f, indent=2)
+
+    if exceeded:
+        print("\nPresupuestos superados:")
+        for line in exceeded:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark del remuestreador polifásico compartido.
+Mide el rendimiento (segundos de audio por segundo de reloj) de
+StreamingResampler por bloques para los pares de frecuencias habituales, el
+coste de construir el núcleo frente a reutilizarlo desde la caché, y, si está
+disponible, la referencia de librosa 'kaiser_fast' que usaba el espectrograma.
+
+Uso:
+    python benchmarks/bench_resampling.py [--seconds S] [--block N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from resampling import StreamingResampler, polyphase_kernel
+
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+RATE_PAIRS = [(48000, 44100), (88200, 44100), (96000, 44100), (192000, 44100), (44100, 22050)]
+
+
+def run_streaming(signal, src_rate, dst_rate, block, quality):
+    """Remuestrea la señal por bloques y devuelve los segundos empleados."""
+    resampler = StreamingResampler(src_rate, dst_rate, signal.shape[1], quality)
+    start = time.perf_counter()
+    for offset in range(0, len(signal), block):
+        resampler.process(signal[offset:offset + block])
+    resampler.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=int, default=30)
+    parser.add_argument('--block', type=int, default=65536)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"Señal estéreo de {args.seconds} s, bloques de {args.block} muestras")
+    print(f"{'par':>17} {'núcleo (ms)':>12} {'caché (µs)':>11} {'high':>9} {'fast':>9} {'librosa':>11}")
+
+    for src_rate, dst_rate in RATE_PAIRS:
+        signal = (rng.standard_normal((src_rate * args.seconds, 2)) * 0.1).astype(np.float32)
+
+        polyphase_kernel.cache_clear()
+        start = time.perf_counter()
+        polyphase_kernel(src_rate, dst_rate)
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        polyphase_kernel(src_rate, dst_rate)
+        cached_us = (time.perf_counter() - start) * 1e6
+
+        high = args.seconds / run_streaming(signal, src_rate, dst_rate, args.block, 'high')
+        fast = args.seconds / run_streaming(signal, src_rate, dst_rate, args.block, 'fast')
+
+        reference = "-"
+        if LIBROSA_AVAILABLE:
+            try:
+                start = time.perf_counter()
+                librosa.resample(signal.T, orig_sr=src_rate, target_sr=dst_rate, res_type='kaiser_fast')
+                reference = f"{args.seconds / (time.perf_counter() - start):8.0f}x"
+            except ImportError:
+                # 'kaiser_fast' depende de resampy, que no es una dependencia del proyecto
+                reference = "sin resampy"
+
+        print(f"{src_rate:>7} -> {dst_rate:<6} {build_ms:12.2f} {cached_us:11.1f} "
+              f"{high:8.0f}x {fast:8.0f}x {reference:>11}")
+
+
+if __name__ == '__main__':
+    main()
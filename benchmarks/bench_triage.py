@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark del triaje previo de archivos dañados.
+Genera un lote de FLAC (con una fracción truncada) y mide cuánto tarda la
+decodificación de prueba en el pool de procesos con soundfile y con
+`ffmpeg -f null`, en segundos de audio por segundo de reloj.
+
+Uso:
+    python benchmarks/bench_triage.py [--files N] [--seconds S] [--workers W]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from platform_utils import get_ffmpeg_binary
+from triage import triage_files
+
+
+def create_files(directory, count, seconds):
+    """Genera FLAC de 16 bits a 44.1 kHz; uno de cada cuatro queda truncado."""
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-8000, 8000, (44100 * seconds, 2), dtype=np.int16)
+    template = os.path.join(directory, "plantilla.flac")
+    sf.write(template, samples, 44100, subtype='PCM_16')
+    size = os.path.getsize(template)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"track_{i:03d}.flac")
+        if i % 4 == 3:
+            with open(template, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read(size // 2))
+        else:
+            shutil.copy(template, path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=32)
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = create_files(directory, args.files, args.seconds)
+        audio_seconds = args.files * args.seconds
+        print(f"Lote: {args.files} FLAC de {args.seconds} s, {args.workers} procesos")
+        for label, use_ffmpeg in (("soundfile", False), ("ffmpeg -f null", True)):
+            start = time.perf_counter()
+            report = triage_files(files, args.workers, use_ffmpeg, get_ffmpeg_binary())
+            elapsed = time.perf_counter() - start
+            print(f"{label:<15} {elapsed:7.2f} s ({audio_seconds / elapsed:6.0f}x tiempo real) "
+                  f"-> {report.summary_text()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la verificación MD5 de salidas.
+Genera un lote de pares FLAC/WAV idénticos y mide el rendimiento (MB/s) de
+verify_output, que calcula el MD5 del fragmento data mediante mmap, frente a
+una lectura secuencial del mismo archivo sin calcular nada (el límite del
+disco o de la caché de páginas) y frente a decodificar el WAV con soundfile.
+hashlib libera el GIL, así que también se mide la verificación en paralelo
+con un pool de hilos, como ocurre dentro de un lote.
+
+Uso:
+    python benchmarks/bench_verification.py [--files N] [--seconds S] [--threads T]
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_metadata import clear_metadata_cache
+from verification import verify_output
+
+
+def create_pairs(directory, count, seconds):
+    """Genera pares FLAC/WAV de 16 bits a 44.1 kHz con las mismas muestras."""
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-8000, 8000, (44100 * seconds, 2), dtype=np.int16)
+    pairs = []
+    for i in range(count):
+        source = os.path.join(directory, f"track_{i:03d}.flac")
+        output = os.path.join(directory, f"track_{i:03d}.wav")
+        sf.write(source, samples, 44100, subtype='PCM_16')
+        sf.write(output, samples, 44100, subtype='PCM_16')
+        pairs.append((source, output))
+    return pairs
+
+
+def timed(function, pairs):
+    """Ejecuta function sobre cada par y devuelve los segundos empleados."""
+    start = time.perf_counter()
+    for source, output in pairs:
+        function(source, output)
+    return time.perf_counter() - start
+
+
+def raw_read(source, output):
+    """Lectura secuencial sin procesar."""
+    with open(output, 'rb') as f:
+        while f.read(1 << 20):
+            pass
+
+
+def decode_md5(source, output):
+    """Decodificar con soundfile y calcular el MD5 de las muestras."""
+    data, _ = sf.read(output, dtype='int16')
+    hashlib.md5(data.tobytes()).hexdigest()
+
+
+def check(source, output):
+    """verify_output con la caché de metadatos vacía (como en una ejecución nueva)."""
+    if not verify_output(source, output).ok:
+        raise RuntimeError(f"Firma distinta: {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=16)
+    parser.add_argument('--seconds', type=int, default=120)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        pairs = create_pairs(directory, args.files, args.seconds)
+        total_mb = sum(os.path.getsize(output) for _, output in pairs) / 1e6
+
+        raw_read(*pairs[0])  # Calentar la caché de páginas
+        results = [("Lectura secuencial", timed(raw_read, pairs))]
+        clear_metadata_cache()
+        results.append(("verify_output (mmap)", timed(check, pairs)))
+        clear_metadata_cache()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda pair: check(*pair), pairs))
+            results.append((f"verify_output x{args.threads}", time.perf_counter() - start))
+        results.append(("soundfile + MD5", timed(decode_md5, pairs)))
+
+    print(f"Lote: {args.files} WAV de {args.seconds} s ({total_mb:.0f} MB)")
+    for label, seconds in results:
+        print(f"{label:<22} {seconds:7.3f} s {total_mb / seconds:9.0f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+'''
+Módulo de agregación de eventos de conversión para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene ConversionEventAggregator, que recoge las señales que
+AudioConverter emite desde los hilos del pool y las entrega a la interfaz como
+instantáneas periódicas (20 Hz por defecto). Así un lote de miles de archivos
+genera unas pocas actualizaciones por segundo en lugar de una por evento, sin
+perder ningún estado final, finalización ni error.
+'''
+
+import threading
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, Qt, QTimer, QMetaObject, pyqtSignal, pyqtSlot
+
+# Intervalo por defecto entre instantáneas (20 Hz)
+DEFAULT_INTERVAL_MS = 50
+
+ConversionSnapshot = namedtuple('ConversionSnapshot', [
+    'statuses',    # Diccionario ruta -> último estado ('convirtiendo', 'convertido', 'error')
+    'last_file',   # Último archivo que notificó inicio o progreso (o None)
+    'progress',    # Último porcentaje de progreso del lote (o None)
+    'completed',   # Lista de pares (original, convertido) en orden de llegada
+    'errors',      # Lista de pares (archivo, mensaje) en orden de llegada
+    'batch_done',  # True si el lote terminó en esta ventana
+])
+
+
+class ConversionEventAggregator(QObject):
+    """Agrupa los eventos del conversor y los entrega como instantáneas periódicas."""
+
+    snapshot_ready = pyqtSignal(object)  # Emite un ConversionSnapshot
+
+    def __init__(self, interval_ms=DEFAULT_INTERVAL_MS, parent=None):
+        """
+        Inicializa el agregador.
+
+        Args:
+            interval_ms: Tiempo máximo que se acumulan eventos antes de entregarlos
+            parent: Objeto padre de Qt (opcional)
+        """
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._flush_pending = False
+        self._reset_state()
+
+    def attach(self, converter):
+        """
+        Conecta las señales de un AudioConverter al agregador.
+        La conexión es directa: los eventos se registran en el hilo que los
+        emite y solo la instantánea cruza a la cola de eventos de Qt.
+
+        Args:
+            converter: Instancia de AudioConverter
+        """
+        converter.conversion_started.connect(self.record_started, Qt.DirectConnection)
+        converter.conversion_progress.connect(self.record_progress, Qt.DirectConnection)
+        converter.conversion_completed.connect(self.record_completed, Qt.DirectConnection)
+        converter.conversion_error.connect(self.record_error, Qt.DirectConnection)
+        converter.batch_completed.connect(self.record_batch_completed, Qt.DirectConnection)
+
+    # --- Registro de eventos (se llaman desde cualquier hilo) ---
+
+    def record_started(self, file_path):
+        """Registra el inicio de la conversión de un archivo."""
+        with self._lock:
+            self._statuses[file_path] = "convirtiendo"
+            self._last_file = file_path
+            schedule = self._mark_pending()
+        if schedule:
+            self._request_flush("_schedule_flush")
+
+    def record_progress(self, file_path, progress):
+        """Registra el progreso del lote."""
+        with self._lock:
+            self._last_file = file_path
+            self._progress = progress
+            schedule = self._mark_pending()
+        if schedule:
+            self._request_flush("_schedule_flush")
+
+    def record_completed(self, original_file, converted_file):
+        """Registra la finalización de la conversión de un archivo."""
+        with self._lock:
+            self._statuses[original_file] = "convertido"
+            self._completed.append((original_file, converted_file))
+            schedule = self._mark_pending()
+        if schedule:
+            self._request_flush("_schedule_flush")
+
+    def record_error(self, file_path, error_message):
+        """Registra un error de conversión."""
+        with self._lock:
+            self._statuses[file_path] = "error"
+            self._errors.append((file_path, error_message))
+            schedule = self._mark_pending()
+        if schedule:
+            self._request_flush("_schedule_flush")
+
+    def record_batch_completed(self):
+        """Registra el fin del lote y fuerza una entrega inmediata."""
+        with self._lock:
+            self._batch_done = True
+            self._flush_pending = True
+        self._request_flush("flush")
+
+    # --- Entrega en el hilo de la interfaz ---
+
+    @pyqtSlot()
+    def flush(self):
+        """Emite una instantánea con todos los eventos acumulados desde la anterior."""
+        with self._lock:
+            self._flush_pending = False
+            if not (self._statuses or self._completed or self._errors
+                    or self._batch_done or self._last_file):
+                return
+            snapshot = ConversionSnapshot(
+                statuses=self._statuses,
+                last_file=self._last_file,
+                progress=self._progress,
+                completed=self._completed,
+                errors=self._errors,
+                batch_done=self._batch_done,
+            )
+            self._reset_state()
+        self.snapshot_ready.emit(snapshot)
+
+    @pyqtSlot()
+    def _schedule_flush(self):
+        """Programa la próxima entrega al cabo del intervalo."""
+        QTimer.singleShot(self.interval_ms, self.flush)
+
+    # --- Auxiliares internos ---
+
+    def _reset_state(self):
+        """Reinicia el estado acumulado (debe llamarse con el cerrojo tomado)."""
+        self._statuses = {}
+        self._last_file = None
+        self._progress = None
+        self._completed = []
+        self._errors = []
+        self._batch_done = False
+
+    def _mark_pending(self):
+        """Marca que hay eventos por entregar; devuelve True si hay que programar la entrega."""
+        if self._flush_pending:
+            return False
+        self._flush_pending = True
+        return True
+
+    def _request_flush(self, method_name):
+        """Invoca un método del agregador en su hilo a través de la cola de eventos."""
+        QMetaObject.invokeMethod(self, method_name, Qt.QueuedConnection)
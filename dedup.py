@@ -0,0 +1,170 @@
+'''
+Módulo de deduplicación para la aplicación Convertidor FLAC a WAV.
+Las bibliotecas de DJ suelen contener la misma pista varias veces en rutas
+distintas. Este archivo calcula una clave de contenido del audio decodificado
+(la firma MD5 de STREAMINFO de los FLAC o un MD5 en streaming de las muestras
+PCM) para agrupar las copias, de modo que cada grupo se convierta una sola vez
+y las demás salidas se materialicen con reflink, enlace duro o copia.
+'''
+
+import errno
+import hashlib
+import os
+import shutil
+from collections import Counter, OrderedDict
+
+import soundfile as sf
+
+# fcntl solo existe en sistemas POSIX; sin él no se intenta el reflink
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from audio_metadata import read_audio_metadata
+from verification import wav_data_md5
+
+# ioctl FICLONE de Linux (_IOW(0x94, 9, int)): copia por referencia en Btrfs/XFS
+_FICLONE = 0x40049409
+
+
+def _decoded_md5(path, block_frames=65536):
+    """MD5 en streaming de las muestras decodificadas (int32) de cualquier formato."""
+    digest = hashlib.md5()
+    with sf.SoundFile(path) as source:
+        for block in source.blocks(blocksize=block_frames, dtype='int32'):
+            digest.update(block.tobytes())
+    return digest.hexdigest()
+
+
+def audio_content_key(path):
+    """
+    Calcula una clave que identifica el audio decodificado de un archivo.
+    Dos archivos con la misma clave producen la misma salida para cualquier
+    perfil, aunque tengan rutas, etiquetas o contenedores distintos.
+
+    Args:
+        path: Ruta al archivo de audio
+
+    Returns:
+        Una cadena con el formato de muestra y el MD5 del audio
+    """
+    metadata = read_audio_metadata(path)
+    if metadata.md5:
+        # FLAC: la firma ya está en la cabecera, no hace falta decodificar nada
+        digest = metadata.md5
+    elif metadata.format == 'WAV' and metadata.subtype in ('PCM_16', 'PCM_24') and metadata.data_size:
+        digest = wav_data_md5(metadata)
+    else:
+        return f"decoded:{metadata.sample_rate}:{metadata.channels}:{_decoded_md5(path)}"
+    return f"pcm:{metadata.sample_rate}:{metadata.channels}:{metadata.bits_per_sample}:{digest}"
+
+
+def group_duplicates(file_list, key_func=audio_content_key, map_func=map):
+    """
+    Agrupa los archivos con el mismo contenido de audio.
+
+    Args:
+        file_list: Lista de rutas
+        key_func: Función que calcula la clave de contenido
+        map_func: Función map a usar (p. ej. la de un pool de hilos)
+
+    Returns:
+        OrderedDict representante -> lista de duplicados, en el orden de file_list;
+        los archivos cuya clave no se pudo calcular forman su propio grupo
+    """
+    def safe_key(path):
+        try:
+            return key_func(path)
+        except Exception as e:
+            print(f"Error al calcular la huella de {path}: {e}")
+            return None
+
+    groups = OrderedDict()
+    representatives = {}
+    for path, key in zip(file_list, map_func(safe_key, file_list)):
+        if key is not None and key in representatives:
+            groups[representatives[key]].append(path)
+        else:
+            if key is not None:
+                representatives[key] = path
+            groups[path] = []
+    return groups
+
+
+def _reflink(source, target):
+    """Clona el archivo por referencia (sin copiar datos) si el sistema de archivos lo admite."""
+    if not FCNTL_AVAILABLE:
+        raise OSError(errno.EOPNOTSUPP, "reflink no disponible en esta plataforma")
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+
+def materialize_copy(source, target):
+    """
+    Crea target con el mismo contenido que source ocupando el mínimo espacio.
+    Se intenta, por orden, reflink (copias independientes que comparten bloques),
+    enlace duro y copia normal.
+
+    Args:
+        source: Archivo ya convertido
+        target: Ruta a crear
+
+    Returns:
+        'reflink', 'hardlink' o 'copy' según el método usado
+    """
+    try:
+        _reflink(source, target)
+        return 'reflink'
+    except OSError as e:
+        if os.path.exists(target):
+            os.remove(target)
+        if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+            raise
+    try:
+        os.link(source, target)
+        return 'hardlink'
+    except OSError:
+        shutil.copy2(source, target)
+        return 'copy'
+
+
+class DedupStats:
+    """Resumen de lo ahorrado al materializar duplicados en lugar de convertirlos."""
+
+    def __init__(self):
+        self.groups = 0              # Grupos con al menos un duplicado
+        self.duplicates = 0          # Archivos de entrada que no se convirtieron
+        self.bytes_saved = 0         # Bytes de disco no ocupados (reflink y enlaces duros)
+        self.seconds_saved = 0.0     # Tiempo de conversión evitado (estimado con el del representante)
+        self.methods = Counter()     # Salidas materializadas por método
+
+    def add(self, method, size, seconds):
+        """
+        Registra una salida materializada.
+
+        Args:
+            method: Método devuelto por materialize_copy
+            size: Tamaño en bytes de la salida
+            seconds: Tiempo que habría costado convertirla
+        """
+        self.methods[method] += 1
+        if method != 'copy':
+            self.bytes_saved += size
+        self.seconds_saved += seconds
+
+    def summary_text(self):
+        """Resumen legible para mostrar en la interfaz."""
+        return (f"{self.duplicates} duplicados: {self.bytes_saved / 1e6:.1f} MB y "
+                f"{self.seconds_saved:.1f} s de conversión ahorrados")
+
+    def to_dict(self):
+        """Convierte el resumen en un diccionario serializable."""
+        return {
+            "groups": self.groups,
+            "duplicates": self.duplicates,
+            "bytes_saved": self.bytes_saved,
+            "seconds_saved": round(self.seconds_saved, 3),
+            "methods": dict(self.methods),
+        }
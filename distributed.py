@@ -0,0 +1,542 @@
+'''
+Módulo de conversión distribuida para la aplicación Convertidor FLAC a WAV.
+Un coordinador reparte los archivos de un lote entre procesos trabajadores
+(en esta u otras máquinas) mediante un protocolo sencillo sobre TCP o sockets
+Unix: cada mensaje es un JSON precedido de su longitud, seguido opcionalmente
+de los bytes de un archivo. Los trabajadores piden trabajo, convierten con
+AudioConverter y devuelven el resultado. Si comparten almacenamiento con el
+coordinador trabajan directamente sobre las rutas; si no, el coordinador envía
+el archivo de entrada y recibe las salidas por el mismo socket.
+
+El coordinador entrega los archivos de entrada y, con --stream, escribe las
+salidas que le devuelven los trabajadores: por defecto solo escucha en la
+interfaz local y, para abrirlo a la red con --listen 0.0.0.0:PUERTO, los
+trabajadores deben presentar un secreto compartido (--token o la variable
+FLAC2WAV_TOKEN). El secreto viaja sin cifrar: úsese solo en redes de confianza.
+
+Uso desde la línea de comandos:
+    python distributed.py coordinator --listen 0.0.0.0:5555 --token SECRETO --output SALIDA [--stream] ENTRADA...
+    python distributed.py worker --connect HOST:5555 --token SECRETO [--jobs N]
+'''
+
+import argparse
+import hmac
+import json
+import os
+import shutil
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from PyQt5.QtCore import Qt
+
+from metrics import add_metrics_arguments, start_exporters
+from output_profiles import (DEFAULT_PROFILE_NAME, OutputProfile, get_profile, output_paths_for,
+                             profile_from_dict, profile_to_dict)
+
+# Longitud del JSON de cada mensaje (entero sin signo de 32 bits, big-endian)
+_LENGTH = struct.Struct('>I')
+_MAX_MESSAGE_BYTES = 16 << 20
+_CHUNK_BYTES = 1 << 20
+# Espera sugerida a un trabajador cuando no hay trabajo pero quedan conversiones en curso
+_RETRY_SECONDS = 0.5
+
+PROTOCOL_VERSION = 1
+# Variable de entorno con el secreto compartido entre coordinador y trabajadores
+TOKEN_ENV = 'FLAC2WAV_TOKEN'
+
+JobResult = namedtuple('JobResult', [
+    'path',      # Archivo de entrada
+    'ok',        # True si se generaron todas las salidas
+    'outputs',   # Rutas de salida en el coordinador
+    'error',     # Mensaje de error (None si ok)
+    'worker',    # Nombre del trabajador que lo convirtió (None si ya existía)
+    'seconds',   # Tiempo de conversión informado por el trabajador
+])
+
+
+def parse_address(text):
+    """
+    Interpreta una dirección de la línea de comandos.
+
+    Args:
+        text: 'host:puerto' para TCP, o 'unix:/ruta' (o una ruta con '/') para un socket Unix
+
+    Returns:
+        Tupla (host, puerto) o ruta del socket Unix
+    """
+    if text.startswith('unix:'):
+        return text[len('unix:'):]
+    if '/' in text:
+        return text
+    host, _, port = text.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+
+def send_message(sock, message, payload_path=None):
+    """
+    Envía un mensaje y, opcionalmente, el contenido de un archivo a continuación.
+
+    Args:
+        sock: Socket conectado
+        message: Diccionario serializable
+        payload_path: Archivo cuyo tamaño se añade como 'size' y cuyos bytes siguen al mensaje
+    """
+    if payload_path is not None:
+        message = dict(message, size=os.path.getsize(payload_path))
+    data = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+    if payload_path is not None:
+        with open(payload_path, 'rb') as f:
+            sock.sendfile(f)
+
+
+def _recv_exact(sock, count):
+    buffer = bytearray(count)
+    view = memoryview(buffer)
+    received = 0
+    while received < count:
+        chunk = sock.recv_into(view[received:], count - received)
+        if not chunk:
+            if received == 0:
+                return None
+            raise ConnectionError("Conexión cerrada a mitad de un mensaje")
+        received += chunk
+    return bytes(buffer)
+
+
+def recv_message(sock):
+    """
+    Recibe un mensaje (sin su posible contenido, que se lee con recv_payload).
+
+    Returns:
+        El diccionario recibido, o None si el otro extremo cerró la conexión
+    """
+    header = _recv_exact(sock, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if length > _MAX_MESSAGE_BYTES:
+        raise ConnectionError(f"Mensaje demasiado grande ({length} bytes)")
+    data = _recv_exact(sock, length)
+    if data is None:
+        raise ConnectionError("Conexión cerrada a mitad de un mensaje")
+    return json.loads(data.decode('utf-8'))
+
+
+def recv_payload(sock, size, path):
+    """Copia a un archivo los size bytes que siguen a un mensaje."""
+    remaining = size
+    with open(path, 'wb') as f:
+        while remaining:
+            chunk = sock.recv(min(_CHUNK_BYTES, remaining))
+            if not chunk:
+                raise ConnectionError("Conexión cerrada a mitad de un archivo")
+            f.write(chunk)
+            remaining -= len(chunk)
+
+
+class _CoordinatorHandler(socketserver.BaseRequestHandler):
+    """Atiende la conexión de un trabajador (un hilo por conexión)."""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        sock = self.request
+        hello = recv_message(sock)
+        if not hello or hello.get('type') != 'hello' or hello.get('version') != PROTOCOL_VERSION:
+            return
+        if coordinator.token and not hmac.compare_digest(str(hello.get('token') or ''), coordinator.token):
+            print(f"Conexión rechazada de {self.client_address}: secreto incorrecto")
+            send_message(sock, {'type': 'rejected', 'reason': "Secreto incorrecto"})
+            return
+        worker = hello.get('worker') or str(self.client_address)
+        job = None
+        try:
+            while True:
+                request = recv_message(sock)
+                if request is None:
+                    break
+                if request.get('type') == 'result' and job is not None:
+                    coordinator._receive_result(sock, job, request, worker)
+                    job = None
+                    continue
+                if request.get('type') != 'request':
+                    break
+                job, reply = coordinator._next_job(worker)
+                if job is None:
+                    send_message(sock, reply)
+                    if reply['type'] == 'done':
+                        break
+                    continue
+                send_message(sock, reply, job.path if coordinator.stream else None)
+        except (OSError, ValueError) as e:
+            print(f"Error en la conexión con el trabajador {worker}: {e}")
+        finally:
+            if job is not None:
+                # El trabajador se desconectó con un archivo a medias: devolverlo a la cola
+                coordinator._requeue(job, worker)
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+_Job = namedtuple('_Job', ['id', 'path', 'targets'])
+
+
+class ConversionCoordinator:
+    """Reparte un lote entre trabajadores remotos y recoge sus resultados."""
+
+    def __init__(self, file_list, output_dir=None, profiles=None, address=('127.0.0.1', 0),
+                 stream=False, verify=False, max_attempts=2, token=None):
+        """
+        Args:
+            file_list: Lista de rutas a convertir
+            output_dir: Directorio de salida (por defecto, junto a cada entrada)
+            profiles: OutputProfile o lista de perfiles (por defecto, el predeterminado)
+            address: (host, puerto) para TCP o ruta de un socket Unix
+            stream: Enviar los archivos por el socket en lugar de compartir rutas
+            verify: Pedir a los trabajadores que verifiquen las salidas con el MD5 del FLAC
+            max_attempts: Intentos por archivo si los trabajadores se desconectan
+            token: Secreto que deben presentar los trabajadores (None: sin comprobación)
+        """
+        if not profiles:
+            profiles = [get_profile(DEFAULT_PROFILE_NAME)]
+        elif isinstance(profiles, OutputProfile):
+            profiles = [profiles]
+        self.output_dir = output_dir
+        self.profiles = profiles
+        self.stream = stream
+        self.verify = verify
+        self.max_attempts = max_attempts
+        self.token = token
+        self.results = OrderedDict()  # ruta -> JobResult
+        self._condition = threading.Condition()
+        self._pending = deque()
+        self._in_flight = {}
+        self._attempts = {}
+        self._total = 0
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        for job_id, path in enumerate(OrderedDict.fromkeys(file_list)):
+            targets = [target for _, target in output_paths_for(path, output_dir or os.path.dirname(path), profiles)]
+            self._total += 1
+            if all(os.path.exists(target) for target in targets):
+                # Optimización: no repartir lo que ya está convertido
+                self.results[path] = JobResult(path, True, targets, None, None, 0.0)
+            else:
+                self._pending.append(_Job(job_id, path, targets))
+
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            self._server = _ThreadingUnixServer(address, _CoordinatorHandler)
+        else:
+            self._server = _ThreadingTCPServer(address, _CoordinatorHandler)
+        self._server.coordinator = self
+        self._thread = None
+
+    @property
+    def address(self):
+        """Dirección en la que escucha el coordinador (con el puerto real si se pidió 0)."""
+        return self._server.server_address
+
+    def start(self):
+        """Empieza a aceptar trabajadores en un hilo propio."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Deja de aceptar conexiones."""
+        self._server.shutdown()
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    @property
+    def finished(self):
+        with self._condition:
+            return len(self.results) >= self._total
+
+    def wait(self, timeout=None):
+        """
+        Espera a que se conviertan (o fallen) todos los archivos.
+
+        Returns:
+            True si el lote terminó antes del tiempo límite
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.results) >= self._total, timeout)
+
+    def _next_job(self, worker):
+        with self._condition:
+            if self._pending:
+                job = self._pending.popleft()
+                self._in_flight[job.id] = (job, worker)
+                reply = {
+                    'type': 'job',
+                    'id': job.id,
+                    'path': job.path,
+                    'name': os.path.basename(job.path),
+                    'output_dir': self.output_dir,
+                    'profiles': [profile_to_dict(profile) for profile in self.profiles],
+                    'verify': self.verify,
+                    'stream': self.stream,
+                }
+                return job, reply
+            if self._in_flight:
+                # Algún trabajador podría caerse y devolver su archivo a la cola
+                return None, {'type': 'wait', 'seconds': _RETRY_SECONDS}
+            return None, {'type': 'done'}
+
+    def _requeue(self, job, worker):
+        with self._condition:
+            if self._in_flight.pop(job.id, None) is None:
+                return
+            self._attempts[job.id] = self._attempts.get(job.id, 0) + 1
+            if self._attempts[job.id] < self.max_attempts:
+                self._pending.appendleft(job)
+            else:
+                self.results[job.path] = JobResult(
+                    job.path, False, [], f"El trabajador {worker} se desconectó", worker, 0.0)
+            self._condition.notify_all()
+
+    def _receive_result(self, sock, job, message, worker):
+        outputs = job.targets
+        error = message.get('error')
+        ok = bool(message.get('ok'))
+        if ok and self.stream:
+            # Las salidas llegan a continuación, en el orden de job.targets
+            try:
+                for target in job.targets:
+                    header = recv_message(sock)
+                    if header is None or header.get('type') != 'output':
+                        raise ConnectionError("Falta una salida del trabajador")
+                    temp_path = target + '.part'
+                    recv_payload(sock, header['size'], temp_path)
+                    os.replace(temp_path, target)
+            except ConnectionError:
+                self._requeue(job, worker)
+                raise
+        if not ok:
+            outputs = []
+        with self._condition:
+            self._in_flight.pop(job.id, None)
+            self.results[job.path] = JobResult(job.path, ok, outputs, error, worker, message.get('seconds', 0.0))
+            self._condition.notify_all()
+
+    def summary(self):
+        """Totales del lote por resultado y por trabajador."""
+        with self._condition:
+            results = list(self.results.values())
+        by_worker = {}
+        for result in results:
+            if result.ok and result.worker:
+                by_worker[result.worker] = by_worker.get(result.worker, 0) + 1
+        return {
+            'total': self._total,
+            'converted': sum(1 for result in results if result.ok and result.worker),
+            'skipped': sum(1 for result in results if result.ok and not result.worker),
+            'failed': sum(1 for result in results if not result.ok),
+            'by_worker': by_worker,
+        }
+
+    def summary_text(self):
+        """Resumen legible del lote."""
+        summary = self.summary()
+        workers = ", ".join(f"{name}: {count}" for name, count in sorted(summary['by_worker'].items()))
+        return (f"{summary['converted']} convertidos, {summary['skipped']} ya existían, "
+                f"{summary['failed']} con error" + (f" ({workers})" if workers else ""))
+
+
+class ConversionWorker:
+    """Trabajador que pide archivos a un coordinador y los convierte con AudioConverter."""
+
+    def __init__(self, address, converter=None, name=None, work_dir=None, token=None):
+        """
+        Args:
+            address: (host, puerto) o ruta del socket Unix del coordinador
+            converter: AudioConverter a usar (se crea uno si no se indica)
+            name: Nombre del trabajador en los informes (por defecto, máquina y PID)
+            work_dir: Directorio temporal para los archivos recibidos por el socket
+            token: Secreto compartido con el coordinador (opcional)
+        """
+        if converter is None:
+            from audio_converter import AudioConverter
+            converter = AudioConverter()
+        self.address = address
+        self.converter = converter
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.work_dir = work_dir
+        self.token = token
+        self.converted = 0
+        self._errors = {}
+        self._errors_lock = threading.Lock()
+        # Conexión directa: los trabajadores no tienen bucle de eventos de Qt
+        converter.conversion_error.connect(self._on_error, Qt.DirectConnection)
+
+    def _on_error(self, file_path, message):
+        with self._errors_lock:
+            self._errors[file_path] = message
+
+    def _connect(self):
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET6 if ':' in self.address[0] else socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect(self.address)
+        return sock
+
+    def run(self):
+        """
+        Pide y convierte archivos hasta que el coordinador indique que no queda trabajo.
+
+        Returns:
+            Número de archivos convertidos por este trabajador
+        """
+        with self._connect() as sock:
+            send_message(sock, {'type': 'hello', 'version': PROTOCOL_VERSION, 'worker': self.name,
+                                'token': self.token})
+            while True:
+                send_message(sock, {'type': 'request'})
+                job = recv_message(sock)
+                if job is None or job['type'] == 'done':
+                    break
+                if job['type'] == 'rejected':
+                    print(f"Error: el coordinador rechazó la conexión: {job.get('reason')}")
+                    break
+                if job['type'] == 'wait':
+                    time.sleep(job.get('seconds', _RETRY_SECONDS))
+                    continue
+                if job.get('stream'):
+                    self._run_streamed(sock, job)
+                else:
+                    self._run_shared(sock, job)
+        return self.converted
+
+    def _convert(self, path, output_dir, job):
+        profiles = [profile_from_dict(fields) for fields in job['profiles']]
+        start = time.perf_counter()
+        outputs = self.converter.convert_to_profiles(path, output_dir, profiles, job.get('verify', False))
+        with self._errors_lock:
+            error = self._errors.pop(path, None)
+        if outputs:
+            self.converted += 1
+        return outputs, error or "Error en la conversión", time.perf_counter() - start
+
+    def _run_shared(self, sock, job):
+        """Almacenamiento compartido: la entrada y las salidas se leen y escriben en sus rutas."""
+        outputs, error, seconds = self._convert(job['path'], job['output_dir'], job)
+        send_message(sock, {'type': 'result', 'id': job['id'], 'ok': bool(outputs),
+                            'error': None if outputs else error, 'seconds': seconds})
+
+    def _run_streamed(self, sock, job):
+        """Sin almacenamiento compartido: la entrada llega por el socket y las salidas vuelven por él."""
+        job_dir = tempfile.mkdtemp(prefix='flac2wav_job_', dir=self.work_dir)
+        try:
+            # El nombre original se conserva para que las salidas se llamen igual
+            source = os.path.join(job_dir, job['name'])
+            recv_payload(sock, job['size'], source)
+            output_dir = os.path.join(job_dir, 'salida')
+            outputs, error, seconds = self._convert(source, output_dir, job)
+            send_message(sock, {'type': 'result', 'id': job['id'], 'ok': bool(outputs),
+                                'error': None if outputs else error, 'seconds': seconds})
+            for output in outputs or []:
+                send_message(sock, {'type': 'output', 'id': job['id'], 'name': os.path.basename(output)}, output)
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def _run_workers(address, jobs, options=None, token=None):
+    """
+    Ejecuta jobs conexiones de trabajo en paralelo que comparten un AudioConverter.
+    Con options (de add_metrics_arguments) se exportan sus métricas mientras tanto.
+    """
+    from audio_converter import AudioConverter
+
+    converter = AudioConverter()
+    exporters = start_exporters(converter.metrics, options) if options is not None else []
+    workers = [ConversionWorker(address, converter, name=f"{socket.gethostname()}:{os.getpid()}/{i}", token=token)
+               for i in range(jobs)]
+    threads = [threading.Thread(target=worker.run, daemon=True) for worker in workers]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        for exporter in exporters:
+            exporter.stop()
+    return sum(worker.converted for worker in workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conversión distribuida entre varias máquinas.")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    coordinator_parser = subparsers.add_parser('coordinator', help="Repartir un lote entre trabajadores")
+    coordinator_parser.add_argument('inputs', nargs='+', help="Archivos o carpetas a convertir")
+    coordinator_parser.add_argument('--listen', default='127.0.0.1:5555',
+                                    help="host:puerto o unix:/ruta (0.0.0.0:PUERTO para aceptar otras máquinas)")
+    coordinator_parser.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                                    help=f"Secreto que deben presentar los trabajadores (o {TOKEN_ENV})")
+    coordinator_parser.add_argument('--output', default=None, help="Directorio de salida")
+    coordinator_parser.add_argument('--profile', action='append', default=None,
+                                    help="Perfil de salida (se puede repetir)")
+    coordinator_parser.add_argument('--stream', action='store_true',
+                                    help="Enviar los archivos por el socket (sin almacenamiento compartido)")
+    coordinator_parser.add_argument('--verify', action='store_true', help="Verificar salidas con el MD5 del FLAC")
+
+    worker_parser = subparsers.add_parser('worker', help="Convertir archivos de un coordinador")
+    worker_parser.add_argument('--connect', required=True, help="host:puerto o unix:/ruta del coordinador")
+    worker_parser.add_argument('--jobs', type=int, default=1, help="Conversiones simultáneas en este proceso")
+    worker_parser.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                               help=f"Secreto compartido con el coordinador (o {TOKEN_ENV})")
+    add_metrics_arguments(worker_parser)
+    args = parser.parse_args(argv)
+
+    if args.mode == 'worker':
+        converted = _run_workers(parse_address(args.connect), args.jobs, args, args.token)
+        print(f"{converted} archivos convertidos")
+        return 0
+
+    from library_scanner import scan_audio_files
+
+    files = []
+    for path in args.inputs:
+        files.extend(scan_audio_files(path) if os.path.isdir(path) else [os.path.abspath(path)])
+    profiles = [get_profile(name) for name in args.profile] if args.profile else None
+    address = parse_address(args.listen)
+    if not isinstance(address, str) and address[0] not in ('127.0.0.1', 'localhost', '::1') and not args.token:
+        print("Aviso: el coordinador acepta conexiones de otras máquinas sin secreto (--token); "
+              "cualquiera en la red puede leer las entradas y escribir las salidas")
+    coordinator = ConversionCoordinator(files, args.output, profiles, address,
+                                        stream=args.stream, verify=args.verify, token=args.token)
+    coordinator.start()
+    print(f"Coordinador en {coordinator.address}: {len(files)} archivos")
+    try:
+        coordinator.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        coordinator.stop()
+    for result in coordinator.results.values():
+        if not result.ok:
+            print(f"Error: {result.path}: {result.error}")
+    print(coordinator.summary_text())
+    return 0 if coordinator.summary()['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+'''
+Motor asíncrono de procesos ffmpeg para la aplicación Convertidor FLAC a WAV.
+En lugar de bloquear un hilo del sistema por cada ffmpeg en curso, este archivo
+ejecuta un único bucle de asyncio en un hilo propio que lanza los procesos con
+asyncio.create_subprocess_exec, limita cuántos corren a la vez con un semáforo,
+lee su salida de progreso (-progress) y de errores mientras se ejecutan y los
+mata si superan el tiempo límite o dejan de dar señales de vida. Desde
+cualquier otro hilo se le pueden enviar corrutinas y esperar su resultado.
+'''
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+# Cada cuánto se comprueban los límites de tiempo de los procesos en curso
+_WATCHDOG_INTERVAL = 0.5
+# Líneas finales de stderr que se conservan para los mensajes de error
+_STDERR_TAIL_LINES = 50
+
+ProcessResult = namedtuple('ProcessResult', [
+    'returncode',  # Código de salida (negativo si se mató con una señal)
+    'stderr',      # Últimas líneas de la salida de errores
+    'elapsed',     # Segundos de ejecución
+    'timed_out',   # True si se mató por tiempo límite o por bloqueo
+])
+
+
+def progress_seconds(fields):
+    """
+    Extrae la posición de un bloque de `-progress` de ffmpeg.
+
+    Args:
+        fields: Diccionario clave -> valor de un bloque de progreso
+
+    Returns:
+        Segundos de audio procesados, o None si el bloque no los indica
+    """
+    # out_time_ms también está en microsegundos (error histórico de ffmpeg)
+    for key in ('out_time_us', 'out_time_ms'):
+        try:
+            return int(fields[key]) / 1e6
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+def _install_pidfd_watcher(loop):
+    """
+    Hasta Python 3.11, asyncio espera a cada proceso hijo con un hilo propio
+    (ThreadedChildWatcher), lo que devolvería un hilo por ffmpeg en curso. Con
+    pidfd (Linux 5.3+) el propio bucle recibe la terminación de los procesos.
+    Desde Python 3.12 asyncio ya usa pidfd por sí mismo cuando está disponible.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(asyncio, 'PidfdChildWatcher'):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except (AttributeError, OSError):
+        return
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    asyncio.set_child_watcher(watcher)
+
+
+class FfmpegEngine:
+    """Ejecuta procesos ffmpeg concurrentes desde un único hilo con un bucle de asyncio."""
+
+    def __init__(self, max_concurrency=4, timeout=None, stall_timeout=None):
+        """
+        Inicializa el motor. El hilo del bucle se crea en el primer uso.
+
+        Args:
+            max_concurrency: Procesos ffmpeg simultáneos como máximo
+            timeout: Segundos máximos por proceso (None sin límite)
+            stall_timeout: Segundos sin progreso antes de matar un proceso (None sin límite);
+                           solo se aplica a los procesos lanzados con on_progress
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._processes = set()
+        self._start_lock = threading.Lock()
+
+    @property
+    def loop(self):
+        """Bucle de eventos del motor (se arranca si hace falta)."""
+        with self._start_lock:
+            if self._loop is None:
+                self._start()
+        return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            _install_pidfd_watcher(loop)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            ready.set()
+            loop.run_forever()
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="ffmpeg-engine", daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+
+    def in_loop_thread(self):
+        """True si se llama desde el hilo del bucle."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coroutine):
+        """
+        Programa una corrutina en el bucle del motor desde cualquier hilo.
+
+        Returns:
+            Un concurrent.futures.Future con su resultado
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run_coroutine(self, coroutine):
+        """Ejecuta una corrutina en el bucle del motor y espera su resultado (bloqueante)."""
+        if self.in_loop_thread():
+            coroutine.close()
+            raise RuntimeError("run_coroutine no puede llamarse desde el hilo del motor")
+        return self.submit(coroutine).result()
+
+    def run(self, cmd, on_progress=None, timeout=None):
+        """Versión bloqueante de run_async para llamar desde otros hilos."""
+        return self.run_coroutine(self.run_async(cmd, on_progress, timeout))
+
+    async def run_async(self, cmd, on_progress=None, timeout=None):
+        """
+        Ejecuta un comando ffmpeg dentro de la ventana de concurrencia.
+
+        Args:
+            cmd: Lista de argumentos (el primero es el binario de ffmpeg)
+            on_progress: Función opcional que recibe los segundos procesados;
+                         se llama desde el hilo del motor
+            timeout: Segundos máximos (por defecto, el del motor)
+
+        Returns:
+            Un ProcessResult
+        """
+        async with self._semaphore:
+            return await self._execute(list(cmd), on_progress, timeout or self.timeout)
+
+    async def _execute(self, cmd, on_progress, timeout):
+        loop = asyncio.get_running_loop()
+        if on_progress is not None:
+            # Progreso legible por máquina en stdout, sin la línea de estadísticas en stderr
+            cmd = cmd[:1] + ['-progress', 'pipe:1', '-nostats'] + cmd[1:]
+        start = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE if on_progress is not None else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._processes.add(process)
+        last_activity = [loop.time()]
+        stderr_tail = deque(maxlen=_STDERR_TAIL_LINES)
+
+        async def read_progress():
+            fields = {}
+            async for raw_line in process.stdout:
+                last_activity[0] = loop.time()
+                key, _, value = raw_line.decode('utf-8', 'replace').strip().partition('=')
+                fields[key] = value
+                if key == 'progress':
+                    # Fin de un bloque de progreso
+                    seconds = progress_seconds(fields)
+                    if seconds is not None:
+                        try:
+                            on_progress(seconds)
+                        except Exception as e:
+                            print(f"Error en la notificación de progreso: {e}")
+                    fields = {}
+
+        async def read_errors():
+            async for raw_line in process.stderr:
+                last_activity[0] = loop.time()
+                stderr_tail.append(raw_line.decode('utf-8', 'replace').rstrip())
+
+        readers = [read_errors()]
+        if on_progress is not None:
+            readers.append(read_progress())
+        reading = asyncio.ensure_future(asyncio.gather(*readers))
+
+        timed_out = False
+        deadline = loop.time() + timeout if timeout else None
+        # Sin -progress, un ffmpeg sano con -loglevel error puede no escribir nada
+        stall_timeout = self.stall_timeout if on_progress is not None else None
+        try:
+            while not reading.done():
+                await asyncio.wait({reading}, timeout=_WATCHDOG_INTERVAL)
+                now = loop.time()
+                stalled = stall_timeout and now - last_activity[0] >= stall_timeout
+                if not reading.done() and ((deadline and now >= deadline) or stalled):
+                    timed_out = True
+                    process.kill()
+                    break
+            # Tras matar el proceso sus tuberías se cierran y los lectores terminan
+            await reading
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        finally:
+            self._processes.discard(process)
+
+        if timed_out:
+            stderr_tail.append(f"ffmpeg detenido por superar el tiempo límite ({time.perf_counter() - start:.0f} s)")
+        return ProcessResult(returncode, "\n".join(stderr_tail), time.perf_counter() - start, timed_out)
+
+    def _kill_all(self):
+        for process in list(self._processes):
+            if process.returncode is None:
+                process.kill()
+
+    def cancel_all(self):
+        """Mata todos los procesos en curso (se puede llamar desde cualquier hilo)."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._kill_all)
+
+    @property
+    def running(self):
+        """Número de procesos ffmpeg en curso."""
+        return len(self._processes)
+
+    def shutdown(self):
+        """Mata los procesos en curso y detiene el bucle del motor."""
+        with self._start_lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._kill_all)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+            self._thread = None
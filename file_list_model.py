@@ -0,0 +1,278 @@
+'''
+Modelo de lista de archivos para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene FileListModel, un QAbstractListModel que guarda las rutas
+en una lista, el estado de cada fila en un bytearray (un byte por archivo) y un
+índice ruta -> fila, de modo que las actualizaciones de estado cuestan O(1)
+incluso con bibliotecas de 100.000 archivos.
+'''
+
+import os
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt5.QtGui import QColor
+
+# Códigos compactos de estado (uno por fila)
+STATUS_PENDING = 0
+STATUS_CONVERTING = 1
+STATUS_CONVERTED = 2
+STATUS_ERROR = 3
+
+# Traducción entre los nombres de estado usados en la aplicación y los códigos
+STATUS_CODES = {
+    "pendiente": STATUS_PENDING,
+    "convirtiendo": STATUS_CONVERTING,
+    "convertido": STATUS_CONVERTED,
+    "error": STATUS_ERROR,
+}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# Sufijo de texto y color para cada estado
+_STATUS_SUFFIXES = {
+    STATUS_PENDING: "",
+    STATUS_CONVERTING: " [Convirtiendo...]",
+    STATUS_CONVERTED: " [Convertido]",
+    STATUS_ERROR: " [Error]",
+}
+_STATUS_COLORS = {
+    STATUS_PENDING: QColor("#FFFFFF"),     # Blanco
+    STATUS_CONVERTING: QColor("#FFCC00"),  # Amarillo
+    STATUS_CONVERTED: QColor("#00FF00"),   # Verde
+    STATUS_ERROR: QColor("#FF0000"),       # Rojo
+}
+
+
+class FileListModel(QAbstractListModel):
+    """Modelo de lista con índice por ruta y estado compacto por fila."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths = []               # Ruta de cada fila
+        self._statuses = bytearray()   # Código de estado de cada fila
+        self._row_index = {}           # Ruta -> fila
+
+        # Filas modificadas pendientes de notificar a la vista
+        self._dirty_rows = set()
+        self._flush_scheduled = False
+
+    # --- Interfaz de QAbstractListModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if row >= len(self._paths):
+            return None
+
+        if role == Qt.DisplayRole:
+            path = self._paths[row]
+            return os.path.basename(path) + _STATUS_SUFFIXES[self._statuses[row]]
+        if role == Qt.ForegroundRole:
+            return _STATUS_COLORS[self._statuses[row]]
+        if role in (Qt.UserRole, Qt.ToolTipRole):
+            return self._paths[row]
+        return None
+
+    def flags(self, index):
+        default_flags = super().flags(index)
+        if index.isValid():
+            return default_flags | Qt.ItemIsDragEnabled
+        return default_flags | Qt.ItemIsDropEnabled
+
+    # --- Consultas ---
+
+    def contains(self, path):
+        """Indica si la ruta está en la lista."""
+        return path in self._row_index
+
+    def path_at(self, row):
+        """Devuelve la ruta de una fila."""
+        return self._paths[row]
+
+    def row_of(self, path):
+        """Devuelve la fila de una ruta o -1 si no está en la lista."""
+        return self._row_index.get(path, -1)
+
+    def all_paths(self):
+        """Devuelve una copia de todas las rutas en orden."""
+        return list(self._paths)
+
+    def status_of(self, path):
+        """Devuelve el nombre del estado de una ruta o None si no está en la lista."""
+        row = self._row_index.get(path)
+        if row is None:
+            return None
+        return STATUS_NAMES[self._statuses[row]]
+
+    # --- Modificaciones ---
+
+    def add_paths(self, paths):
+        """
+        Añade rutas al final de la lista ignorando las que ya están presentes.
+
+        Args:
+            paths: Iterable de rutas
+
+        Returns:
+            Número de rutas añadidas
+        """
+        new_paths = []
+        seen = set()
+        for path in paths:
+            if path in self._row_index or path in seen:
+                continue
+            seen.add(path)
+            new_paths.append(path)
+
+        if not new_paths:
+            return 0
+
+        first = len(self._paths)
+        # Una sola notificación de inserción para todo el lote
+        self.beginInsertRows(QModelIndex(), first, first + len(new_paths) - 1)
+        for offset, path in enumerate(new_paths):
+            self._row_index[path] = first + offset
+        self._paths.extend(new_paths)
+        self._statuses.extend(bytes(len(new_paths)))
+        self.endInsertRows()
+        return len(new_paths)
+
+    def set_status(self, path, status):
+        """
+        Cambia el estado de una ruta. La notificación a la vista se agrupa
+        con el resto de cambios del mismo ciclo del bucle de eventos.
+
+        Args:
+            path: Ruta del archivo
+            status: Nombre del estado ('convirtiendo', 'convertido', 'error'...)
+
+        Returns:
+            True si la ruta está en la lista
+        """
+        row = self._row_index.get(path)
+        if row is None:
+            return False
+        code = STATUS_CODES.get(status, STATUS_PENDING)
+        if self._statuses[row] != code:
+            self._statuses[row] = code
+            self._mark_dirty(row)
+        return True
+
+    def set_statuses(self, statuses):
+        """
+        Cambia el estado de varias rutas a la vez.
+
+        Args:
+            statuses: Diccionario ruta -> nombre del estado
+        """
+        for path, status in statuses.items():
+            self.set_status(path, status)
+
+    def remove_rows(self, rows):
+        """
+        Elimina las filas indicadas.
+
+        Args:
+            rows: Iterable de números de fila
+
+        Returns:
+            Lista de rutas eliminadas
+        """
+        removed = []
+        # Eliminar de abajo hacia arriba agrupando rangos contiguos
+        for first, last in _contiguous_ranges(sorted(set(rows), reverse=True)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            removed.extend(self._paths[first:last + 1])
+            del self._paths[first:last + 1]
+            del self._statuses[first:last + 1]
+            self.endRemoveRows()
+
+        if removed:
+            self._rebuild_index()
+            self._dirty_rows.clear()
+        return removed
+
+    def move_rows(self, rows, destination):
+        """
+        Mueve las filas indicadas delante de la fila destino conservando su orden.
+
+        Args:
+            rows: Iterable de números de fila
+            destination: Fila delante de la cual se insertan (len para el final)
+        """
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        moving = set(rows)
+
+        self.layoutAboutToBeChanged.emit()
+        moved_paths = [self._paths[row] for row in rows]
+        moved_statuses = bytes(self._statuses[row] for row in rows)
+        # Ajustar el destino por las filas retiradas antes de él
+        destination -= sum(1 for row in rows if row < destination)
+
+        kept = [row for row in range(len(self._paths)) if row not in moving]
+        paths = [self._paths[row] for row in kept]
+        statuses = bytearray(self._statuses[row] for row in kept)
+        paths[destination:destination] = moved_paths
+        statuses[destination:destination] = moved_statuses
+
+        # Reubicar los índices persistentes (selección, elemento actual)
+        new_rows = {path: row for row, path in enumerate(paths)}
+        old_indexes = self.persistentIndexList()
+        new_indexes = [self.index(new_rows[self._paths[index.row()]]) for index in old_indexes]
+
+        self._paths = paths
+        self._statuses = statuses
+        self._row_index = new_rows
+        self._dirty_rows.clear()
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def clear(self):
+        """Vacía la lista."""
+        self.beginResetModel()
+        self._paths = []
+        self._statuses = bytearray()
+        self._row_index = {}
+        self._dirty_rows.clear()
+        self.endResetModel()
+
+    # --- Auxiliares internos ---
+
+    def _rebuild_index(self):
+        """Reconstruye el índice ruta -> fila tras eliminar filas."""
+        self._row_index = {path: row for row, path in enumerate(self._paths)}
+
+    def _mark_dirty(self, row):
+        """Registra una fila modificada y programa la notificación agrupada."""
+        self._dirty_rows.add(row)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush_changes)
+
+    def flush_changes(self):
+        """Emite un único dataChanged que cubre todas las filas modificadas."""
+        self._flush_scheduled = False
+        if not self._dirty_rows:
+            return
+        first = min(self._dirty_rows)
+        last = max(self._dirty_rows)
+        self._dirty_rows.clear()
+        self.dataChanged.emit(self.index(first), self.index(last),
+                              [Qt.DisplayRole, Qt.ForegroundRole])
+
+
+def _contiguous_ranges(descending_rows):
+    """Agrupa filas ordenadas de mayor a menor en rangos (primera, última)."""
+    ranges = []
+    for row in descending_rows:
+        if ranges and ranges[-1][0] == row + 1:
+            ranges[-1][0] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(r) for r in ranges]
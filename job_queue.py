@@ -0,0 +1,233 @@
+'''
+Módulo de cola de trabajos persistente para la aplicación Convertidor FLAC a WAV.
+Cada lote se guarda en una base de datos SQLite local (en modo WAL) con el
+estado de cada archivo (pendiente, en curso, hecho, fallido), de modo que si la
+aplicación se cierra o se interrumpe a mitad de un lote, al reiniciarla se
+puede reanudar exactamente donde se quedó sin volver a convertir lo terminado.
+'''
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from output_profiles import profile_from_dict, profile_to_dict
+from platform_utils import get_app_data_directory
+
+# Estados de un archivo dentro de un lote
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Estados de un lote
+BATCH_OPEN = 'open'            # Con archivos pendientes (en curso o interrumpido)
+BATCH_COMPLETED = 'completed'  # Todos los archivos hechos o fallidos
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    output_dir TEXT,
+    profiles TEXT NOT NULL,
+    options TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    batch_id INTEGER NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    input_path TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    outputs TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (batch_id, input_path)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (batch_id, state, position);
+'''
+
+BatchRecord = namedtuple('BatchRecord', [
+    'id',          # Identificador del lote
+    'created_at',  # Marca de tiempo de creación
+    'status',      # BATCH_OPEN o BATCH_COMPLETED
+    'output_dir',  # Directorio de salida (None para junto a cada entrada)
+    'profiles',    # Lista de OutputProfile
+    'options',     # Diccionario de opciones de convert_batch (normalize, verify...)
+    'counts',      # Diccionario estado -> número de archivos
+])
+
+
+def _encode_profiles(profiles):
+    return json.dumps([profile_to_dict(profile) for profile in profiles])
+
+
+def _decode_profiles(text):
+    return [profile_from_dict(fields) for fields in json.loads(text)]
+
+
+class JobQueue:
+    """Cola persistente de lotes de conversión con estado por archivo."""
+
+    def __init__(self, path=None):
+        """
+        Inicializa la cola. La base de datos se abre en el primer uso.
+
+        Args:
+            path: Archivo SQLite (por defecto jobs.sqlite3 en el directorio de datos)
+        """
+        self.path = path or os.path.join(get_app_data_directory(), 'jobs.sqlite3')
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # Una sola conexión compartida por los hilos del lote, protegida por el cerrojo
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # En WAL, NORMAL mantiene la base consistente ante un cierre abrupto del proceso
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, sql, parameters=()):
+        with self._lock:
+            return self._connect().execute(sql, parameters).fetchall()
+
+    def close(self):
+        """Cierra la base de datos."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def create_batch(self, file_list, output_dir, profiles, options=None):
+        """
+        Registra un lote nuevo con todos sus archivos pendientes.
+
+        Args:
+            file_list: Lista de rutas en el orden del lote
+            output_dir: Directorio de salida (opcional)
+            profiles: Lista de OutputProfile
+            options: Diccionario de opciones a conservar para la reanudación
+
+        Returns:
+            El identificador del lote
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                cursor = connection.execute(
+                    'INSERT INTO batches (created_at, updated_at, status, output_dir, profiles, options) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (now, now, BATCH_OPEN, output_dir, _encode_profiles(profiles), json.dumps(options or {})))
+                batch_id = cursor.lastrowid
+                # Las rutas repetidas en la lista se registran una sola vez
+                connection.executemany(
+                    'INSERT OR IGNORE INTO jobs (batch_id, position, input_path, state, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    ((batch_id, position, path, JOB_PENDING, now) for position, path in enumerate(file_list)))
+        return batch_id
+
+    def _set_state(self, batch_id, outputs_by_path, state, error=None, attempt=False):
+        # outputs_by_path: ruta -> lista de salidas (None conserva las guardadas)
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.executemany(
+                    'UPDATE jobs SET state = ?, outputs = COALESCE(?, outputs), error = ?, '
+                    'attempts = attempts + ?, updated_at = ? WHERE batch_id = ? AND input_path = ?',
+                    ((state, json.dumps(outputs) if outputs is not None else None, error, int(attempt), now,
+                      batch_id, path) for path, outputs in outputs_by_path.items()))
+                connection.execute('UPDATE batches SET updated_at = ? WHERE id = ?', (now, batch_id))
+
+    def mark_running(self, batch_id, outputs_by_path):
+        """
+        Marca archivos como en curso antes de convertirlos.
+
+        Args:
+            batch_id: Identificador del lote
+            outputs_by_path: Diccionario ruta de entrada -> salidas que se van a
+                             escribir; si el proceso se interrumpe, pueden quedar
+                             a medias y se borran al reanudar
+        """
+        self._set_state(batch_id, outputs_by_path, JOB_RUNNING, attempt=True)
+
+    def mark_done(self, batch_id, paths, outputs=None):
+        """Marca archivos como convertidos."""
+        self._set_state(batch_id, dict.fromkeys(paths, outputs), JOB_DONE)
+
+    def mark_failed(self, batch_id, paths, error=None):
+        """Marca archivos como fallidos (no se reintentan al reanudar)."""
+        self._set_state(batch_id, dict.fromkeys(paths), JOB_FAILED, error=error)
+
+    def reset_interrupted(self, batch_id):
+        """
+        Devuelve a pendiente los archivos que estaban en curso al interrumpirse el lote.
+
+        Returns:
+            Lista de salidas que esos archivos pudieron dejar a medias
+        """
+        rows = self._execute('SELECT outputs FROM jobs WHERE batch_id = ? AND state = ?', (batch_id, JOB_RUNNING))
+        self._execute('UPDATE jobs SET state = ?, updated_at = ? WHERE batch_id = ? AND state = ?',
+                      (JOB_PENDING, time.time(), batch_id, JOB_RUNNING))
+        return [output for (outputs,) in rows if outputs for output in json.loads(outputs)]
+
+    def pending_files(self, batch_id):
+        """Archivos pendientes de un lote, en su orden original."""
+        rows = self._execute('SELECT input_path FROM jobs WHERE batch_id = ? AND state = ? ORDER BY position',
+                             (batch_id, JOB_PENDING))
+        return [path for (path,) in rows]
+
+    def counts(self, batch_id):
+        """Número de archivos de un lote por estado."""
+        rows = self._execute('SELECT state, COUNT(*) FROM jobs WHERE batch_id = ? GROUP BY state', (batch_id,))
+        return dict(rows)
+
+    def finish_batch(self, batch_id):
+        """
+        Cierra el lote si ya no le quedan archivos pendientes ni en curso.
+
+        Returns:
+            True si el lote quedó completado
+        """
+        counts = self.counts(batch_id)
+        if counts.get(JOB_PENDING) or counts.get(JOB_RUNNING):
+            return False
+        self._execute('UPDATE batches SET status = ?, updated_at = ? WHERE id = ?',
+                      (BATCH_COMPLETED, time.time(), batch_id))
+        return True
+
+    def get_batch(self, batch_id):
+        """Devuelve el BatchRecord de un lote o None si no existe."""
+        rows = self._execute('SELECT id, created_at, status, output_dir, profiles, options FROM batches '
+                             'WHERE id = ?', (batch_id,))
+        if not rows:
+            return None
+        batch_id, created_at, status, output_dir, profiles, options = rows[0]
+        return BatchRecord(batch_id, created_at, status, output_dir, _decode_profiles(profiles),
+                           json.loads(options), self.counts(batch_id))
+
+    def unfinished_batches(self):
+        """Lotes abiertos (interrumpidos o en curso), del más reciente al más antiguo."""
+        rows = self._execute('SELECT id FROM batches WHERE status = ? ORDER BY id DESC', (BATCH_OPEN,))
+        return [self.get_batch(batch_id) for (batch_id,) in rows]
+
+    def discard_batch(self, batch_id):
+        """Elimina un lote y sus archivos de la cola."""
+        self._execute('DELETE FROM batches WHERE id = ?', (batch_id,))
+
+    def prune(self, max_age_days=30):
+        """Elimina los lotes completados hace más de max_age_days días."""
+        self._execute('DELETE FROM batches WHERE status = ? AND updated_at < ?',
+                      (BATCH_COMPLETED, time.time() - max_age_days * 86400))
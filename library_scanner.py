@@ -0,0 +1,95 @@
+'''
+Módulo de exploración de bibliotecas para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene un recorrido iterativo de directorios basado en
+os.scandir y un trabajador en hilo que entrega los archivos encontrados por
+lotes, para importar árboles de miles de archivos sin bloquear la interfaz.
+'''
+
+import os
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Extensiones admitidas por defecto
+AUDIO_EXTENSIONS = ('.flac',)
+
+# Número de rutas que se acumulan antes de entregar un lote a la interfaz
+DEFAULT_BATCH_SIZE = 500
+
+
+def scan_audio_files(root, extensions=AUDIO_EXTENSIONS, should_stop=None):
+    """
+    Recorre un árbol de directorios y genera las rutas de los archivos de audio.
+    Usa una pila explícita en lugar de recursión y os.scandir para reutilizar
+    la información de tipo que devuelve el sistema sin llamadas stat extra.
+
+    Args:
+        root: Directorio raíz a explorar
+        extensions: Tupla de extensiones admitidas (en minúsculas)
+        should_stop: Función opcional que devuelve True para interrumpir el recorrido
+
+    Yields:
+        Rutas de archivo en orden alfabético dentro de cada directorio
+    """
+    pending = [root]
+    while pending:
+        if should_stop and should_stop():
+            return
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            # Directorio sin permisos o eliminado durante el recorrido
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                elif entry.name.lower().endswith(extensions) and entry.is_file():
+                    yield entry.path
+            except OSError:
+                continue
+
+        # Invertir para visitar los subdirectorios en orden alfabético
+        pending.extend(reversed(subdirectories))
+
+
+class LibraryScanner(QThread):
+    """Trabajador que explora directorios en un hilo separado y entrega lotes de rutas."""
+
+    files_found = pyqtSignal(list)    # Lote de rutas encontradas
+    scan_finished = pyqtSignal(int)   # Número total de archivos encontrados
+    scan_error = pyqtSignal(str)      # Mensaje de error
+
+    def __init__(self, directories, extensions=AUDIO_EXTENSIONS,
+                 batch_size=DEFAULT_BATCH_SIZE, parent=None):
+        super().__init__(parent)
+        self.directories = list(directories)
+        self.extensions = extensions
+        self.batch_size = batch_size
+        self._stop_requested = False
+
+    def stop(self):
+        """Solicita detener la exploración en curso."""
+        self._stop_requested = True
+
+    def run(self):
+        total = 0
+        batch = []
+        try:
+            for directory in self.directories:
+                for path in scan_audio_files(directory, self.extensions,
+                                             lambda: self._stop_requested):
+                    batch.append(path)
+                    if len(batch) >= self.batch_size:
+                        total += len(batch)
+                        self.files_found.emit(batch)
+                        batch = []
+            if batch:
+                total += len(batch)
+                self.files_found.emit(batch)
+        except Exception as e:
+            self.scan_error.emit(str(e))
+        self.scan_finished.emit(total)
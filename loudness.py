@@ -0,0 +1,288 @@
+'''
+Módulo de análisis de sonoridad para la aplicación Convertidor FLAC a WAV.
+Este archivo mide la sonoridad integrada (EBU R128 / ITU-R BS.1770) y el pico
+real de un archivo procesándolo por bloques con NumPy, y guarda las medidas en
+una caché persistente indexada por la huella del archivo (ruta, tamaño y fecha
+de modificación) para que los lotes repetidos no vuelvan a analizar el audio.
+'''
+
+import json
+import math
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import soundfile as sf
+
+# Hacer scipy opcional (el filtro de ponderación K usa lfilter)
+try:
+    from scipy.signal import lfilter
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from audio_metadata import file_fingerprint
+from platform_utils import get_app_data_directory
+from resampling import StreamingResampler
+
+# Objetivo de sonoridad y techo de pico real por defecto para reproducción en club
+DEFAULT_TARGET_LUFS = -14.0
+DEFAULT_TRUE_PEAK_CEILING = -1.0
+
+_ABSOLUTE_GATE = -70.0   # LUFS
+_RELATIVE_GATE = -10.0   # LU por debajo de la sonoridad sin puerta relativa
+_SUBBLOCK_SECONDS = 0.1  # Los bloques de 400 ms con solape del 75% se forman con 4 sub-bloques
+
+LoudnessMeasurement = namedtuple('LoudnessMeasurement', [
+    'integrated_lufs',  # Sonoridad integrada en LUFS (None si todo queda bajo la puerta)
+    'true_peak_dbtp',   # Pico real en dBTP (None si la señal es silencio digital)
+    'sample_rate',      # Frecuencia de muestreo del archivo
+    'duration',         # Duración analizada en segundos
+])
+
+
+def k_weighting_coefficients(sample_rate):
+    """
+    Calcula los dos biquads de la ponderación K de BS.1770 para una frecuencia dada.
+
+    Args:
+        sample_rate: Frecuencia de muestreo en Hz
+
+    Returns:
+        Lista [(b, a), (b, a)] con el filtro de estantería y el paso alto
+    """
+    # Etapa 1: estantería de alta frecuencia (+4 dB) que modela la cabeza
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = (
+        np.array([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]),
+        np.array([1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]),
+    )
+
+    # Etapa 2: paso alto RLB
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    highpass = (
+        np.array([1.0, -2.0, 1.0]),
+        np.array([1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]),
+    )
+    return [shelf, highpass]
+
+
+def _channel_weights(channels):
+    """Pesos por canal de BS.1770 (1.41 para los envolventes, 0 para LFE en 5.1)."""
+    if channels == 5:
+        return np.array([1.0, 1.0, 1.0, 1.41, 1.41])
+    if channels == 6:
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+    return np.ones(channels)
+
+
+def _oversampling_factor(sample_rate):
+    """Sobremuestreo para el pico real: 4x hasta 48 kHz, 2x hasta 96 kHz."""
+    if sample_rate <= 48000:
+        return 4
+    if sample_rate <= 96000:
+        return 2
+    return 1
+
+
+class LoudnessMeter:
+    """Medidor de sonoridad integrada y pico real alimentado por bloques."""
+
+    def __init__(self, sample_rate, channels):
+        """
+        Inicializa el medidor.
+
+        Args:
+            sample_rate: Frecuencia de muestreo en Hz
+            channels: Número de canales
+        """
+        if not SCIPY_AVAILABLE:
+            raise RuntimeError("El análisis de sonoridad requiere scipy")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._filters = k_weighting_coefficients(sample_rate)
+        # Estado de cada biquad: (2, canales) para lfilter a lo largo del eje 0
+        self._states = [np.zeros((2, channels)) for _ in self._filters]
+        self._weights = _channel_weights(channels)
+        self._subblock_frames = int(round(sample_rate * _SUBBLOCK_SECONDS))
+        self._pending = np.zeros((0, channels))
+        self._subblock_power = []  # Media cuadrática ponderada por sub-bloque y canal
+        self._frames = 0
+
+        factor = _oversampling_factor(sample_rate)
+        self._oversampler = StreamingResampler(sample_rate, sample_rate * factor, channels) if factor > 1 else None
+        self._peak = 0.0
+
+    def process(self, block):
+        """
+        Añade un bloque de audio al análisis.
+
+        Args:
+            block: Array float (muestras, canales) en [-1, 1]
+        """
+        block = np.asarray(block, dtype=np.float64)
+        self._frames += len(block)
+        self._update_peak(block if self._oversampler is None else self._oversampler.process(block))
+
+        weighted = block
+        for index, (b, a) in enumerate(self._filters):
+            weighted, self._states[index] = lfilter(b, a, weighted, axis=0, zi=self._states[index])
+
+        # Acumular sub-bloques completos de 100 ms; el resto espera al siguiente bloque
+        weighted = np.concatenate([self._pending, weighted])
+        complete = len(weighted) // self._subblock_frames
+        if complete:
+            frames = weighted[:complete * self._subblock_frames]
+            power = np.mean(frames.reshape(complete, self._subblock_frames, self.channels) ** 2, axis=1)
+            self._subblock_power.append(power)
+        self._pending = weighted[complete * self._subblock_frames:]
+
+    def _update_peak(self, samples):
+        if len(samples):
+            self._peak = max(self._peak, float(np.max(np.abs(samples))))
+
+    def result(self):
+        """
+        Termina el análisis.
+
+        Returns:
+            Un LoudnessMeasurement
+        """
+        if self._oversampler is not None:
+            self._update_peak(self._oversampler.flush())
+        true_peak = 20 * math.log10(self._peak) if self._peak > 0 else None
+        return LoudnessMeasurement(self._integrated(), true_peak, self.sample_rate,
+                                   self._frames / self.sample_rate)
+
+    def _integrated(self):
+        """Aplica las puertas absoluta y relativa a los bloques de 400 ms."""
+        if not self._subblock_power:
+            return None
+        subblocks = np.concatenate(self._subblock_power)
+        if len(subblocks) < 4:
+            return None
+        # Bloques de 400 ms con paso de 100 ms: media de 4 sub-bloques consecutivos
+        cumulative = np.concatenate([np.zeros((1, self.channels)), np.cumsum(subblocks, axis=0)])
+        blocks = (cumulative[4:] - cumulative[:-4]) / 4
+        power = blocks @ self._weights
+        with np.errstate(divide='ignore'):
+            loudness = -0.691 + 10 * np.log10(power)
+
+        gated = power[loudness > _ABSOLUTE_GATE]
+        if not len(gated):
+            return None
+        relative_gate = -0.691 + 10 * math.log10(gated.mean()) + _RELATIVE_GATE
+        gated = power[(loudness > _ABSOLUTE_GATE) & (loudness > relative_gate)]
+        return -0.691 + 10 * math.log10(gated.mean())
+
+
+def measure_loudness(path, block_frames=65536):
+    """
+    Mide la sonoridad integrada y el pico real de un archivo.
+
+    Args:
+        path: Ruta al archivo de audio
+        block_frames: Muestras por canal en cada bloque
+
+    Returns:
+        Un LoudnessMeasurement
+    """
+    with sf.SoundFile(path) as source:
+        meter = LoudnessMeter(source.samplerate, source.channels)
+        for block in source.blocks(blocksize=block_frames, dtype='float32', always_2d=True):
+            meter.process(block)
+    return meter.result()
+
+
+def normalization_gain(measurement, target_lufs=DEFAULT_TARGET_LUFS,
+                       true_peak_ceiling=DEFAULT_TRUE_PEAK_CEILING):
+    """
+    Calcula la ganancia que lleva un archivo al objetivo sin superar el techo de pico.
+
+    Args:
+        measurement: LoudnessMeasurement del archivo
+        target_lufs: Sonoridad integrada objetivo
+        true_peak_ceiling: Pico real máximo permitido tras la ganancia
+
+    Returns:
+        Ganancia en dB (0.0 si el archivo es silencio)
+    """
+    if measurement.integrated_lufs is None:
+        return 0.0
+    gain = target_lufs - measurement.integrated_lufs
+    if measurement.true_peak_dbtp is not None:
+        gain = min(gain, true_peak_ceiling - measurement.true_peak_dbtp)
+    return round(gain, 2)
+
+
+class LoudnessCache:
+    """Caché persistente (JSON) de medidas de sonoridad indexada por huella de archivo."""
+
+    def __init__(self, path=None):
+        """
+        Inicializa la caché.
+
+        Args:
+            path: Archivo JSON (por defecto loudness_cache.json en el directorio de datos)
+        """
+        self.path = path or os.path.join(get_app_data_directory(), 'loudness_cache.json')
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    @staticmethod
+    def _key(path):
+        abspath, size, mtime_ns = file_fingerprint(path)
+        return f"{abspath}|{size}|{mtime_ns}"
+
+    def get(self, path):
+        """Devuelve la medida guardada para el archivo o None si no existe o cambió."""
+        with self._lock:
+            entry = self._load().get(self._key(path))
+        return LoudnessMeasurement(**entry) if entry else None
+
+    def measure(self, path):
+        """
+        Devuelve la medida del archivo, analizándolo solo si no está en la caché.
+
+        Args:
+            path: Ruta al archivo de audio
+
+        Returns:
+            Un LoudnessMeasurement
+        """
+        measurement = self.get(path)
+        if measurement is None:
+            measurement = measure_loudness(path)
+            with self._lock:
+                self._load()[self._key(path)] = measurement._asdict()
+                self._dirty = True
+        return measurement
+
+    def save(self):
+        """Escribe la caché en disco si hay medidas nuevas."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+            self._dirty = False
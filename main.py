@@ -8,6 +8,7 @@ completa para la conversión de archivos de audio.
 
 import sys
 import os
+import argparse
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QMessageBox, QSplitter, QFileDialog,
                            QTabWidget, QLabel)
@@ -16,11 +17,20 @@ from PyQt5.QtGui import QIcon, QPixmap, QFont, QFontDatabase
 import threading
 
 # Importar módulos propios
+import tracing                               # Tramos de rendimiento (--trace)
+import metrics                               # Métricas de conversión (--metrics-port, --metrics-dump)
+import profiling                             # Perfiles cProfile/tracemalloc por fase (--profile)
 from audio_converter import AudioConverter   # Maneja la conversión de audio
+from conversion_events import ConversionEventAggregator  # Agrupa eventos de conversión
 from audio_player import AudioPlayer         # Reproduce archivos de audio
+from audio_metadata import read_audio_metadata  # Lectura rápida de cabeceras
 from waveform import WaveformGenerator, WaveformWidget  # Visualización de forma de onda
+from batch_report import BatchReport         # Informe de resultados de lotes
 from ui_components import (FileListWidget, PlayerControls, AudioInfoWidget, 
-                         StatusBar)          # Componentes reutilizables de UI
+                         StatusBar, BatchSummaryPanel)  # Componentes reutilizables de UI
+
+# Análisis de conversión que se conservan para mostrar la forma de onda sin releer el WAV
+MAX_ANALYSIS_RESULTS = 500
 
 class MainWindow(QMainWindow):
     """Ventana principal de la aplicación."""
@@ -43,6 +53,8 @@ class MainWindow(QMainWindow):
         # Inicializar variables de estado
         self.current_file = None
         self.converted_file = None
+        self.batch_report = None  # Informe del último lote (BatchReport)
+        self.analysis_results = {}  # Ruta convertida -> AnalysisResult hecho durante la conversión
         
         # Conectar señales para actualización segura entre hilos
         self.update_status_signal.connect(self.status_bar.set_status)
@@ -59,11 +71,15 @@ class MainWindow(QMainWindow):
         
         # Verificar si ffmpeg está instalado
         self.check_ffmpeg()
+        
+        # Ofrecer la reanudación de un lote que quedó a medias en la sesión anterior
+        self.offer_batch_resume()
     
     def init_components(self):
         """Inicializa los componentes de la aplicación."""
         # Componentes principales
         self.audio_converter = AudioConverter()  # Motor de conversión de audio
+        self.conversion_events = ConversionEventAggregator()  # Agrupa eventos del conversor
         self.audio_player = AudioPlayer()        # Reproductor de audio
         self.waveform_generator = WaveformGenerator()  # Generador de forma de onda
         
@@ -73,6 +89,8 @@ class MainWindow(QMainWindow):
         self.audio_info_widget = AudioInfoWidget()  # Información del audio
         self.waveform_widget = WaveformWidget()     # Visualización de forma de onda
         self.status_bar = StatusBar()               # Barra de estado
+        self.batch_summary_panel = BatchSummaryPanel()  # Resumen no modal de lotes
+        self.batch_summary_panel.hide()
         
     def init_ui(self):
         """Configura la interfaz de usuario."""
@@ -128,6 +146,9 @@ class MainWindow(QMainWindow):
         # Añadir el splitter al layout principal
         main_layout.addWidget(main_splitter)
         
+        # Panel de resumen de lotes (oculto hasta que haya resultados)
+        main_layout.addWidget(self.batch_summary_panel)
+        
         # Establecer el widget central
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
@@ -141,12 +162,16 @@ class MainWindow(QMainWindow):
         self.file_list_widget.file_selected.connect(self.on_file_selected)
         self.file_list_widget.batch_convert_requested.connect(self.on_batch_convert_requested)
         
-        # Conexiones para el conversor de audio
-        self.audio_converter.conversion_started.connect(self.on_conversion_started)
-        self.audio_converter.conversion_progress.connect(self.on_conversion_progress)
-        self.audio_converter.conversion_completed.connect(self.on_conversion_completed)
-        self.audio_converter.conversion_error.connect(self.on_conversion_error)
-        self.audio_converter.batch_completed.connect(self.on_batch_completed)
+        # Conexiones para el panel de resumen de lotes
+        self.batch_summary_panel.load_converted_requested.connect(self.load_converted_file)
+        
+        # Conexiones para el conversor de audio: los eventos de los hilos del
+        # pool se agrupan en instantáneas periódicas para no saturar la interfaz
+        self.conversion_events.attach(self.audio_converter)
+        self.conversion_events.snapshot_ready.connect(self.on_conversion_snapshot)
+        self.audio_converter.deduplication_report.connect(self.on_deduplication_report)
+        self.audio_converter.triage_completed.connect(self.on_triage_completed)
+        self.audio_converter.analysis_ready.connect(self.on_analysis_ready)
         
         # Conexiones para el reproductor de audio
         self.audio_player.position_changed.connect(self.on_player_position_changed)
@@ -174,6 +199,46 @@ class MainWindow(QMainWindow):
                 "No se ha encontrado FFmpeg en el sistema. Por favor, instálelo para poder usar esta aplicación."
             )
     
+    def offer_batch_resume(self):
+        """Pregunta si reanudar el lote interrumpido más reciente de la cola persistente."""
+        job_queue = self.audio_converter.job_queue
+        try:
+            # Sin esto la base de datos crece con cada lote: olvidar los completados hace tiempo
+            job_queue.prune()
+            batches = []
+            for batch in job_queue.unfinished_batches():
+                # Interrumpido tras el último archivo pero antes de cerrarse: no hay nada que reanudar
+                if job_queue.finish_batch(batch.id):
+                    continue
+                batches.append(batch)
+        except Exception as e:
+            print(f"Error al leer la cola de trabajos: {e}")
+            return
+        if not batches:
+            return
+        
+        batch = batches[0]
+        done = batch.counts.get('done', 0)
+        remaining = batch.counts.get('pending', 0) + batch.counts.get('running', 0)
+        answer = QMessageBox.question(
+            self,
+            "Lote interrumpido",
+            f"Hay un lote interrumpido con {done} archivos convertidos y {remaining} pendientes. "
+            "¿Desea reanudarlo?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        if answer != QMessageBox.Yes:
+            # Descartar los lotes abiertos para no volver a preguntar
+            for pending_batch in batches:
+                self.audio_converter.job_queue.discard_batch(pending_batch.id)
+            return
+        
+        file_list = self.audio_converter.resume_batch(batch.id)
+        self.status_bar.set_status("convirtiendo", f"Reanudando lote: {len(file_list)} archivos pendientes...")
+        self.batch_report = BatchReport(file_list, batch.output_dir)
+        self.batch_summary_panel.clear()
+    
     def on_file_selected(self, file_path):
         """
         Maneja el evento de selección de un archivo en la lista.
@@ -181,6 +246,10 @@ class MainWindow(QMainWindow):
         Args:
             file_path: Ruta al archivo seleccionado
         """
+        with tracing.span("ui.on_file_selected", path=os.path.basename(file_path)):
+            self._select_file(file_path)
+    
+    def _select_file(self, file_path):
         # Actualizar el archivo actual
         self.current_file = file_path
         
@@ -199,36 +268,26 @@ class MainWindow(QMainWindow):
             daemon=True
         ).start()
     
+    @profiling.profiled("file_load")
     def _load_file_info_async(self, file_path):
         """Carga la información del archivo en un hilo separado para no bloquear la UI"""
         try:
             # Cargar el archivo en el reproductor
-            self.audio_player.load_file(file_path)
+            with tracing.span("player.load_file", path=os.path.basename(file_path)):
+                self.audio_player.load_file(file_path)
             
             # Actualizar información del audio
             try:
-                import soundfile as sf
-                info = sf.info(file_path)
-                
-                # Calcular duración en formato legible
-                duration_seconds = info.duration
-                minutes = int(duration_seconds // 60)
-                seconds = int(duration_seconds % 60)
+                # Leer solo la cabecera (resultado memorizado por huella del archivo)
+                with tracing.span("metadata.read"):
+                    metadata = read_audio_metadata(file_path)
                 
                 # No podemos actualizar directamente widgets creados en el hilo principal
                 # desde un hilo secundario, así que emitimos señales
                 
                 # Actualizar información del audio (desde el hilo principal cuando regrese a la aplicación)
-                QApplication.postEvent(self.audio_info_widget, CustomEvent("update_info", {
-                    "file_name": os.path.basename(file_path),
-                    "samplerate": info.samplerate,
-                    "channels": info.channels,
-                    "format": info.format,
-                    "subtype": getattr(info, "subtype", "N/A"),
-                    "duration": f"{minutes}:{seconds:02d}",
-                    "duration_seconds": duration_seconds,
-                    "bit_depth": getattr(info, "bits_per_sample", "N/A")
-                }))
+                QApplication.postEvent(self.audio_info_widget, CustomEvent(
+                    "update_info", metadata.to_info_dict(os.path.basename(file_path))))
                 
                 # Actualizar estado - usando señal segura entre hilos
                 self.update_status_signal.emit("listo", f"Archivo cargado: {os.path.basename(file_path)}")
@@ -260,36 +319,50 @@ class MainWindow(QMainWindow):
         # Mostrar estado
         self.status_bar.set_status("convirtiendo", f"Iniciando conversión por lotes de {len(file_list)} archivos...")
         
-        # Iniciar conversión por lotes
-        self.audio_converter.convert_batch(file_list, output_dir)
+        # Preparar el informe del lote
+        self.batch_report = BatchReport(file_list, output_dir)
+        self.batch_summary_panel.clear()
+        
+        # Iniciar conversión por lotes con los perfiles elegidos (una decodificación por archivo)
+        self.audio_converter.convert_batch(
+            file_list, output_dir, profiles=self.file_list_widget.selected_profiles(),
+            normalize=self.file_list_widget.normalize_enabled(),
+            deduplicate=self.file_list_widget.dedup_enabled(),
+            verify=self.file_list_widget.verify_enabled(),
+            preflight=self.file_list_widget.preflight_enabled(),
+            analyze=self.file_list_widget.analyze_enabled())
     
-    def on_conversion_started(self, file_path):
+    def on_conversion_snapshot(self, snapshot):
         """
-        Maneja el evento de inicio de conversión de un archivo.
+        Aplica una instantánea agregada de eventos del conversor.
+        Se recibe como máximo unas 20 veces por segundo, independientemente
+        del número de archivos del lote.
         
         Args:
-            file_path: Ruta al archivo en conversión
+            snapshot: ConversionSnapshot con los eventos acumulados
         """
-        # Mostrar estado
-        self.status_bar.set_status("convirtiendo", f"Convirtiendo {os.path.basename(file_path)}...")
+        # Actualizar el estado de todos los archivos en una sola pasada
+        self.file_list_widget.set_file_statuses(snapshot.statuses)
+        
+        # Mostrar solo el último progreso de la ventana
+        if snapshot.last_file and snapshot.progress is not None:
+            self.status_bar.set_status(
+                "convirtiendo",
+                f"Convirtiendo {os.path.basename(snapshot.last_file)}... {snapshot.progress}%"
+            )
+            self.status_bar.set_progress(snapshot.progress)
         
-        # Actualizar la UI según sea necesario
-        self.file_list_widget.set_file_status(file_path, "convirtiendo")
-    
-    def on_conversion_progress(self, file_path, progress):
-        """
-        Maneja el evento de progreso de conversión.
+        for original_file, converted_file in snapshot.completed:
+            self.on_conversion_completed(original_file, converted_file)
         
-        Args:
-            file_path: Ruta al archivo en conversión
-            progress: Porcentaje de progreso (0-100)
-        """
-        # Actualizar barra de estado con el progreso
-        self.status_bar.set_status(
-            "convirtiendo", 
-            f"Convirtiendo {os.path.basename(file_path)}... {progress}%"
-        )
-        self.status_bar.set_progress(progress)
+        for file_path, error_message in snapshot.errors:
+            self.on_conversion_error(file_path, error_message)
+        
+        if snapshot.batch_done:
+            self.on_batch_completed()
+        elif snapshot.errors and self.batch_report is not None:
+            # Mostrar los errores a medida que llegan, sin bloquear el lote
+            self.batch_summary_panel.show_report(self.batch_report)
     
     def on_conversion_completed(self, original_file, converted_file):
         """
@@ -299,65 +372,49 @@ class MainWindow(QMainWindow):
             original_file: Ruta al archivo original
             converted_file: Ruta al archivo convertido
         """
-        # Actualizar estado
-        self.status_bar.set_status("completado", f"Conversión completada: {os.path.basename(converted_file)}")
-        self.status_bar.set_progress(100)
-        
-        # Actualizar UI
-        self.file_list_widget.set_file_status(original_file, "convertido")
+        # Registrar el resultado en el informe del lote
+        if self.batch_report is not None:
+            self.batch_report.add_success(original_file, converted_file)
         
         # Guardar referencia al archivo convertido
         self.converted_file = converted_file
         
-        # Si el archivo convertido es el archivo actualmente seleccionado, actualizarlo
+        # Si el archivo convertido es el actualmente seleccionado, ofrecer cargarlo
+        # desde el panel de resumen en lugar de interrumpir el lote con un diálogo
         if self.current_file == original_file:
-            # Mostrar mensaje de confirmación
-            reply = QMessageBox.question(
-                self,
-                "Conversión completada",
-                f"El archivo ha sido convertido exitosamente a WAV.\n"
-                f"Ruta: {converted_file}\n\n"
-                f"¿Desea cargar el archivo convertido?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.Yes
-            )
-            
-            if reply == QMessageBox.No:
-                return
-                
-            # Cargar el archivo convertido
-            if self.audio_player.load_file(converted_file):
-                # Actualizar la forma de onda y la información
+            self.batch_summary_panel.offer_converted_file(converted_file)
+    
+    def load_converted_file(self, converted_file):
+        """
+        Carga y reproduce un archivo convertido.
+        
+        Args:
+            converted_file: Ruta al archivo convertido
+        """
+        if self.audio_player.load_file(converted_file):
+            # Actualizar la forma de onda y la información; si el archivo se analizó
+            # al convertirlo, la forma de onda sale de ese análisis sin leer el WAV
+            analysis = self.analysis_results.get(converted_file)
+            if analysis is not None:
+                self.waveform_widget.show_analysis(converted_file, analysis)
+                if analysis.loudness is not None and analysis.loudness.integrated_lufs is not None:
+                    self.status_bar.set_status(
+                        "completado", f"{os.path.basename(converted_file)}: "
+                                      f"{analysis.loudness.integrated_lufs:.1f} LUFS")
+            else:
                 self.waveform_widget.update_waveform(converted_file)
+            
+            # Obtener información del archivo convertido
+            try:
+                metadata = read_audio_metadata(converted_file)
+                audio_info = metadata.to_info_dict(os.path.basename(converted_file))
                 
-                # Obtener información del archivo convertido
-                try:
-                    import soundfile as sf
-                    info = sf.info(converted_file)
-                    
-                    # Calcular duración en formato legible
-                    duration_seconds = info.duration
-                    minutes = int(duration_seconds // 60)
-                    seconds = int(duration_seconds % 60)
-                    
-                    # Recopilar información
-                    audio_info = {
-                        "file_name": os.path.basename(converted_file),
-                        "samplerate": info.samplerate,
-                        "channels": info.channels,
-                        "format": info.format,
-                        "subtype": info.subtype,
-                        "duration": f"{minutes}:{seconds:02d}",
-                        "duration_seconds": duration_seconds,
-                        "bit_depth": getattr(info, "bits_per_sample", "N/A")
-                    }
-                    
-                    self.audio_info_widget.update_info(audio_info)
-                except Exception as e:
-                    print(f"Error al obtener información del audio convertido: {e}")
-                
-                # Reproducir el archivo
-                self.audio_player.play()
+                self.audio_info_widget.update_info(audio_info)
+            except Exception as e:
+                print(f"Error al obtener información del audio convertido: {e}")
+            
+            # Reproducir el archivo
+            self.audio_player.play()
     
     def on_conversion_error(self, file_path, error_message):
         """
@@ -370,24 +427,54 @@ class MainWindow(QMainWindow):
         # Actualizar estado
         self.status_bar.set_status("error", f"Error al convertir {os.path.basename(file_path)}")
         
-        # Mostrar mensaje de error
-        QMessageBox.warning(
-            self,
-            "Error de conversión",
-            f"Error al convertir {os.path.basename(file_path)}:\n{error_message}"
-        )
+        # Registrar el error en el informe; se revisa en el panel de resumen
+        if self.batch_report is not None:
+            self.batch_report.add_error(file_path, error_message)
+    
+    def on_analysis_ready(self, converted_file, analysis):
+        """
+        Guarda el análisis hecho durante la conversión de un archivo.
+        
+        Args:
+            converted_file: Ruta del archivo convertido
+            analysis: AnalysisResult con picos, BPM y sonoridad
+        """
+        self.analysis_results[converted_file] = analysis
+        # Conservar solo los más recientes para que un lote enorme no acapare memoria
+        while len(self.analysis_results) > MAX_ANALYSIS_RESULTS:
+            self.analysis_results.pop(next(iter(self.analysis_results)))
+    
+    def on_deduplication_report(self, stats):
+        """
+        Guarda en el informe del lote lo ahorrado por la deduplicación.
+        
+        Args:
+            stats: DedupStats emitido por el conversor
+        """
+        if self.batch_report is not None:
+            self.batch_report.set_deduplication(stats)
+    
+    def on_triage_completed(self, report, report_path):
+        """
+        Muestra el resultado del triaje previo y lo guarda en el informe del lote.
+        
+        Args:
+            report: TriageReport con los archivos apartados
+            report_path: Ruta del informe JSON (vacía si no se pudo guardar)
+        """
+        self.status_bar.set_status("convirtiendo", f"Triaje: {report.summary_text()}")
+        if self.batch_report is not None:
+            self.batch_report.set_triage(report, report_path)
     
     def on_batch_completed(self):
         """Maneja el evento de finalización de conversión por lotes."""
         # Actualizar estado
         self.status_bar.set_status("completado", "Conversión por lotes completada")
         
-        # Mostrar mensaje de confirmación
-        QMessageBox.information(
-            self,
-            "Conversión completada",
-            "La conversión por lotes ha sido completada."
-        )
+        # Mostrar el resumen en el panel no modal
+        if self.batch_report is not None:
+            self.batch_report.finish()
+            self.batch_summary_panel.show_report(self.batch_report)
     
     def on_waveform_generated(self, file_path):
         """
@@ -460,6 +547,9 @@ class MainWindow(QMainWindow):
         # Cancelar conversiones en progreso
         self.audio_converter.cancel_conversions()
         
+        # Detener los escaneos de biblioteca (un QThread destruido en marcha aborta el proceso)
+        self.file_list_widget.stop_scans()
+        
         # Continuar con el cierre de la aplicación
         event.accept()
 
@@ -474,9 +564,35 @@ class CustomEvent(QEvent):
         self.name = name
         self.data = data if data is not None else {}
 
+def parse_arguments(argv):
+    """
+    Interpreta las opciones propias de la aplicación; el resto se deja para Qt.
+    
+    Returns:
+        Tupla (opciones, argumentos restantes para QApplication)
+    """
+    parser = argparse.ArgumentParser(description="Convertidor FLAC a WAV para Denon DS-1200")
+    parser.add_argument('--trace', nargs='?', const='', default=None, metavar='RUTA',
+                        help="Registrar tramos de rendimiento y guardarlos al salir en formato de traza "
+                             "de Chrome (por defecto en el directorio de datos de la aplicación)")
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='DIRECTORIO',
+                        help="Perfilar con cProfile y tracemalloc la carga de archivos, la forma de onda, "
+                             "el espectrograma y la conversión por lotes (por defecto en el directorio "
+                             "de datos de la aplicación)")
+    metrics.add_metrics_arguments(parser)
+    options, remaining = parser.parse_known_args(argv[1:])
+    return options, argv[:1] + remaining
+
 # Punto de entrada de la aplicación
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    options, qt_argv = parse_arguments(sys.argv)
+    if options.trace is not None:
+        tracing.enable(options.trace or None)
+    if options.profile is not None:
+        profiling.enable(options.profile or None)
+        print(f"Perfiles por fase en {profiling.output_directory()}")
+    
+    app = QApplication(qt_argv)
     
     # Configurar fuentes seguras que existen en todos los sistemas
     font_database = QFontDatabase()
@@ -513,5 +629,11 @@ if __name__ == "__main__":
     window = MainWindow()
     window.show()
     
+    # Exportar las métricas del conversor si se pidió (el volcado JSON se repite al salir)
+    exporters = metrics.start_exporters(window.audio_converter.metrics, options)
+    
     # Iniciar el bucle de eventos de la aplicación
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    for exporter in exporters:
+        exporter.stop()
+    sys.exit(exit_code)
@@ -0,0 +1,382 @@
+'''
+Módulo de métricas de conversión para la aplicación Convertidor FLAC a WAV.
+Durante los lotes largos (por ejemplo, de toda una noche) el conversor lleva
+contadores e histogramas de latencia de memoria fija: archivos por minuto,
+tiempo medio de ffmpeg, tasa de fallos y profundidad de la cola. Se pueden
+consultar en un punto HTTP local en formato de texto de Prometheus o volcar
+periódicamente a un archivo JSON, tanto con la interfaz gráfica como en los
+modos sin interfaz.
+'''
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Límites superiores (segundos) de los histogramas de latencia
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+# Intervalo predeterminado del volcado JSON
+DEFAULT_DUMP_INTERVAL = 60.0
+
+
+def _format_value(value):
+    """Formatea un número como lo espera el formato de texto de Prometheus."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Contador monótono."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def to_dict(self):
+        return self._value
+
+    def prometheus_lines(self):
+        return [f"{self.name} {_format_value(self._value)}"]
+
+
+class Gauge:
+    """Valor que sube y baja, fijado a mano o leído de una función al exportar."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, func=None):
+        self.name = name
+        self.help = help_text
+        self._func = func
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    @property
+    def value(self):
+        return self._func() if self._func is not None else self._value
+
+    def to_dict(self):
+        return self.value
+
+    def prometheus_lines(self):
+        return [f"{self.name} {_format_value(self.value)}"]
+
+
+class Histogram:
+    """Histograma con límites fijos: ocupa lo mismo tras mil o un millón de observaciones."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # El último es +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sum(self):
+        return self._sum
+
+    def mean(self):
+        """Media de las observaciones (None si no hay ninguna)."""
+        with self._lock:
+            return self._sum / self._count if self._count else None
+
+    def cumulative_counts(self):
+        """Pares (límite superior, observaciones <= límite), como los cubos de Prometheus."""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def to_dict(self):
+        return {
+            'count': self._count,
+            'sum': self._sum,
+            'buckets': {('+Inf' if math.isinf(bound) else str(bound)): count
+                        for bound, count in self.cumulative_counts()},
+        }
+
+    def prometheus_lines(self):
+        lines = [f'{self.name}_bucket{{le="{_format_value(bound)}"}} {count}'
+                 for bound, count in self.cumulative_counts()]
+        lines.append(f"{self.name}_sum {_format_value(self._sum)}")
+        lines.append(f"{self.name}_count {self._count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas con nombre único, exportable a Prometheus y JSON."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name, help_text, func=None):
+        return self._register(Gauge(name, help_text, func))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def to_prometheus(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        return {metric.name: metric.to_dict() for metric in list(self._metrics.values())}
+
+
+class ConversionMetrics:
+    """Métricas del conversor: archivos, fallos, latencias de ffmpeg y profundidad de la cola."""
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self.files_converted = self.registry.counter(
+            'flac2wav_files_converted_total', "Archivos convertidos correctamente")
+        self.files_failed = self.registry.counter(
+            'flac2wav_files_failed_total', "Archivos cuya conversión falló")
+        self.file_seconds = self.registry.histogram(
+            'flac2wav_file_seconds', "Tiempo de conversión por archivo en segundos")
+        self.ffmpeg_seconds = self.registry.histogram(
+            'flac2wav_ffmpeg_seconds', "Tiempo de ejecución de cada proceso ffmpeg en segundos")
+        self.queue_depth = self.registry.gauge(
+            'flac2wav_queue_depth', "Archivos de los lotes en curso pendientes de convertir")
+        self.registry.gauge(
+            'flac2wav_uptime_seconds', "Segundos desde que se crearon las métricas", self.uptime)
+
+    def uptime(self):
+        return time.monotonic() - self._started
+
+    def file_finished(self, seconds, ok):
+        """Registra el final de la conversión de un archivo."""
+        if ok:
+            self.files_converted.inc()
+            self.file_seconds.observe(seconds)
+        else:
+            self.files_failed.inc()
+
+    def summary(self):
+        """Métricas derivadas para los informes: ritmo, tasa de fallos y medias."""
+        converted = self.files_converted.value
+        failed = self.files_failed.value
+        finished = converted + failed
+        minutes = self.uptime() / 60.0
+        return {
+            'uptime_seconds': round(self.uptime(), 1),
+            'files_converted': converted,
+            'files_failed': failed,
+            'files_per_minute': round(converted / minutes, 2) if minutes > 0 else 0.0,
+            'failure_rate': round(failed / finished, 4) if finished else 0.0,
+            'avg_file_seconds': self.file_seconds.mean(),
+            'avg_ffmpeg_seconds': self.ffmpeg_seconds.mean(),
+            'queue_depth': self.queue_depth.value,
+        }
+
+    def summary_text(self):
+        summary = self.summary()
+        text = (f"{summary['files_converted']} convertidos ({summary['files_per_minute']:.1f}/min), "
+                f"{summary['files_failed']} fallidos, cola {summary['queue_depth']}")
+        if summary['avg_ffmpeg_seconds'] is not None:
+            text += f", ffmpeg {summary['avg_ffmpeg_seconds']:.2f} s de media"
+        return text
+
+    def to_dict(self):
+        return {'started_at': self.started_at, 'summary': self.summary(), 'metrics': self.registry.to_dict()}
+
+
+class MetricsServer:
+    """Punto HTTP local con /metrics (Prometheus) y /metrics.json."""
+
+    def __init__(self, metrics, host='127.0.0.1', port=0):
+        """
+        Args:
+            metrics: ConversionMetrics a exponer
+            host: Interfaz de escucha (por defecto solo local)
+            port: Puerto (0 elige uno libre)
+        """
+        self.metrics = metrics
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def _handler_class(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body = metrics.registry.to_prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body = json.dumps(metrics.to_dict()).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Sin una línea en stderr por cada consulta
+                pass
+
+        return Handler
+
+    @property
+    def address(self):
+        """Par (host, puerto) en el que escucha el servidor."""
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+class MetricsDumper:
+    """Vuelca las métricas a un archivo JSON cada cierto tiempo (y una última vez al parar)."""
+
+    def __init__(self, metrics, path, interval=DEFAULT_DUMP_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def dump(self):
+        """Escribe el archivo de forma atómica."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.metrics.to_dict(), dumped_at=time.time()), f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"Error al volcar las métricas: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.dump()
+        except OSError as e:
+            print(f"Error al volcar las métricas: {e}")
+
+
+def add_metrics_arguments(parser):
+    """Añade a un argparse las opciones --metrics-port, --metrics-host, --metrics-dump y --metrics-interval."""
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Servir métricas de Prometheus en http://HOST:PUERTO/metrics")
+    parser.add_argument('--metrics-host', default='127.0.0.1', help="Interfaz del punto de métricas")
+    parser.add_argument('--metrics-dump', default=None, metavar='RUTA',
+                        help="Volcar las métricas a este archivo JSON periódicamente")
+    parser.add_argument('--metrics-interval', type=float, default=DEFAULT_DUMP_INTERVAL,
+                        help="Segundos entre volcados JSON")
+
+
+def start_exporters(metrics, options):
+    """
+    Arranca los exportadores pedidos con las opciones de add_metrics_arguments.
+
+    Returns:
+        Lista de exportadores en marcha (cada uno con stop())
+    """
+    exporters = []
+    if options.metrics_port is not None:
+        server = MetricsServer(metrics, options.metrics_host, options.metrics_port).start()
+        host, port = server.address
+        print(f"Métricas en http://{host}:{port}/metrics")
+        exporters.append(server)
+    if options.metrics_dump:
+        exporters.append(MetricsDumper(metrics, options.metrics_dump, options.metrics_interval).start())
+    return exporters
@@ -0,0 +1,270 @@
+'''
+Módulo de perfiles de salida para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene el registro declarativo de perfiles de salida (códec,
+contenedor, frecuencia, canales...) y el constructor de comandos ffmpeg que
+los compila. Un mismo comando puede incluir varias salidas, de modo que el
+archivo de entrada se decodifica una sola vez para todos los formatos.
+'''
+
+import functools
+import os
+from collections import OrderedDict, namedtuple
+
+OutputProfile = namedtuple('OutputProfile', [
+    'name',               # Identificador único del perfil
+    'label',              # Nombre a mostrar en la interfaz
+    'extension',          # Extensión del archivo de salida (con punto)
+    'codec',              # Códec de audio de ffmpeg
+    'container',          # Formato de contenedor de ffmpeg (-f)
+    'sample_rate',        # Frecuencia de muestreo en Hz (None conserva la original)
+    'channels',           # Número de canales (None conserva los originales)
+    'bits_per_sample',    # Profundidad de bits PCM resultante (None para formatos con pérdida)
+    'bitrate',            # Tasa de bits para formatos con pérdida (por ejemplo '320k')
+    'compression_level',  # Nivel de compresión (FLAC)
+    'extra_args',         # Tupla de argumentos adicionales de ffmpeg para esta salida
+])
+
+# Argumentos para obtener archivos bit-exactos sin metadatos ni cabeceras extra
+_BITEXACT_ARGS = (
+    '-map_metadata', '-1',         # Eliminar todos los metadatos
+    '-fflags', '+bitexact',        # Modo bit-exacto para mayor compatibilidad
+    '-flags:a', '+bitexact',       # Modo bit-exacto para el audio
+    '-bitexact',                   # Asegura salida bit-exacta sin datos adicionales
+)
+
+# Perfil predeterminado: WAV compatible con Denon DS-1200
+DEFAULT_PROFILE_NAME = 'ds1200_wav'
+
+_profiles = OrderedDict()
+
+
+def register_profile(profile):
+    """
+    Registra (o reemplaza) un perfil de salida.
+
+    Args:
+        profile: Instancia de OutputProfile
+
+    Returns:
+        El mismo perfil, para poder encadenar la llamada
+    """
+    _profiles[profile.name] = profile
+    return profile
+
+
+def get_profile(name):
+    """
+    Obtiene un perfil registrado por su nombre.
+
+    Raises:
+        KeyError: si no existe un perfil con ese nombre
+    """
+    try:
+        return _profiles[name]
+    except KeyError:
+        raise KeyError(f"Perfil de salida desconocido: {name}")
+
+
+def list_profiles():
+    """Devuelve los perfiles registrados en orden de registro."""
+    return list(_profiles.values())
+
+
+def profile_to_dict(profile):
+    """Convierte un perfil en un diccionario serializable (JSON)."""
+    return dict(profile._asdict(), extra_args=list(profile.extra_args))
+
+
+def profile_from_dict(fields):
+    """
+    Reconstruye un perfil a partir de profile_to_dict. Se guarda el perfil
+    completo y no solo su nombre para que los perfiles personalizados sigan
+    funcionando donde no estén registrados (otra sesión, otra máquina).
+    """
+    return OutputProfile(**dict(fields, extra_args=tuple(fields['extra_args'])))
+
+
+def make_flac_profile(compression_level):
+    """
+    Crea (y registra) un perfil de recodificación FLAC con el nivel indicado.
+
+    Args:
+        compression_level: Nivel de compresión de 0 (rápido) a 12 (máximo)
+    """
+    if not 0 <= compression_level <= 12:
+        raise ValueError("El nivel de compresión FLAC debe estar entre 0 y 12")
+    return register_profile(OutputProfile(
+        name=f'flac_l{compression_level}',
+        label=f'FLAC (nivel {compression_level})',
+        extension='.flac',
+        codec='flac',
+        container='flac',
+        sample_rate=None,
+        channels=None,
+        bits_per_sample=None,
+        bitrate=None,
+        compression_level=compression_level,
+        extra_args=(),
+    ))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_output_args(profile):
+    """
+    Compila un perfil en la tupla de argumentos de salida de ffmpeg.
+    El resultado se memoriza: cada perfil se compila una sola vez.
+
+    Args:
+        profile: Instancia de OutputProfile
+
+    Returns:
+        Tupla de argumentos (sin la ruta de salida)
+    """
+    args = ['-map', '0:a:0', '-c:a', profile.codec]
+    if profile.sample_rate:
+        args += ['-ar', str(profile.sample_rate)]
+    if profile.channels:
+        args += ['-ac', str(profile.channels)]
+    if profile.bitrate:
+        args += ['-b:a', profile.bitrate]
+    if profile.compression_level is not None:
+        args += ['-compression_level', str(profile.compression_level)]
+    args += list(profile.extra_args)
+    args += ['-f', profile.container]
+    return tuple(args)
+
+
+def build_ffmpeg_command(ffmpeg_path, input_file, outputs, threads=None, gain_db=None):
+    """
+    Construye un comando ffmpeg con una entrada y una o varias salidas.
+    ffmpeg decodifica la entrada una sola vez y alimenta a todos los codificadores.
+
+    Args:
+        ffmpeg_path: Ruta al binario de ffmpeg
+        input_file: Archivo de entrada
+        outputs: Lista de pares (OutputProfile, ruta de salida)
+        threads: Número de hilos por codificador (opcional)
+        gain_db: Ganancia en dB aplicada a todas las salidas (opcional, normalización)
+
+    Returns:
+        Lista de argumentos lista para subprocess
+    """
+    cmd = [
+        ffmpeg_path,
+        '-nostdin',                    # No usar entrada estándar (mejora rendimiento)
+        '-y',                          # Sobrescribir archivos sin preguntar
+        '-loglevel', 'error',          # Minimizar salida para mejor rendimiento
+        '-i', input_file,              # Archivo de entrada
+    ]
+    for profile, output_path in outputs:
+        cmd += compile_output_args(profile)
+        if gain_db:
+            cmd += ['-af', f'volume={gain_db:.2f}dB']
+        if threads:
+            cmd += ['-threads', str(threads)]
+        cmd.append(output_path)
+    return cmd
+
+
+def output_path_for(input_file, output_dir, profile):
+    """
+    Deriva la ruta de salida de un archivo para un perfil.
+
+    Args:
+        input_file: Archivo de entrada
+        output_dir: Directorio de salida
+        profile: Instancia de OutputProfile
+    """
+    name_without_ext = os.path.splitext(os.path.basename(input_file))[0]
+    output_path = os.path.join(output_dir, f"{name_without_ext}{profile.extension}")
+    if os.path.abspath(output_path) == os.path.abspath(input_file):
+        # Nunca sobrescribir la entrada (por ejemplo, al recodificar FLAC en su carpeta)
+        output_path = os.path.join(output_dir, f"{name_without_ext}_{profile.name}{profile.extension}")
+    return output_path
+
+
+def output_paths_for(input_file, output_dir, profiles):
+    """
+    Deriva una ruta de salida distinta para cada perfil de una conversión múltiple.
+    Si dos perfiles comparten extensión (por ejemplo dos WAV), los siguientes
+    llevan el nombre del perfil como sufijo.
+
+    Args:
+        input_file: Archivo de entrada
+        output_dir: Directorio de salida
+        profiles: Lista de OutputProfile
+
+    Returns:
+        Lista de pares (OutputProfile, ruta de salida)
+    """
+    outputs = []
+    used = set()
+    for profile in profiles:
+        output_path = output_path_for(input_file, output_dir, profile)
+        if output_path in used:
+            name_without_ext = os.path.splitext(os.path.basename(input_file))[0]
+            output_path = os.path.join(output_dir, f"{name_without_ext}_{profile.name}{profile.extension}")
+        used.add(output_path)
+        outputs.append((profile, output_path))
+    return outputs
+
+
+# --- Perfiles incluidos ---
+
+register_profile(OutputProfile(
+    name=DEFAULT_PROFILE_NAME,
+    label='WAV 16-bit/44.1 kHz (Denon DS-1200)',
+    extension='.wav',
+    codec='pcm_s16le',             # Codec PCM 16-bit (formato CD)
+    container='wav',
+    sample_rate=44100,             # Frecuencia de muestreo 44.1kHz (estándar CD)
+    channels=2,                    # 2 canales (estéreo)
+    bits_per_sample=16,
+    bitrate=None,
+    compression_level=None,
+    extra_args=_BITEXACT_ARGS + ('-rf64', 'never'),  # Evitar RF64 (menos compatible)
+))
+
+register_profile(OutputProfile(
+    name='wav_24_48',
+    label='WAV 24-bit/48 kHz',
+    extension='.wav',
+    codec='pcm_s24le',
+    container='wav',
+    sample_rate=48000,
+    channels=2,
+    bits_per_sample=24,
+    bitrate=None,
+    compression_level=None,
+    extra_args=_BITEXACT_ARGS + ('-rf64', 'auto'),
+))
+
+register_profile(OutputProfile(
+    name='aiff_16_44',
+    label='AIFF 16-bit/44.1 kHz',
+    extension='.aiff',
+    codec='pcm_s16be',
+    container='aiff',
+    sample_rate=44100,
+    channels=2,
+    bits_per_sample=16,
+    bitrate=None,
+    compression_level=None,
+    extra_args=_BITEXACT_ARGS,
+))
+
+register_profile(OutputProfile(
+    name='mp3_320',
+    label='MP3 320 kbps',
+    extension='.mp3',
+    codec='libmp3lame',
+    container='mp3',
+    sample_rate=44100,
+    channels=2,
+    bits_per_sample=None,
+    bitrate='320k',
+    compression_level=None,
+    extra_args=('-id3v2_version', '3'),
+))
+
+make_flac_profile(8)
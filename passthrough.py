@@ -0,0 +1,170 @@
+'''
+Módulo de conversión directa (sin ffmpeg) para la aplicación Convertidor FLAC a WAV.
+Cuando la cabecera del archivo de entrada indica que ya tiene la frecuencia,
+los canales y la profundidad de bits del perfil de salida, convertir a WAV o
+AIFF es solo cambiar de contenedor. En ese caso se decodifica el FLAC por
+bloques con soundfile y se escriben las muestras PCM tal cual, sin lanzar
+ffmpeg ni pasar por el filtro de remuestreo. Si solo cambia la frecuencia de
+muestreo, los bloques pasan además por el remuestreador compartido.
+'''
+
+import os
+
+import numpy as np
+import soundfile as sf
+
+import tracing
+from resampling import StreamingResampler
+
+# Contenedores que el camino directo sabe escribir (ffmpeg -> soundfile)
+_CONTAINERS = {
+    'wav': 'WAV',
+    'aiff': 'AIFF',
+}
+
+# Códecs PCM de ffmpeg admitidos y su subtipo/orden de bytes en soundfile
+_PCM_CODECS = {
+    'pcm_s16le': ('PCM_16', 'LITTLE'),
+    'pcm_s24le': ('PCM_24', 'LITTLE'),
+    'pcm_s16be': ('PCM_16', 'BIG'),
+    'pcm_s24be': ('PCM_24', 'BIG'),
+}
+
+# Formatos de entrada que soundfile decodifica sin pérdida
+_LOSSLESS_INPUTS = ('FLAC', 'WAV')
+
+# Muestras por canal decodificadas en cada bloque
+BLOCK_FRAMES = 65536
+
+
+def can_passthrough(metadata, profile, allow_resample=False):
+    """
+    Indica si un archivo puede convertirse a un perfil sin cambiar el formato de muestra.
+
+    Args:
+        metadata: AudioMetadata del archivo de entrada
+        profile: OutputProfile de destino
+        allow_resample: Admitir también una frecuencia de muestreo distinta
+
+    Returns:
+        True si basta con reescribir el contenedor (y, si se admite, remuestrear)
+    """
+    if metadata.format not in _LOSSLESS_INPUTS or metadata.subtype not in ('PCM_16', 'PCM_24'):
+        return False
+    if profile.container not in _CONTAINERS or profile.codec not in _PCM_CODECS:
+        return False
+    if profile.sample_rate and profile.sample_rate != metadata.sample_rate and not allow_resample:
+        return False
+    if profile.channels and profile.channels != metadata.channels:
+        return False
+    return profile.bits_per_sample == metadata.bits_per_sample
+
+
+@tracing.traced("convert.passthrough")
+def passthrough_convert(input_file, outputs, block_frames=BLOCK_FRAMES, gain_db=None, analyzer=None):
+    """
+    Copia las muestras PCM de un archivo a una o varias salidas sin ffmpeg.
+    La entrada se decodifica una sola vez; las salidas con otra frecuencia pasan
+    por un StreamingResampler y el resto recibe las muestras tal cual (salvo que
+    haya que aplicar una ganancia de normalización). Cada salida
+    se escribe en un archivo temporal y se renombra al terminar para no dejar
+    archivos a medias.
+
+    Args:
+        input_file: Archivo de entrada (FLAC o WAV)
+        outputs: Lista de pares (OutputProfile, ruta de salida) que cumplen can_passthrough
+        block_frames: Muestras por canal en cada bloque
+        gain_db: Ganancia en dB (opcional); obliga a pasar las muestras a float
+        analyzer: StreamAnalyzer opcional que recibe cada bloque decodificado
+                  (con la ganancia aplicada y a la frecuencia de la entrada)
+
+    Returns:
+        Lista de rutas escritas
+    """
+    temp_paths = []
+    writers = []
+    try:
+        with sf.SoundFile(input_file) as source:
+            # int32 conserva exactamente las muestras de 16 y 24 bits
+            dtype = 'int16' if source.subtype == 'PCM_16' else 'int32'
+            resamplers = []
+            gain = np.float32(10 ** (gain_db / 20)) if gain_db else None
+
+            for profile, output_path in outputs:
+                subtype, endian = _PCM_CODECS[profile.codec]
+                sample_rate = profile.sample_rate or source.samplerate
+                resamplers.append(StreamingResampler(source.samplerate, sample_rate, source.channels)
+                                  if sample_rate != source.samplerate else None)
+                temp_path = output_path + '.part'
+                temp_paths.append(temp_path)
+                writers.append(sf.SoundFile(
+                    temp_path, 'w',
+                    samplerate=sample_rate,
+                    channels=source.channels,
+                    subtype=subtype,
+                    endian=endian,
+                    format=_CONTAINERS[profile.container],
+                ))
+
+            for block in source.blocks(blocksize=block_frames, dtype=dtype, always_2d=True):
+                samples = None
+                if analyzer is not None:
+                    samples = _to_float(block)
+                    if gain is not None:
+                        samples *= gain
+                    analyzer.process(samples)
+                for writer, resampler in zip(writers, resamplers):
+                    if resampler is None and gain is None:
+                        writer.write(block)
+                        continue
+                    if samples is None:
+                        samples = _to_float(block)
+                        if gain is not None:
+                            samples *= gain
+                    if resampler is not None:
+                        writer.write(_to_pcm(resampler.process(samples), source.subtype, dtype))
+                    else:
+                        writer.write(_to_pcm(samples, source.subtype, dtype))
+
+            for writer, resampler in zip(writers, resamplers):
+                if resampler is not None:
+                    writer.write(_to_pcm(resampler.flush(), source.subtype, dtype))
+
+        for writer in writers:
+            writer.close()
+        writers = []
+
+        for (_, output_path), temp_path in zip(outputs, temp_paths):
+            os.replace(temp_path, output_path)
+        return [output_path for _, output_path in outputs]
+    finally:
+        for writer in writers:
+            writer.close()
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def _to_float(block):
+    """Convierte un bloque entero (int16 o int32) a float32 en [-1, 1)."""
+    return block.astype(np.float32) / np.float32(np.iinfo(block.dtype).max + 1)
+
+
+def _to_pcm(samples, subtype, dtype):
+    """
+    Cuantiza muestras float a la profundidad de bits de la entrada.
+
+    Args:
+        samples: Array float32 (muestras, canales)
+        subtype: 'PCM_16' o 'PCM_24'
+        dtype: Tipo entero con el que se escribe ('int16' o 'int32')
+
+    Returns:
+        Array entero listo para SoundFile.write
+    """
+    full_scale = 2.0 ** (15 if subtype == 'PCM_16' else 23)
+    quantized = np.clip(np.rint(samples * full_scale), -full_scale, full_scale - 1)
+    if dtype == 'int32':
+        # Las muestras de 24 bits se escriben alineadas a la izquierda en int32
+        quantized *= 256
+    return quantized.astype(dtype)
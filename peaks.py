@@ -0,0 +1,123 @@
+'''
+Módulo de envolventes de picos para la aplicación Convertidor FLAC a WAV.
+La forma de onda se dibuja con el pico absoluto de cada tramo de muestras.
+En lugar de mezclar todo el archivo a mono en un array del tamaño de la pista
+y después submuestrearlo, este archivo reduce cada canal por separado bloque
+a bloque con np.maximum.reduceat/np.minimum.reduceat: solo se guardan los
+picos de cada tramo (en float32), así que la memoria no depende de la
+duración y se conservan los picos de cada canal para la vista estéreo.
+'''
+
+import numpy as np
+import soundfile as sf
+
+# Puntos de la envolvente de picos (suficientes para la forma de onda de la interfaz)
+DEFAULT_PEAK_POINTS = 10000
+# Muestras por canal leídas en cada bloque al decodificar
+BLOCK_FRAMES = 65536
+
+
+def bucket_frames_for(frames, points=DEFAULT_PEAK_POINTS):
+    """Muestras por tramo para obtener unos `points` picos de un archivo de `frames` muestras."""
+    return max(1, frames // points)
+
+
+class PeakAnalyzer:
+    """Picos absolutos por tramo y por canal, alimentados bloque a bloque."""
+
+    def __init__(self, channels, bucket_frames):
+        """
+        Args:
+            channels: Número de canales
+            bucket_frames: Muestras por canal de cada tramo
+        """
+        self.channels = channels
+        self.bucket_frames = bucket_frames
+        self._chunks = []            # Picos de los tramos completos, (tramos, canales) float32
+        self._partial = None         # Pico del tramo a medias entre bloques
+        self._partial_frames = 0
+
+    def process(self, block):
+        """
+        Añade un bloque. No se modifica ni se copia: max y min se reducen
+        sobre el propio bloque (puede ser una vista de un memmap).
+
+        Args:
+            block: Array (muestras, canales) float en [-1, 1] o entero PCM
+        """
+        frames = len(block)
+        if not frames:
+            return
+        start = 0
+        if self._partial is not None:
+            # Completar el tramo pendiente del bloque anterior
+            start = min(frames, self.bucket_frames - self._partial_frames)
+            np.maximum(self._partial, self._reduce(block[:start], np.zeros(1, dtype=np.intp))[0],
+                       out=self._partial)
+            self._partial_frames += start
+            if self._partial_frames == self.bucket_frames:
+                self._chunks.append(self._partial[None, :])
+                self._partial = None
+                self._partial_frames = 0
+            if start == frames:
+                return
+
+        starts = np.arange(start, frames, self.bucket_frames)
+        peaks = self._reduce(block, starts)
+        tail = frames - starts[-1]
+        if tail < self.bucket_frames:
+            # El último tramo sigue en el bloque siguiente
+            self._partial = peaks[-1].copy()
+            self._partial_frames = tail
+            peaks = peaks[:-1]
+        if len(peaks):
+            self._chunks.append(peaks)
+
+    @staticmethod
+    def _reduce(block, starts):
+        """Pico absoluto de cada tramo [starts[i], starts[i+1]) por canal, en float32."""
+        highs = np.maximum.reduceat(block, starts, axis=0).astype(np.float32)
+        lows = np.minimum.reduceat(block, starts, axis=0).astype(np.float32)
+        # El valor absoluto se toma ya en float: -(-32768) no cabe en int16
+        np.negative(lows, out=lows)
+        np.maximum(highs, lows, out=highs)
+        if np.issubdtype(block.dtype, np.integer):
+            highs *= np.float32(1.0 / (np.iinfo(block.dtype).max + 1))
+        return highs
+
+    def channel_peaks(self):
+        """Picos por canal hasta el momento: array float32 (tramos, canales)."""
+        chunks = self._chunks + ([self._partial[None, :]] if self._partial is not None else [])
+        if not chunks:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        return np.concatenate(chunks)
+
+    def peaks(self):
+        """Envolvente mono (máximo de todos los canales por tramo): array float32."""
+        return self.channel_peaks().max(axis=1, initial=0.0)
+
+
+def file_peaks(path, points=DEFAULT_PEAK_POINTS, per_channel=False, block_frames=BLOCK_FRAMES):
+    """
+    Envolvente de picos de cualquier archivo que lea soundfile, decodificado
+    por bloques en un único búfer float32 reutilizado.
+
+    Args:
+        path: Ruta al archivo de audio
+        points: Puntos aproximados de la envolvente
+        per_channel: Devolver los picos de cada canal (tramos, canales) en lugar de la envolvente mono
+        block_frames: Muestras por canal decodificadas en cada bloque
+
+    Returns:
+        Tupla (picos float32, puntos por segundo)
+    """
+    with sf.SoundFile(path) as source:
+        analyzer = PeakAnalyzer(source.channels, bucket_frames_for(source.frames, points))
+        buffer = np.empty((block_frames, source.channels), dtype=np.float32)
+        while True:
+            block = source.read(block_frames, dtype='float32', always_2d=True, out=buffer)
+            if not len(block):
+                break
+            analyzer.process(block)
+        rate = source.samplerate / analyzer.bucket_frames
+    return (analyzer.channel_peaks() if per_channel else analyzer.peaks()), rate
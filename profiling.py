@@ -0,0 +1,271 @@
+'''
+Módulo de perfilado por fases para la aplicación Convertidor FLAC a WAV.
+Cuando una colección se convierte o se carga despacio hacen falta datos y no
+suposiciones: con la opción --profile (o la variable de entorno
+FLAC2WAV_PROFILE) cada fase (carga de archivo, forma de onda, espectrograma y
+conversión por lotes) se perfila con cProfile y se compara con tracemalloc la
+memoria del principio y del final. Cada fase deja en el directorio de datos de
+la aplicación un .prof (para pstats o snakeviz), un informe de texto con las
+funciones más costosas y las mayores asignaciones, y una línea en phases.jsonl,
+de modo que un usuario puede enviar la carpeta entera con su informe.
+'''
+
+import cProfile
+import functools
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+from platform_utils import get_app_data_directory
+
+# Variable de entorno que activa el perfilado ("1" usa el directorio predeterminado)
+PROFILE_ENV = 'FLAC2WAV_PROFILE'
+# Funciones y asignaciones que se listan en cada informe
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+# Marcos de pila que guarda tracemalloc por asignación
+TRACEMALLOC_FRAMES = 1
+# Índice con una línea JSON por fase
+INDEX_FILE = 'phases.jsonl'
+
+_enabled = False
+_output_dir = None
+_started_tracemalloc = False
+_sequence = itertools.count(1)
+_index_lock = threading.Lock()
+
+
+def default_profile_directory():
+    """Directorio predeterminado de los perfiles en el directorio de datos de la aplicación."""
+    return os.path.join(get_app_data_directory(), 'profiles', time.strftime("profile_%Y%m%d_%H%M%S"))
+
+
+def enable(directory=None):
+    """
+    Activa el perfilado por fases.
+
+    Args:
+        directory: Directorio donde se escriben los perfiles (None: directorio predeterminado)
+    """
+    global _enabled, _output_dir, _started_tracemalloc
+    _output_dir = directory or default_profile_directory()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        _started_tracemalloc = True
+    _enabled = True
+
+
+def disable():
+    """Desactiva el perfilado (y tracemalloc si lo arrancó este módulo)."""
+    global _enabled, _started_tracemalloc
+    _enabled = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def is_enabled():
+    """True si el perfilado está activo."""
+    return _enabled
+
+
+def output_directory():
+    """Directorio de los perfiles (None si nunca se activó)."""
+    return _output_dir
+
+
+def _start_profiler():
+    """Crea y activa un cProfile en el hilo actual (None si otro perfilador lo impide)."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+: un solo perfilador activo a la vez por intérprete
+        return None
+    return profiler
+
+
+class _NullPhase:
+    """Fase vacía que se devuelve con el perfilado desactivado."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def wrap(self, func):
+        return func
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    """
+    Fase perfilada. cProfile solo ve el hilo que lo activa, así que el trabajo
+    que la fase reparte a otros hilos se envuelve con wrap() y sus perfiles se
+    suman al de la fase al cerrarla. tracemalloc es global: con varias fases a
+    la vez (forma de onda y espectrograma de un mismo archivo), el pico y las
+    asignaciones de cada una incluyen también las de las otras.
+    """
+
+    def __init__(self, name, info):
+        self.name = name
+        self.info = info
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self._start_snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        self._start_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self._profiler = _start_profiler()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._add_profile(self._profiler)
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            self._closed = True
+            profiles = list(self._profiles)
+        if exc_type is not None:
+            self.info['error'] = exc_type.__name__
+        try:
+            self._write(elapsed, profiles)
+        except OSError as e:
+            print(f"Error al guardar el perfil de {self.name}: {e}")
+        return False
+
+    def _add_profile(self, profiler):
+        with self._lock:
+            self._profiles.append(profiler)
+
+    def wrap(self, func):
+        """Devuelve func perfilada en el hilo donde se ejecute, como parte de esta fase."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self._closed:
+                return func(*args, **kwargs)
+            profiler = _start_profiler()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    self._add_profile(profiler)
+        return wrapper
+
+    def _allocations(self):
+        """Mayores diferencias de memoria por línea entre el inicio y el final de la fase."""
+        if self._start_snapshot is None or not tracemalloc.is_tracing():
+            return []
+        # Sin el coste propio del perfilado ni el de importar módulos
+        ignored = (tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, cProfile.__file__),
+                   tracemalloc.Filter(False, __file__),
+                   tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                   tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"))
+        end_snapshot = tracemalloc.take_snapshot().filter_traces(ignored)
+        differences = end_snapshot.compare_to(self._start_snapshot.filter_traces(ignored), 'lineno')
+        return differences[:TOP_ALLOCATIONS]
+
+    def _write(self, elapsed, profiles):
+        peak = tracemalloc.get_traced_memory()[1] - self._start_memory if tracemalloc.is_tracing() else None
+        allocations = self._allocations()
+        sequence = next(_sequence)
+        base = os.path.join(_output_dir, f"{sequence:03d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', self.name)}")
+        os.makedirs(_output_dir, exist_ok=True)
+
+        stats_text = "(sin datos de cProfile)\n"
+        if profiles:
+            stream = io.StringIO()
+            stats = pstats.Stats(profiles[0], stream=stream)
+            for profiler in profiles[1:]:
+                stats.add(profiler)
+            stats.dump_stats(base + '.prof')
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+            stats_text = stream.getvalue()
+
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Fase: {self.name}\n")
+            for key, value in self.info.items():
+                f.write(f"{key}: {value}\n")
+            f.write(f"Duración: {elapsed:.3f} s\n")
+            if peak is not None:
+                f.write(f"Memoria pico durante la fase: {peak / 1048576:.1f} MB\n")
+            f.write(f"Hilos perfilados: {len(profiles)}\n\n")
+            f.write("== Funciones por tiempo acumulado (cProfile) ==\n")
+            f.write(stats_text)
+            f.write("\n== Mayores asignaciones respecto al inicio de la fase (tracemalloc) ==\n")
+            for difference in allocations:
+                f.write(f"{difference}\n")
+
+        entry = {
+            'sequence': sequence,
+            'phase': self.name,
+            'info': self.info,
+            'started_at': self.started_at,
+            'seconds': round(elapsed, 6),
+            'peak_bytes': peak,
+            'allocated_bytes': sum(difference.size_diff for difference in allocations),
+            'threads': len(profiles),
+            'profile': os.path.basename(base + '.prof') if profiles else None,
+            'report': os.path.basename(base + '.txt'),
+        }
+        with _index_lock:
+            with open(os.path.join(_output_dir, INDEX_FILE), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+
+def phase(name, **info):
+    """
+    Perfila un bloque de código como una fase:
+
+        with profiling.phase("waveform", path=path):
+            ...
+
+    Returns:
+        Un gestor de contexto (sin coste apreciable si el perfilado está desactivado)
+    """
+    if not _enabled:
+        return _NULL_PHASE
+    return _Phase(name, info)
+
+
+def profiled(name=None):
+    """Decorador que perfila cada llamada a una función como una fase."""
+    def decorator(func):
+        phase_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Phase(phase_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _configure_from_environment():
+    value = os.environ.get(PROFILE_ENV, '').strip()
+    if not value or value.lower() in ('0', 'false', 'no'):
+        return
+    enable(None if value.lower() in ('1', 'true', 'yes', 'si', 'sí') else value)
+
+
+_configure_from_environment()
@@ -0,0 +1,228 @@
+'''
+Módulo de remuestreo para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene un remuestreador polifásico vectorizado con NumPy.
+Los núcleos de filtro (sinc con ventana de Kaiser) se calculan una sola vez
+por par de frecuencias y calidad, y el audio se procesa en bloques con estado,
+de modo que el mismo remuestreador sirve al conversor interno (archivos
+completos por bloques) y a los trabajadores de análisis (fragmentos cortos).
+'''
+
+import functools
+import math
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Parámetros de cada calidad: cruces por cero del sinc a cada lado,
+# frecuencia de corte relativa a Nyquist y beta de la ventana de Kaiser
+_QUALITIES = {
+    'fast': (8, 0.85, 6.0),
+    'high': (32, 0.96, 9.0),
+}
+
+PolyphaseKernel = namedtuple('PolyphaseKernel', [
+    'up',          # Factor de interpolación (frecuencia destino / mcd)
+    'down',        # Factor de diezmado (frecuencia origen / mcd)
+    'half_width',  # Muestras de entrada usadas a cada lado de la posición de salida
+    'taps',        # Matriz (up, 2 * half_width) de coeficientes por fase
+])
+
+
+@functools.lru_cache(maxsize=32)
+def polyphase_kernel(src_rate, dst_rate, quality='high'):
+    """
+    Calcula (y memoriza) el banco de filtros polifásico para un par de frecuencias.
+
+    Args:
+        src_rate: Frecuencia de muestreo de origen en Hz
+        dst_rate: Frecuencia de muestreo de destino en Hz
+        quality: 'high' (conversión) o 'fast' (análisis)
+
+    Returns:
+        Un PolyphaseKernel de solo lectura
+    """
+    zero_crossings, rolloff, beta = _QUALITIES[quality]
+    divisor = math.gcd(src_rate, dst_rate)
+    up = dst_rate // divisor
+    down = src_rate // divisor
+
+    # Al reducir la frecuencia el corte se desplaza al Nyquist de destino
+    cutoff = min(1.0, up / down) * rolloff
+    half_width = int(math.ceil(zero_crossings / cutoff))
+
+    # Distancia (en muestras de entrada) entre la posición de salida y cada muestra usada
+    offsets = np.arange(-half_width + 1, half_width + 1)
+    phases = np.arange(up) / up
+    distance = phases[:, None] - offsets[None, :]
+
+    window = np.kaiser(2 * half_width + 1, beta)
+    # Evaluar la ventana de Kaiser de forma continua por interpolación lineal
+    window_positions = np.clip(distance + half_width, 0, 2 * half_width)
+    window_values = np.interp(window_positions, np.arange(2 * half_width + 1), window)
+
+    taps = cutoff * np.sinc(cutoff * distance) * window_values
+    # Normalizar cada fase para ganancia unitaria en continua
+    taps /= taps.sum(axis=1, keepdims=True)
+    taps = taps.astype(np.float32)
+    taps.setflags(write=False)
+
+    return PolyphaseKernel(up, down, half_width, taps)
+
+
+class StreamingResampler:
+    """Remuestreador por bloques con estado entre llamadas."""
+
+    def __init__(self, src_rate, dst_rate, channels=1, quality='high'):
+        """
+        Inicializa el remuestreador.
+
+        Args:
+            src_rate: Frecuencia de muestreo de origen en Hz
+            dst_rate: Frecuencia de muestreo de destino en Hz
+            channels: Número de canales
+            quality: 'high' o 'fast'
+        """
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.channels = channels
+        self.kernel = polyphase_kernel(src_rate, dst_rate, quality)
+
+        half_width = self.kernel.half_width
+        # Búfer (canales, muestras) con historia inicial de ceros: la muestra
+        # absoluta 0 está en la posición half_width - 1
+        self._buffer = np.zeros((channels, half_width - 1), dtype=np.float32)
+        self._buffer_start = -(half_width - 1)  # Índice absoluto de la primera muestra del búfer
+        self._input_frames = 0                  # Muestras de entrada recibidas
+        self._output_frames = 0                 # Muestras de salida producidas
+
+    @property
+    def passthrough(self):
+        """True si las frecuencias coinciden y no hay nada que remuestrear."""
+        return self.src_rate == self.dst_rate
+
+    def process(self, block):
+        """
+        Remuestrea un bloque de entrada.
+
+        Args:
+            block: Array (muestras,) o (muestras, canales) de tipo flotante
+
+        Returns:
+            Las muestras de salida disponibles con la misma forma de entrada
+        """
+        block = np.asarray(block, dtype=np.float32)
+        one_dimensional = block.ndim == 1
+        if one_dimensional:
+            block = block[:, None]
+
+        self._input_frames += len(block)
+        if self.passthrough:
+            self._output_frames += len(block)
+            return block[:, 0] if one_dimensional else block
+
+        self._buffer = np.concatenate([self._buffer, block.T], axis=1)
+
+        # La salida n necesita la entrada hasta floor(n * down / up) + half_width
+        last_usable = self._input_frames - 1 - self.kernel.half_width
+        end = ((last_usable + 1) * self.kernel.up + self.kernel.down - 1) // self.kernel.down
+        output = self._produce(max(end, self._output_frames))
+        return output[:, 0] if one_dimensional else output
+
+    def flush(self):
+        """
+        Produce las muestras finales pendientes (rellenando con ceros).
+
+        Returns:
+            Array (muestras, canales) con la cola de la señal
+        """
+        if self.passthrough:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        padding = np.zeros((self.channels, self.kernel.half_width + 1), dtype=np.float32)
+        self._buffer = np.concatenate([self._buffer, padding], axis=1)
+        total = -(-self._input_frames * self.kernel.up // self.kernel.down)
+        return self._produce(total)
+
+    def _produce(self, end):
+        """Calcula las salidas desde la última producida hasta end (exclusivo)."""
+        kernel = self.kernel
+        start = self._output_frames
+        count = max(0, end - start)
+        output = np.empty((self.channels, count), dtype=np.float32)
+
+        if count:
+            # Ventanas deslizantes sobre el búfer (canales, posiciones, coeficientes) sin copiar
+            windows = sliding_window_view(self._buffer, kernel.taps.shape[1], axis=1)
+            # La salida n = m * up + r usa la fase (r * down) % up y empieza en
+            # m * down + (r * down) // up: cada r es una lectura con paso fijo
+            for first in range(start, start + min(kernel.up, count)):
+                outputs = (end - 1 - first) // kernel.up + 1
+                base = (first * kernel.down) // kernel.up
+                offset = base - kernel.half_width + 1 - self._buffer_start
+                selected = windows[:, offset:offset + (outputs - 1) * kernel.down + 1:kernel.down]
+                phase = (first * kernel.down) % kernel.up
+                output[:, first - start::kernel.up] = selected @ kernel.taps[phase]
+            self._output_frames = end
+
+        # Descartar la entrada que ya no necesita ninguna salida futura
+        next_base = (self._output_frames * kernel.down) // kernel.up
+        keep_from = next_base - kernel.half_width + 1 - self._buffer_start
+        if keep_from > 0:
+            self._buffer = self._buffer[:, keep_from:]
+            self._buffer_start += keep_from
+
+        return np.ascontiguousarray(output.T)
+
+
+def resample(data, src_rate, dst_rate, quality='high'):
+    """
+    Remuestrea una señal completa.
+
+    Args:
+        data: Array (muestras,) o (muestras, canales)
+        src_rate: Frecuencia de muestreo de origen en Hz
+        dst_rate: Frecuencia de muestreo de destino en Hz
+        quality: 'high' o 'fast'
+
+    Returns:
+        La señal remuestreada con la misma forma (salvo la longitud)
+    """
+    data = np.asarray(data, dtype=np.float32)
+    if src_rate == dst_rate:
+        return data
+    one_dimensional = data.ndim == 1
+    channels = 1 if one_dimensional else data.shape[1]
+    resampler = StreamingResampler(src_rate, dst_rate, channels, quality)
+    output = np.concatenate([
+        resampler.process(data if not one_dimensional else data[:, None]),
+        resampler.flush(),
+    ])
+    return output[:, 0] if one_dimensional else output
+
+
+def load_mono(path, target_rate, duration=None, quality='fast', block_frames=65536):
+    """
+    Lee un archivo de audio por bloques, lo mezcla a mono y lo remuestrea.
+    Sustituye a librosa.load en los trabajadores de análisis: el fragmento
+    nunca se carga completo a la frecuencia original.
+
+    Args:
+        path: Ruta al archivo de audio
+        target_rate: Frecuencia de muestreo de destino en Hz
+        duration: Segundos a leer desde el principio (None = todo el archivo)
+        quality: 'high' o 'fast'
+        block_frames: Muestras por canal en cada bloque
+
+    Returns:
+        Tupla (señal mono float32, target_rate)
+    """
+    import soundfile as sf
+
+    with sf.SoundFile(path) as source:
+        frames = -1 if duration is None else int(duration * source.samplerate)
+        resampler = StreamingResampler(source.samplerate, target_rate, 1, quality)
+        pieces = []
+        for block in source.blocks(blocksize=block_frames, frames=frames, dtype='float32', always_2d=True):
+            pieces.append(resampler.process(block.mean(axis=1)))
+        pieces.append(resampler.flush()[:, 0])
+    return np.concatenate(pieces), target_rate
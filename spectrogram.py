@@ -4,9 +4,57 @@ import librosa.display
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from PyQt5.QtCore import pyqtSignal, QObject, QThread, pyqtSlot
-import soundfile as sf
 import os
 
+import profiling
+from audio_metadata import read_audio_metadata
+from resampling import load_mono
+
+# Frecuencia y duración del fragmento analizado
+SPECTROGRAM_SAMPLE_RATE = 22050
+SPECTROGRAM_SECONDS = 30
+
+
+def load_spectrogram_audio(file_path):
+    """
+    Carga los primeros SPECTROGRAM_SECONDS segundos por bloques, remuestreados
+    con los núcleos polifásicos compartidos (calidad de análisis).
+    
+    Returns:
+        Tupla (señal mono float32, frecuencia de muestreo)
+    """
+    return load_mono(file_path, SPECTROGRAM_SAMPLE_RATE, duration=SPECTROGRAM_SECONDS, quality='fast')
+
+
+def compute_spectrogram(y, n_fft=2048, hop_length=1024):
+    """Espectrograma en dB respecto al máximo (resolución reducida para acelerar el cálculo)."""
+    return librosa.amplitude_to_db(np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length)), ref=np.max)
+
+
+def render_spectrogram(D, sr, hop_length, title):
+    """
+    Dibuja el espectrograma en una figura nueva.
+    
+    Returns:
+        FigureCanvasQTAgg con la figura
+    """
+    # Crear la figura con un tamaño más pequeño para acelerar el rendering
+    fig, ax = plt.subplots(figsize=(8, 3), dpi=80)
+    
+    # Mostrar el espectrograma con menos detalles para mayor velocidad
+    img = librosa.display.specshow(D, y_axis='log', x_axis='time', sr=sr, 
+                                 hop_length=hop_length, ax=ax)
+    
+    # Barra de color simplificada
+    fig.colorbar(img, ax=ax, format='%+2.0f dB')
+    
+    # Título simplificado
+    ax.set_title(title)
+    
+    # Crear el canvas para Qt
+    return FigureCanvasQTAgg(fig)
+
+
 class SpectrogramWorker(QThread):
     """Clase trabajadora para generar espectrogramas en un hilo separado."""
     
@@ -19,32 +67,12 @@ class SpectrogramWorker(QThread):
         self.n_fft = n_fft
         self.hop_length = hop_length
         
+    @profiling.profiled("spectrogram")
     def run(self):
         try:
-            # Cargar el archivo de audio de manera eficiente usando una muestra reducida
-            # Reducir la tasa de muestreo para acelerar el procesamiento
-            y, sr = librosa.load(self.file_path, sr=22050, duration=30, res_type='kaiser_fast')
-            
-            # Crear la figura con un tamaño más pequeño para acelerar el rendering
-            fig, ax = plt.subplots(figsize=(8, 3), dpi=80)
-            
-            # Usar un spectrograma de menor resolución para acelerar el cálculo
-            D = librosa.amplitude_to_db(np.abs(librosa.stft(y, n_fft=self.n_fft, 
-                                                          hop_length=self.hop_length)), 
-                                      ref=np.max)
-            
-            # Mostrar el espectrograma con menos detalles para mayor velocidad
-            img = librosa.display.specshow(D, y_axis='log', x_axis='time', sr=sr, 
-                                         hop_length=self.hop_length, ax=ax)
-            
-            # Barra de color simplificada
-            fig.colorbar(img, ax=ax, format='%+2.0f dB')
-            
-            # Título simplificado
-            ax.set_title(os.path.basename(self.file_path))
-            
-            # Crear el canvas para Qt
-            canvas = FigureCanvasQTAgg(fig)
+            y, sr = load_spectrogram_audio(self.file_path)
+            D = compute_spectrogram(y, self.n_fft, self.hop_length)
+            canvas = render_spectrogram(D, sr, self.hop_length, os.path.basename(self.file_path))
             
             # Emitir el canvas
             self.finished.emit(canvas)
@@ -96,26 +124,8 @@ class SpectrogramGenerator(QObject):
             Un diccionario con información del audio
         """
         try:
-            # Cargar metadatos sin cargar todo el audio
-            info = sf.info(file_path)
-            
-            # Calcular duración en formato legible
-            duration_seconds = info.duration
-            minutes = int(duration_seconds // 60)
-            seconds = int(duration_seconds % 60)
-            
-            # Recopilar información
-            audio_info = {
-                "samplerate": info.samplerate,
-                "channels": info.channels,
-                "format": info.format,
-                "subtype": info.subtype,
-                "duration": f"{minutes}:{seconds:02d}",
-                "duration_seconds": duration_seconds,
-                "bit_depth": getattr(info, "bits_per_sample", "N/A")
-            }
-            
-            return audio_info
+            # Cargar metadatos sin cargar todo el audio (solo cabeceras, con caché)
+            return read_audio_metadata(file_path).to_info_dict()
             
         except Exception as e:
             return {"error": str(e)}
@@ -155,11 +165,15 @@ class SpectrogramCanvas(FigureCanvasQTAgg):
     def _update_from_canvas(self, canvas):
         """Actualiza este canvas con la figura de otro canvas."""
         if canvas:
-            # Transferir la figura del canvas generado a este canvas
-            self.fig.clf()
-            for ax in canvas.figure.get_axes():
-                self.fig.add_axes(ax)
-            self.fig.canvas.draw_idle()
+            # Adoptar la figura del canvas generado (matplotlib no permite mover
+            # ejes de una figura a otra) y liberar la anterior
+            old_figure = self.fig
+            self.fig = canvas.figure
+            self.ax = self.fig.axes[0]
+            self.fig.set_canvas(self)
+            self.figure = self.fig
+            plt.close(old_figure)
+            self.draw_idle()
     
     @pyqtSlot(str)
     def _handle_error(self, error_message):
@@ -0,0 +1,242 @@
+'''
+Módulo de conversión con análisis simultáneo para la aplicación Convertidor FLAC a WAV.
+En lugar de volver a leer del disco cada WAV recién convertido para dibujar su
+forma de onda, detectar el BPM o medir la sonoridad, ffmpeg escribe PCM crudo
+en una tubería que se reparte en el propio proceso: una rama va al escritor
+WAV y otra alimenta a los analizadores. Conversión y análisis comparten así
+una única decodificación y no hay lecturas extra del disco.
+'''
+
+import os
+import subprocess
+import threading
+from collections import namedtuple
+
+import numpy as np
+import soundfile as sf
+
+# Hacer librosa opcional (detección de BPM)
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+from loudness import SCIPY_AVAILABLE, LoudnessMeter
+from output_profiles import build_ffmpeg_command
+from peaks import DEFAULT_PEAK_POINTS, PeakAnalyzer
+from resampling import StreamingResampler
+
+# Frecuencia y duración del análisis de tempo (las mismas que la detección desde archivo)
+BPM_SAMPLE_RATE = 22050
+BPM_SECONDS = 60
+# Muestras por canal leídas de la tubería en cada bloque
+BLOCK_FRAMES = 65536
+
+# Formato crudo de la tubería según la profundidad del WAV de salida: (códec, formato, dtype, subtipo)
+_RAW_FORMATS = {
+    16: ('pcm_s16le', 's16le', np.int16, 'PCM_16'),
+    24: ('pcm_s32le', 's32le', np.int32, 'PCM_24'),  # 24 bits alineados a la izquierda en 32
+}
+# Perfiles que la rama de escritura sabe generar a partir del PCM crudo
+_TEE_CONTAINERS = {'wav': 'WAV', 'aiff': 'AIFF'}
+_TEE_CODECS = {'pcm_s16le': 'LITTLE', 'pcm_s24le': 'LITTLE', 'pcm_s16be': 'BIG', 'pcm_s24be': 'BIG'}
+
+AnalysisResult = namedtuple('AnalysisResult', [
+    'sample_rate',  # Frecuencia del audio analizado
+    'channels',     # Canales del audio analizado
+    'frames',       # Muestras por canal analizadas
+    'peaks',        # Envolvente de picos (float32, máximo absoluto de todos los canales por tramo)
+    'channel_peaks',  # Picos de cada canal por tramo (float32, tramos x canales)
+    'peak_rate',    # Puntos de la envolvente por segundo
+    'loudness',     # LoudnessMeasurement (None sin scipy)
+    'bpm',          # Tempo estimado (None sin librosa o si no se pudo estimar)
+])
+
+
+def estimate_tempo(mono, sample_rate):
+    """
+    Estima el tempo de una señal mono con librosa.
+
+    Returns:
+        BPM o None si librosa no está disponible o falla
+    """
+    if not LIBROSA_AVAILABLE or not len(mono):
+        return None
+    try:
+        onset_env = librosa.onset.onset_strength(y=mono, sr=sample_rate)
+        tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sample_rate)
+        return float(np.atleast_1d(tempo)[0])
+    except Exception as e:
+        print(f"Error al detectar BPM con librosa: {e}")
+        return None
+
+
+class StreamAnalyzer:
+    """Analizadores de picos, sonoridad y tempo alimentados bloque a bloque."""
+
+    def __init__(self, sample_rate, channels, expected_frames=None, peak_points=DEFAULT_PEAK_POINTS,
+                 detect_bpm=True):
+        """
+        Args:
+            sample_rate: Frecuencia de muestreo del flujo
+            channels: Número de canales
+            expected_frames: Duración prevista en muestras (fija el tamaño de los tramos de picos)
+            peak_points: Puntos aproximados de la envolvente de picos
+            detect_bpm: Estimar el tempo con los primeros BPM_SECONDS segundos
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = 0
+        self.bucket_frames = max(1, (expected_frames or sample_rate * 600) // peak_points)
+        self._peaks = PeakAnalyzer(channels, self.bucket_frames)
+        self._meter = LoudnessMeter(sample_rate, channels) if SCIPY_AVAILABLE else None
+        self._bpm_resampler = None
+        self._bpm_chunks = []
+        self._bpm_frames = 0
+        if detect_bpm and LIBROSA_AVAILABLE:
+            self._bpm_resampler = StreamingResampler(sample_rate, BPM_SAMPLE_RATE, 1, quality='fast')
+
+    def process(self, samples):
+        """
+        Añade un bloque al análisis.
+
+        Args:
+            samples: Array float32 (muestras, canales) en [-1, 1]
+        """
+        if not len(samples):
+            return
+        self.frames += len(samples)
+        self._peaks.process(samples)
+        if self._meter is not None:
+            self._meter.process(samples)
+        if self._bpm_resampler is not None and self._bpm_frames < BPM_SAMPLE_RATE * BPM_SECONDS:
+            mono = self._bpm_resampler.process(samples.mean(axis=1, keepdims=True, dtype=np.float32))
+            self._bpm_chunks.append(mono[:, 0])
+            self._bpm_frames += len(mono)
+
+    def result(self):
+        """Termina el análisis y devuelve un AnalysisResult."""
+        channel_peaks = self._peaks.channel_peaks()
+        bpm = None
+        if self._bpm_chunks:
+            mono = np.concatenate(self._bpm_chunks)[:BPM_SAMPLE_RATE * BPM_SECONDS]
+            bpm = estimate_tempo(mono, BPM_SAMPLE_RATE)
+        return AnalysisResult(
+            self.sample_rate, self.channels, self.frames,
+            channel_peaks.max(axis=1, initial=0.0), channel_peaks, self.sample_rate / self.bucket_frames,
+            self._meter.result() if self._meter is not None else None, bpm,
+        )
+
+
+def can_tee(profile):
+    """Indica si la rama de escritura puede generar la salida de un perfil a partir del PCM crudo."""
+    return (profile.container in _TEE_CONTAINERS and profile.codec in _TEE_CODECS
+            and profile.bits_per_sample in _RAW_FORMATS)
+
+
+def stream_convert(ffmpeg_path, input_file, metadata, outputs, tee_output=None, threads=None, gain_db=None,
+                   block_frames=BLOCK_FRAMES, register_process=None):
+    """
+    Convierte un archivo con ffmpeg y lo analiza con una sola decodificación.
+    ffmpeg genera directamente las salidas de outputs y además escribe PCM
+    crudo en stdout; ese flujo se escribe como tee_output (si se indica) y se
+    entrega a la vez a un StreamAnalyzer.
+
+    Args:
+        ffmpeg_path: Ruta al binario de ffmpeg
+        input_file: Archivo de entrada
+        metadata: AudioMetadata de la entrada (frecuencia, canales y duración previstos)
+        outputs: Pares (OutputProfile, ruta) que ffmpeg escribe por sí mismo
+        tee_output: Par (OutputProfile, ruta) que cumple can_tee, escrito desde la tubería (opcional)
+        threads: Hilos por codificador (opcional)
+        gain_db: Ganancia en dB aplicada a todas las salidas (opcional)
+        block_frames: Muestras por canal leídas en cada bloque
+        register_process: Función opcional que recibe el Popen (para poder cancelarlo)
+
+    Returns:
+        Un AnalysisResult
+
+    Raises:
+        RuntimeError: si ffmpeg falla (las salidas a medias se borran)
+    """
+    profile = tee_output[0] if tee_output else None
+    sample_rate = (profile and profile.sample_rate) or metadata.sample_rate
+    channels = (profile and profile.channels) or metadata.channels
+    if profile is not None:
+        codec, raw_format, dtype, subtype = _RAW_FORMATS[profile.bits_per_sample]
+    else:
+        # Sin rama de escritura basta con float para los analizadores
+        codec, raw_format, dtype, subtype = 'pcm_f32le', 'f32le', np.float32, None
+
+    cmd = build_ffmpeg_command(ffmpeg_path, input_file, outputs, threads=threads, gain_db=gain_db)
+    cmd += ['-map', '0:a:0', '-ar', str(sample_rate), '-ac', str(channels)]
+    if gain_db:
+        cmd += ['-af', f'volume={gain_db:.2f}dB']
+    cmd += ['-c:a', codec, '-f', raw_format, 'pipe:1']
+
+    expected = int(round(metadata.duration * sample_rate)) if metadata.duration else None
+    analyzer = StreamAnalyzer(sample_rate, channels, expected)
+    scale = None if dtype is np.float32 else np.float32(1.0 / (np.iinfo(dtype).max + 1))
+    frame_bytes = np.dtype(dtype).itemsize * channels
+    temp_path = tee_output[1] + '.part' if tee_output else None
+    writer = None
+    stderr_lines = []
+
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if register_process is not None:
+        register_process(process)
+    # stderr en un hilo aparte para que una tubería llena no bloquee a ffmpeg
+    stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr.read().decode(
+        'utf-8', 'replace').splitlines()), daemon=True)
+    stderr_reader.start()
+    try:
+        if tee_output:
+            writer = sf.SoundFile(temp_path, 'w', samplerate=sample_rate, channels=channels, subtype=subtype,
+                                  endian=_TEE_CODECS[profile.codec], format=_TEE_CONTAINERS[profile.container])
+        # Un único búfer reutilizado: cada bloque se procesa cuando está lleno
+        buffer = bytearray(block_frames * frame_bytes)
+        view = memoryview(buffer)
+        pending = 0
+        while True:
+            count = process.stdout.readinto(view[pending:])
+            if not count:
+                break
+            pending += count
+            if pending == len(buffer):
+                _tee_block(buffer, pending, dtype, channels, writer, analyzer, scale)
+                pending = 0
+        _tee_block(buffer, pending - pending % frame_bytes, dtype, channels, writer, analyzer, scale)
+        returncode = process.wait()
+        stderr_reader.join()
+        if returncode != 0:
+            raise RuntimeError("\n".join(stderr_lines) or f"ffmpeg terminó con código {returncode}")
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(temp_path, tee_output[1])
+        return analyzer.result()
+    except BaseException:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        for _, output_path in outputs:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        raise
+    finally:
+        process.stdout.close()
+        if writer is not None:
+            writer.close()
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _tee_block(buffer, size, dtype, channels, writer, analyzer, scale):
+    """Reparte un bloque de PCM crudo entre el escritor y los analizadores."""
+    if not size:
+        return
+    block = np.frombuffer(buffer, dtype=dtype, count=size // np.dtype(dtype).itemsize).reshape(-1, channels)
+    if writer is not None:
+        writer.write(block)
+    analyzer.process(block if scale is None else block.astype(np.float32) * scale)
@@ -0,0 +1,247 @@
+"""
+Pruebas de integración del conversor de audio.
+Requieren ffmpeg instalado; se omiten si no está disponible.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from audio_converter import AudioConverter
+from job_queue import JobQueue
+from loudness import LoudnessCache, measure_loudness
+from output_profiles import DEFAULT_PROFILE_NAME, get_profile
+
+FFMPEG_AVAILABLE = shutil.which('ffmpeg') is not None
+
+
+class TestAudioConverter(unittest.TestCase):
+    """Pruebas de conversión por lotes."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.converter = AudioConverter()
+        self.converter.job_queue = JobQueue(os.path.join(self.temp_dir, "jobs.sqlite3"))
+        self.done = threading.Event()
+        self.completed = []
+        self.errors = []
+        # Conexiones directas: el hilo de la prueba espera sin bucle de eventos
+        self.converter.conversion_completed.connect(lambda src, dst: self.completed.append(dst), Qt.DirectConnection)
+        self.converter.conversion_error.connect(lambda src, msg: self.errors.append(msg), Qt.DirectConnection)
+        self.converter.batch_completed.connect(self.done.set, Qt.DirectConnection)
+
+    def tearDown(self):
+        self.converter.job_queue.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _write_flac(self, name, sample_rate=48000, subtype='PCM_24', seconds=1):
+        path = os.path.join(self.temp_dir, name)
+        data = (np.random.default_rng(0).standard_normal((sample_rate * seconds, 2)) * 0.1).astype('float32')
+        sf.write(path, data, sample_rate, subtype=subtype)
+        return path
+
+    def _run_batch(self, files, **kwargs):
+        self.converter.convert_batch(files, self.temp_dir, **kwargs)
+        self.assertTrue(self.done.wait(60), "El lote no terminó a tiempo")
+
+    @unittest.skipUnless(FFMPEG_AVAILABLE, "ffmpeg no está instalado")
+    def test_fanout_produces_every_profile(self):
+        """Verificar que un lote con dos perfiles genera ambas salidas por archivo."""
+        source = self._write_flac("tema.flac")
+        self._run_batch([source], profiles=[get_profile(DEFAULT_PROFILE_NAME), get_profile('wav_24_48')])
+
+        self.assertEqual(self.errors, [])
+        self.assertEqual(sorted(os.path.basename(p) for p in self.completed),
+                         ["tema.wav", "tema_wav_24_48.wav"])
+        self.assertEqual(sf.info(os.path.join(self.temp_dir, "tema.wav")).samplerate, 44100)
+        self.assertEqual(sf.info(os.path.join(self.temp_dir, "tema_wav_24_48.wav")).subtype, 'PCM_24')
+        summary = self.converter.metrics.summary()
+        self.assertEqual((summary['files_converted'], summary['files_failed'], summary['queue_depth']), (1, 0, 0))
+        self.assertEqual(self.converter.metrics.ffmpeg_seconds.count, 1)
+
+    def test_batch_completes_when_output_dir_cannot_be_created(self):
+        """Verificar que un fallo del lote se notifica por archivo y el lote termina."""
+        source = self._write_flac("tema.flac")
+        # Un directorio dentro de un archivo normal no se puede crear en ningún sistema
+        self.converter.convert_batch([source], os.path.join(source, "salida"))
+        self.assertTrue(self.done.wait(60), "El lote no terminó a tiempo")
+
+        self.assertEqual(self.completed, [])
+        self.assertEqual(len(self.errors), 1)
+        self.assertIn("Error en el lote", self.errors[0])
+
+    def test_passthrough_skips_ffmpeg_for_cd_format_sources(self):
+        """Verificar que un FLAC 16-bit/44.1 kHz estéreo se convierte sin lanzar ffmpeg."""
+        source = self._write_flac("cd.flac", sample_rate=44100, subtype='PCM_16')
+        # Un ffmpeg inexistente demuestra que el camino rápido no lo necesita
+        self.converter._ffmpeg_path = os.path.join(self.temp_dir, "sin-ffmpeg")
+        self._run_batch([source])
+
+        self.assertEqual(self.errors, [])
+        output = os.path.join(self.temp_dir, "cd.wav")
+        self.assertEqual(self.completed, [output])
+        original, _ = sf.read(source, dtype='int16')
+        converted, sample_rate = sf.read(output, dtype='int16')
+        self.assertEqual(sample_rate, 44100)
+        np.testing.assert_array_equal(original, converted)
+        self.assertFalse(os.path.exists(output + '.part'))
+
+    def test_rate_only_change_uses_ffmpeg_by_default(self):
+        """Verificar que el remuestreo en proceso solo se usa si se activa."""
+        source = self._write_flac("dat.flac", sample_rate=48000, subtype='PCM_16')
+        outputs = [(self.converter.default_profile, os.path.join(self.temp_dir, "dat.wav"))]
+
+        self.assertFalse(self.converter._can_passthrough(source, outputs))
+        self.converter.resample_in_process = True
+        self.assertTrue(self.converter._can_passthrough(source, outputs))
+
+    def test_rate_only_change_is_resampled_in_process(self):
+        """Verificar que un FLAC 16-bit/48 kHz se remuestrea a 44.1 kHz sin lanzar ffmpeg."""
+        source = self._write_flac("dat.flac", sample_rate=48000, subtype='PCM_16')
+        self.converter.resample_in_process = True
+        self.converter._ffmpeg_path = os.path.join(self.temp_dir, "sin-ffmpeg")
+        self._run_batch([source])
+
+        self.assertEqual(self.errors, [])
+        info = sf.info(os.path.join(self.temp_dir, "dat.wav"))
+        self.assertEqual((info.samplerate, info.subtype, info.frames), (44100, 'PCM_16', 44100))
+
+    def test_normalize_applies_measured_gain(self):
+        """Verificar que la normalización lleva un seno de -23 LUFS al objetivo del conversor."""
+        t = np.arange(44100 * 5) / 44100
+        tone = 10 ** (-23 / 20) * np.sin(2 * np.pi * 1000 * t)
+        source = os.path.join(self.temp_dir, "suave.flac")
+        sf.write(source, np.stack([tone, tone], axis=1), 44100, subtype='PCM_16')
+        self.converter.loudness_cache = LoudnessCache(os.path.join(self.temp_dir, "sonoridad.json"))
+        self._run_batch([source], normalize=True)
+
+        self.assertEqual(self.errors, [])
+        result = measure_loudness(os.path.join(self.temp_dir, "suave.wav"))
+        self.assertAlmostEqual(result.integrated_lufs, self.converter.loudness_target, delta=0.1)
+        self.assertTrue(os.path.exists(self.converter.loudness_cache.path))
+
+    def test_normalize_regenerates_existing_outputs(self):
+        """Verificar que un lote normalizado no da por buena una salida anterior sin la ganancia."""
+        t = np.arange(44100 * 5) / 44100
+        tone = 10 ** (-23 / 20) * np.sin(2 * np.pi * 1000 * t)
+        source = os.path.join(self.temp_dir, "suave.flac")
+        sf.write(source, np.stack([tone, tone], axis=1), 44100, subtype='PCM_16')
+        output = os.path.join(self.temp_dir, "suave.wav")
+        # Salida de una conversión anterior sin normalizar
+        sf.write(output, np.stack([tone, tone], axis=1), 44100, subtype='PCM_16')
+        self.converter.loudness_cache = LoudnessCache(os.path.join(self.temp_dir, "sonoridad.json"))
+        self._run_batch([source], normalize=True)
+
+        self.assertEqual(self.errors, [])
+        self.assertEqual(self.completed, [output])
+        result = measure_loudness(output)
+        self.assertAlmostEqual(result.integrated_lufs, self.converter.loudness_target, delta=0.1)
+
+    def test_normalize_fails_file_when_loudness_cannot_be_measured(self):
+        """Verificar que sin medida de sonoridad el archivo falla en lugar de convertirse sin ganancia."""
+        source = self._write_flac("tema.flac", sample_rate=44100, subtype='PCM_16')
+        self.converter.loudness_cache = LoudnessCache(os.path.join(self.temp_dir, "sonoridad.json"))
+
+        def fail(path):
+            raise RuntimeError("El análisis de sonoridad requiere scipy")
+        self.converter.loudness_cache.measure = fail
+        self._run_batch([source], normalize=True)
+
+        self.assertEqual(self.completed, [])
+        self.assertEqual(len(self.errors), 1)
+        self.assertIn("sonoridad", self.errors[0])
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "tema.wav")))
+
+    def test_deduplicate_converts_each_audio_once(self):
+        """Verificar que dos copias del mismo FLAC se convierten una vez y la otra se materializa."""
+        original = self._write_flac("tema.flac", sample_rate=44100, subtype='PCM_16')
+        copy_dir = os.path.join(self.temp_dir, "copia")
+        os.makedirs(copy_dir)
+        copy = shutil.copy(original, os.path.join(copy_dir, "tema (1).flac"))
+        output_dir = os.path.join(self.temp_dir, "salida")
+        started = []
+        reports = []
+        self.converter.conversion_started.connect(started.append, Qt.DirectConnection)
+        self.converter.deduplication_report.connect(reports.append, Qt.DirectConnection)
+
+        self.converter.convert_batch([original, copy], output_dir, deduplicate=True)
+        self.assertTrue(self.done.wait(60), "El lote no terminó a tiempo")
+
+        self.assertEqual(self.errors, [])
+        self.assertEqual(started, [original])
+        self.assertEqual(sorted(os.listdir(output_dir)), ["tema (1).wav", "tema.wav"])
+        self.assertEqual(reports[0].duplicates, 1)
+        self.assertEqual(sum(reports[0].methods.values()), 1)
+
+    def test_deduplicate_fails_duplicates_with_their_representative(self):
+        """Verificar que si falla el representante de un grupo, sus duplicados también se notifican."""
+        original = self._write_flac("a.flac")
+        copy = shutil.copy(original, os.path.join(self.temp_dir, "b.flac"))
+        # 24-bit/48 kHz necesita ffmpeg, que no existe en esta ruta
+        self.converter._ffmpeg_path = os.path.join(self.temp_dir, "sin-ffmpeg")
+        failed = []
+        self.converter.conversion_error.connect(lambda src, msg: failed.append(src), Qt.DirectConnection)
+
+        batch_id = self.converter.convert_batch([original, copy], os.path.join(self.temp_dir, "salida"),
+                                                deduplicate=True)
+        self.assertTrue(self.done.wait(60), "El lote no terminó a tiempo")
+
+        self.assertEqual(self.completed, [])
+        self.assertEqual(sorted(failed), [original, copy])
+        self.assertEqual(self.converter.job_queue.counts(batch_id), {'failed': 2})
+
+    @unittest.skipUnless(FFMPEG_AVAILABLE, "ffmpeg no está instalado")
+    def test_verify_accepts_bit_exact_ffmpeg_output(self):
+        """Verificar que una salida de 24 bits sin remuestreo supera la verificación MD5."""
+        source = self._write_flac("master.flac", sample_rate=48000, subtype='PCM_24')
+        self.converter.allow_passthrough = False  # Forzar la conversión con ffmpeg
+        self._run_batch([source], profiles=[get_profile('wav_24_48')], verify=True)
+
+        self.assertEqual(self.errors, [])
+        self.assertEqual([os.path.basename(p) for p in self.completed], ["master.wav"])
+
+    def test_verify_removes_mismatched_output(self):
+        """Verificar que una salida que no coincide con la firma se borra y se notifica."""
+        source = self._write_flac("master.flac", sample_rate=48000, subtype='PCM_24')
+        output = os.path.join(self.temp_dir, "master.wav")
+        sf.write(output, np.zeros((48000, 2), dtype=np.int32), 48000, subtype='PCM_24')
+
+        self.assertFalse(self.converter._verify_outputs(source, [(get_profile('wav_24_48'), output)]))
+        self.assertFalse(os.path.exists(output))
+        self.assertEqual(len(self.errors), 1)
+
+    def test_preflight_sets_damaged_files_aside(self):
+        """Verificar que el triaje aparta los archivos dañados y el lote convierte el resto."""
+        good = self._write_flac("bueno.flac", sample_rate=44100, subtype='PCM_16')
+        truncated = os.path.join(self.temp_dir, "truncado.flac")
+        with open(good, 'rb') as src, open(truncated, 'wb') as dst:
+            dst.write(src.read()[:os.path.getsize(good) // 2])
+        self.converter.triage_report_dir = os.path.join(self.temp_dir, "triaje")
+        reports = []
+        self.converter.triage_completed.connect(lambda report, path: reports.append(path), Qt.DirectConnection)
+
+        self._run_batch([truncated, good], preflight=True)
+
+        self.assertEqual([os.path.basename(p) for p in self.completed], ["bueno.wav"])
+        self.assertEqual(len(self.errors), 1)
+        self.assertIn("truncado", self.errors[0])
+        self.assertTrue(os.path.exists(reports[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
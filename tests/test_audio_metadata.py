@@ -0,0 +1,78 @@
+"""
+Pruebas del lector rápido de metadatos.
+Comparan la información de cabecera con la que devuelve soundfile.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+from mutagen.flac import FLAC
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_metadata import read_audio_metadata, clear_metadata_cache
+
+
+class TestAudioMetadata(unittest.TestCase):
+    """Pruebas del lector de cabeceras FLAC/WAV."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data = (np.random.default_rng(1).standard_normal((22050, 2)) * 0.1).astype('float32')
+        clear_metadata_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_flac_streaminfo_and_tags(self):
+        """Verificar STREAMINFO, firma MD5 y comentarios Vorbis de un FLAC."""
+        path = os.path.join(self.temp_dir, "tema.flac")
+        sf.write(path, self.data, 44100, subtype='PCM_24')
+        audio = FLAC(path)
+        audio['BPM'] = '124'
+        audio.save()
+
+        metadata = read_audio_metadata(path)
+        self.assertEqual(metadata.format, 'FLAC')
+        self.assertEqual(metadata.sample_rate, 44100)
+        self.assertEqual(metadata.channels, 2)
+        self.assertEqual(metadata.bits_per_sample, 24)
+        self.assertEqual(metadata.frames, sf.info(path).frames)
+        self.assertEqual(metadata.get_tag('bpm'), '124')
+        self.assertEqual(len(metadata.md5), 32)
+
+    def test_wav_fmt_and_data_chunk(self):
+        """Verificar el fragmento fmt y la posición del fragmento data de un WAV."""
+        path = os.path.join(self.temp_dir, "tema.wav")
+        sf.write(path, self.data, 48000, subtype='PCM_16')
+
+        metadata = read_audio_metadata(path)
+        self.assertEqual(metadata.format, 'WAV')
+        self.assertEqual(metadata.subtype, 'PCM_16')
+        self.assertEqual(metadata.sample_rate, 48000)
+        self.assertEqual(metadata.frames, len(self.data))
+        self.assertEqual(metadata.data_size, len(self.data) * 2 * 2)
+        with open(path, 'rb') as f:
+            f.seek(metadata.data_offset - 8)
+            self.assertEqual(f.read(4), b'data')
+
+    def test_cache_invalidated_when_file_changes(self):
+        """Verificar que la caché se invalida al cambiar la huella del archivo."""
+        path = os.path.join(self.temp_dir, "tema.wav")
+        sf.write(path, self.data, 44100, subtype='PCM_16')
+        first = read_audio_metadata(path)
+        self.assertIs(read_audio_metadata(path), first)
+
+        sf.write(path, self.data[:1000], 44100, subtype='PCM_16')
+        os.utime(path, ns=(first.fingerprint[2] + 10**9, first.fingerprint[2] + 10**9))
+        self.assertEqual(read_audio_metadata(path).frames, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Pruebas del informe de lotes.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from batch_report import BatchReport
+
+
+class TestBatchReport(unittest.TestCase):
+    """Pruebas de BatchReport."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_summary_and_json_export(self):
+        """Verificar el resumen y la exportación a JSON."""
+        report = BatchReport(["/a.flac", "/b.flac", "/c.flac"], self.temp_dir)
+        report.add_success("/a.flac", "/salida/a.wav")
+        report.add_error("/b.flac", "Error de ffmpeg: datos inválidos")
+        report.finish()
+
+        summary = report.summary()
+        self.assertEqual((summary["converted"], summary["failed"], summary["pending"]), (1, 1, 1))
+        self.assertEqual([entry.file_path for entry in report.errors], ["/b.flac"])
+
+        path = report.export_json(os.path.join(self.temp_dir, "informes", "lote.json"))
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["summary"]["failed"], 1)
+        self.assertEqual(data["entries"][1]["message"], "Error de ffmpeg: datos inválidos")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Pruebas del agregador de eventos de conversión.
+Verifican que los eventos emitidos desde varios hilos se entregan en pocas
+instantáneas sin perder estados finales y que el número de actualizaciones de
+la interfaz no crece con el de archivos. Se cuentan entregas y señales, no
+tiempos, para que no dependan de la velocidad de la máquina.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt5.QtCore import QCoreApplication
+
+from conversion_events import ConversionEventAggregator
+from file_list_model import FileListModel
+
+
+class TestConversionEventAggregator(unittest.TestCase):
+    """Pruebas de ConversionEventAggregator."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.aggregator = ConversionEventAggregator(interval_ms=50)
+        self.snapshots = []
+        self.aggregator.snapshot_ready.connect(self.snapshots.append)
+        # Contar las entregas que se encolan hacia el hilo de la interfaz
+        self.flush_requests = []
+        request_flush = self.aggregator._request_flush
+
+        def counting_request_flush(method_name):
+            self.flush_requests.append(method_name)
+            request_flush(method_name)
+        self.aggregator._request_flush = counting_request_flush
+
+    def _simulate_batch(self, paths, workers=8):
+        """Emite inicio, progreso y fin (o error) de cada archivo desde varios hilos."""
+        def worker(chunk):
+            for path in chunk:
+                self.aggregator.record_started(path)
+                self.aggregator.record_progress(path, 50)
+                if path.endswith("7.flac"):
+                    self.aggregator.record_error(path, "Archivo dañado")
+                else:
+                    self.aggregator.record_completed(path, path.replace(".flac", ".wav"))
+
+        threads = [threading.Thread(target=worker, args=(paths[i::workers],)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.aggregator.record_batch_completed()
+
+    def _process_events_until_done(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            if self.snapshots and self.snapshots[-1].batch_done:
+                return
+            time.sleep(0.005)
+        self.fail("El lote no terminó a tiempo")
+
+    def test_no_final_state_is_dropped(self):
+        """Verificar que todas las finalizaciones y errores llegan a la interfaz."""
+        paths = [f"/musica/tema_{i}.flac" for i in range(2000)]
+        self._simulate_batch(paths)
+        self._process_events_until_done()
+
+        statuses = {}
+        completed = []
+        errors = []
+        for snapshot in self.snapshots:
+            statuses.update(snapshot.statuses)
+            completed.extend(snapshot.completed)
+            errors.extend(snapshot.errors)
+
+        self.assertEqual(len(completed) + len(errors), len(paths))
+        self.assertEqual(len(errors), 200)
+        self.assertTrue(all(statuses[p] == ("error" if p.endswith("7.flac") else "convertido")
+                            for p in paths))
+        # 6000 eventos encolan como mucho una entrega programada y la del fin del lote
+        self.assertLessEqual(len(self.flush_requests), 2)
+        self.assertLessEqual(len(self.snapshots), len(self.flush_requests))
+
+    def test_gui_updates_per_batch_are_bounded(self):
+        """Verificar que las actualizaciones de la interfaz no crecen con el número de archivos."""
+        paths = [f"/musica/tema_{i}.flac" for i in range(20000)]
+        model = FileListModel()
+        model.add_paths(paths)
+
+        applied = []
+        data_changed = []
+        model.dataChanged.connect(lambda first, last, roles: data_changed.append((first.row(), last.row())))
+
+        def apply_snapshot(snapshot):
+            applied.append(len(snapshot.statuses))
+            model.set_statuses(snapshot.statuses)
+            model.flush_changes()
+
+        self.aggregator.snapshot_ready.connect(apply_snapshot)
+        self._simulate_batch(paths)
+        self._process_events_until_done()
+
+        # 60000 eventos: a lo sumo dos llamadas al slot y un dataChanged por llamada
+        self.assertLessEqual(len(applied), 2)
+        self.assertEqual(sum(applied), len(paths))
+        self.assertLessEqual(len(data_changed), len(applied))
+        self.assertEqual((min(first for first, _ in data_changed), max(last for _, last in data_changed)),
+                         (0, len(paths) - 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Pruebas de la deduplicación por contenido de audio.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dedup import DedupStats, audio_content_key, group_duplicates, materialize_copy
+
+
+class TestDedup(unittest.TestCase):
+    """Pruebas de huellas de contenido y materialización de copias."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.samples = np.random.default_rng(0).integers(-20000, 20000, (44100, 2), dtype=np.int16)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, samples=None, **kwargs):
+        path = os.path.join(self.temp_dir, name)
+        sf.write(path, self.samples if samples is None else samples, 44100, subtype='PCM_16', **kwargs)
+        return path
+
+    def test_same_audio_shares_key_across_containers_and_tags(self):
+        """Verificar que FLAC (firma STREAMINFO) y WAV (MD5 del fragmento data) coinciden."""
+        flac = self._write("a.flac")
+        tagged = os.path.join(self.temp_dir, "b.flac")
+        with sf.SoundFile(tagged, 'w', 44100, 2, 'PCM_16') as f:
+            f.title = "Otra etiqueta"
+            f.write(self.samples)
+        wav = self._write("c.wav")
+        other = self._write("d.flac", samples=self.samples // 2)
+
+        keys = [audio_content_key(path) for path in (flac, tagged, wav)]
+        self.assertEqual(len(set(keys)), 1)
+        self.assertNotEqual(audio_content_key(other), keys[0])
+
+    def test_group_duplicates_keeps_first_copy_as_representative(self):
+        """Verificar el agrupamiento y que los archivos ilegibles forman su propio grupo."""
+        first = self._write("uno.flac")
+        copy = self._write("dos.flac")
+        unique = self._write("tres.flac", samples=self.samples // 3)
+        broken = os.path.join(self.temp_dir, "roto.flac")
+        with open(broken, 'wb') as f:
+            f.write(b"no es audio")
+
+        groups = group_duplicates([first, unique, copy, broken])
+        self.assertEqual(list(groups), [first, unique, broken])
+        self.assertEqual(groups[first], [copy])
+
+    def test_materialize_copy_shares_content(self):
+        """Verificar que la salida materializada tiene el mismo contenido y se contabiliza."""
+        source = self._write("salida.wav")
+        target = os.path.join(self.temp_dir, "copia.wav")
+        method = materialize_copy(source, target)
+
+        self.assertIn(method, ('reflink', 'hardlink', 'copy'))
+        with open(source, 'rb') as a, open(target, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+        stats = DedupStats()
+        stats.add(method, os.path.getsize(target), 1.5)
+        self.assertEqual(stats.bytes_saved, 0 if method == 'copy' else os.path.getsize(target))
+        self.assertEqual(stats.to_dict()['methods'], {method: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Pruebas de la conversión distribuida con coordinador y trabajadores locales.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from audio_converter import AudioConverter
+from distributed import (PROTOCOL_VERSION, ConversionCoordinator, ConversionWorker, parse_address,
+                         recv_message, recv_payload, send_message)
+
+
+class TestDistributed(unittest.TestCase):
+    """Pruebas del protocolo y de lotes repartidos entre varios trabajadores."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.temp_dir, "entrada")
+        self.output_dir = os.path.join(self.temp_dir, "salida")
+        os.makedirs(self.input_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_flacs(self, count):
+        paths = []
+        for i in range(count):
+            path = os.path.join(self.input_dir, f"pista{i}.flac")
+            data = np.random.default_rng(i).integers(-20000, 20000, (44100, 2), dtype=np.int16)
+            sf.write(path, data, 44100, subtype='PCM_16')
+            paths.append(path)
+        return paths
+
+    def _assert_outputs_match(self, files):
+        for path in files:
+            output = os.path.join(self.output_dir, os.path.basename(path)[:-5] + ".wav")
+            np.testing.assert_array_equal(sf.read(output, dtype='int16')[0], sf.read(path, dtype='int16')[0])
+
+    def test_framing_roundtrip_with_payload(self):
+        """Verificar mensajes con y sin contenido y la interpretación de direcciones."""
+        payload = os.path.join(self.temp_dir, "datos.bin")
+        with open(payload, 'wb') as f:
+            f.write(os.urandom(3 << 20))
+        left, right = socket.socketpair()
+        with left, right:
+            sender = threading.Thread(target=lambda: (send_message(left, {'type': 'job', 'ñ': 1}, payload),
+                                                      send_message(left, {'type': 'done'})))
+            sender.start()
+            message = recv_message(right)
+            received = os.path.join(self.temp_dir, "recibido.bin")
+            recv_payload(right, message['size'], received)
+            self.assertEqual(recv_message(right), {'type': 'done'})
+            sender.join()
+            left.close()
+            self.assertIsNone(recv_message(right))
+        self.assertEqual(message['ñ'], 1)
+        with open(payload, 'rb') as a, open(received, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+        self.assertEqual(parse_address("equipo:5555"), ("equipo", 5555))
+        self.assertEqual(parse_address("unix:/tmp/coordinador.sock"), "/tmp/coordinador.sock")
+
+    def test_local_worker_processes_share_a_batch(self):
+        """Repartir un lote entre tres procesos trabajadores por un socket Unix con rutas compartidas."""
+        files = self._write_flacs(9)
+        address = os.path.join(self.temp_dir, "coordinador.sock")
+        coordinator = ConversionCoordinator(files, self.output_dir, address=address)
+        coordinator.start()
+        workers = [subprocess.Popen([sys.executable, os.path.join(ROOT, 'distributed.py'), 'worker',
+                                     '--connect', f"unix:{address}"],
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                   for _ in range(3)]
+        try:
+            self.assertTrue(coordinator.wait(60), "El lote distribuido no terminó a tiempo")
+            for worker in workers:
+                _, stderr = worker.communicate(timeout=30)
+                self.assertEqual(worker.returncode, 0, stderr)
+        finally:
+            coordinator.stop()
+            for worker in workers:
+                if worker.poll() is None:
+                    worker.kill()
+
+        summary = coordinator.summary()
+        self.assertEqual(summary['converted'], 9)
+        self.assertEqual(summary['failed'], 0)
+        self._assert_outputs_match(files)
+
+    def test_streamed_files_and_requeue_after_worker_disconnects(self):
+        """Enviar los archivos por TCP y reasignar el de un trabajador que se desconecta."""
+        files = self._write_flacs(4)
+        coordinator = ConversionCoordinator(files, self.output_dir, stream=True)
+        coordinator.start()
+        try:
+            # Un trabajador que recibe un archivo y se cae antes de devolverlo
+            with socket.create_connection(coordinator.address) as sock:
+                send_message(sock, {'type': 'hello', 'version': PROTOCOL_VERSION, 'worker': 'caido'})
+                send_message(sock, {'type': 'request'})
+                job = recv_message(sock)
+                self.assertTrue(job['stream'])
+                recv_payload(sock, job['size'], os.path.join(self.temp_dir, "descartado.flac"))
+
+            converter = AudioConverter()
+            workers = [ConversionWorker(coordinator.address, converter, name=f"w{i}",
+                                        work_dir=self.temp_dir) for i in range(2)]
+            threads = [threading.Thread(target=worker.run) for worker in workers]
+            for thread in threads:
+                thread.start()
+            self.assertTrue(coordinator.wait(60), "El lote distribuido no terminó a tiempo")
+            for thread in threads:
+                thread.join(30)
+        finally:
+            coordinator.stop()
+
+        self.assertEqual(coordinator.summary()['converted'], 4)
+        self.assertEqual(sum(worker.converted for worker in workers), 4)
+        self.assertIn(coordinator.results[job["path"]].worker, ("w0", "w1"))
+        self._assert_outputs_match(files)
+        # Los trabajadores borran sus archivos temporales
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["descartado.flac", "entrada", "salida"])
+
+    def test_coordinator_rejects_workers_without_the_token(self):
+        """Verificar que con secreto solo reciben trabajo los trabajadores que lo presentan."""
+        files = self._write_flacs(1)
+        coordinator = ConversionCoordinator(files, self.output_dir, token="secreto")
+        coordinator.start()
+        try:
+            with socket.create_connection(coordinator.address) as sock:
+                send_message(sock, {'type': 'hello', 'version': PROTOCOL_VERSION, 'worker': 'intruso'})
+                self.assertEqual(recv_message(sock)['type'], 'rejected')
+                self.assertIsNone(recv_message(sock))
+
+            converter = AudioConverter()
+            self.assertEqual(ConversionWorker(coordinator.address, converter, token="otro").run(), 0)
+            self.assertEqual(ConversionWorker(coordinator.address, converter, token="secreto").run(), 1)
+            self.assertTrue(coordinator.wait(30))
+        finally:
+            coordinator.stop()
+        self._assert_outputs_match(files)
+
+
+if __name__ == '__main__':
+    unittest.main()
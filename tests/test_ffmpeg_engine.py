@@ -0,0 +1,104 @@
+"""
+Pruebas del motor asíncrono de procesos ffmpeg.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ffmpeg_engine import FfmpegEngine, progress_seconds
+
+FFMPEG_AVAILABLE = shutil.which('ffmpeg') is not None
+
+
+class TestFfmpegEngine(unittest.TestCase):
+    """Pruebas de concurrencia, límites de tiempo y progreso."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.engine = FfmpegEngine(max_concurrency=2, stall_timeout=1.0)
+
+    def tearDown(self):
+        self.engine.shutdown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_progress_seconds_reads_microseconds(self):
+        """Verificar la lectura de out_time_us y el respaldo a out_time_ms."""
+        self.assertEqual(progress_seconds({'out_time_us': '2500000'}), 2.5)
+        self.assertEqual(progress_seconds({'out_time_us': 'N/A', 'out_time_ms': '1000000'}), 1.0)
+        self.assertIsNone(progress_seconds({'progress': 'continue'}))
+
+    def test_concurrency_window_and_stderr(self):
+        """Verificar que nunca corren más procesos que la ventana y que se recoge stderr."""
+        script = "import sys, time; time.sleep(0.3); sys.stderr.write('hecho'); sys.exit(3)"
+        futures = [self.engine.submit(self.engine.run_async([sys.executable, '-c', script])) for _ in range(5)]
+        peak = 0
+        while not all(future.done() for future in futures):
+            peak = max(peak, self.engine.running)
+            time.sleep(0.01)
+        self.assertLessEqual(peak, 2)
+        for future in futures:
+            result = future.result()
+            self.assertEqual(result.returncode, 3)
+            self.assertEqual(result.stderr, "hecho")
+            self.assertFalse(result.timed_out)
+
+    def test_stalled_and_cancelled_processes_are_killed(self):
+        """Verificar que un proceso sin salida se mata por bloqueo y que cancel_all mata los demás."""
+        # Script ejecutable que ignora los argumentos -progress añadidos por el motor
+        script = os.path.join(self.temp_dir, "bloqueado.sh")
+        with open(script, 'w') as f:
+            f.write("#!/bin/sh\nexec sleep 30\n")
+        os.chmod(script, 0o755)
+        silent = [script]
+        result = self.engine.run(silent, on_progress=lambda seconds: None)
+        self.assertTrue(result.timed_out)
+        self.assertLess(result.returncode, 0)
+        self.assertLess(result.elapsed, 10)
+
+        engine = FfmpegEngine(max_concurrency=2)
+        try:
+            future = engine.submit(engine.run_async(silent))
+            while not engine.running:
+                time.sleep(0.01)
+            engine.cancel_all()
+            result = future.result(timeout=10)
+            self.assertLess(result.returncode, 0)
+            self.assertFalse(result.timed_out)
+        finally:
+            engine.shutdown()
+
+    @unittest.skipUnless(FFMPEG_AVAILABLE, "ffmpeg no está instalado")
+    def test_ffmpeg_progress_is_reported_from_engine_thread(self):
+        """Verificar el progreso de -progress y que las notificaciones llegan desde el hilo del motor."""
+        source = os.path.join(self.temp_dir, "tono.flac")
+        output = os.path.join(self.temp_dir, "tono.wav")
+        sf.write(source, np.zeros((44100 * 20, 2), dtype=np.int16), 44100, subtype='PCM_16')
+        seen = []
+        threads = set()
+
+        def on_progress(seconds):
+            seen.append(seconds)
+            threads.add(threading.current_thread().name)
+
+        result = self.engine.run(['ffmpeg', '-nostdin', '-y', '-loglevel', 'error', '-i', source, output],
+                                 on_progress=on_progress)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertTrue(os.path.exists(output))
+        self.assertTrue(seen)
+        self.assertAlmostEqual(seen[-1], 20.0, delta=0.1)
+        self.assertEqual(threads, {"ffmpeg-engine"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Pruebas del modelo de lista de archivos.
+Verifican el índice por ruta, el estado compacto y la agrupación de dataChanged.
+"""
+
+import os
+import sys
+import unittest
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt5.QtCore import Qt
+
+from file_list_model import FileListModel
+
+
+class TestFileListModel(unittest.TestCase):
+    """Pruebas de FileListModel."""
+
+    def setUp(self):
+        self.model = FileListModel()
+        self.paths = [f"/musica/tema_{i:06d}.flac" for i in range(100000)]
+        self.model.add_paths(self.paths)
+
+    def test_add_paths_skips_duplicates(self):
+        """Verificar que las rutas repetidas no se añaden dos veces."""
+        added = self.model.add_paths(self.paths[:10] + ["/musica/nuevo.flac", "/musica/nuevo.flac"])
+        self.assertEqual(added, 1)
+        self.assertEqual(self.model.rowCount(), 100001)
+
+    def test_status_updates_are_batched(self):
+        """Verificar que varios cambios de estado producen un único dataChanged."""
+        emissions = []
+        self.model.dataChanged.connect(lambda first, last, roles: emissions.append((first.row(), last.row())))
+
+        self.model.set_status(self.paths[500], "convirtiendo")
+        self.model.set_status(self.paths[99999], "convertido")
+        self.model.set_status(self.paths[20], "error")
+        self.assertEqual(emissions, [])
+
+        self.model.flush_changes()
+        self.assertEqual(emissions, [(20, 99999)])
+        index = self.model.index(99999)
+        self.assertEqual(index.data(Qt.DisplayRole), "tema_099999.flac [Convertido]")
+        self.assertEqual(self.model.status_of(self.paths[20]), "error")
+
+    def test_remove_and_move_keep_index_consistent(self):
+        """Verificar que el índice ruta -> fila sigue siendo correcto tras eliminar y mover."""
+        removed = self.model.remove_rows([0, 1, 2, 50])
+        self.assertEqual(removed, [self.paths[50], self.paths[0], self.paths[1], self.paths[2]])
+        self.assertFalse(self.model.contains(self.paths[0]))
+        self.assertEqual(self.model.row_of(self.paths[3]), 0)
+
+        self.model.move_rows([0, 1], 5)
+        self.assertEqual(self.model.path_at(3), self.paths[3])
+        self.assertEqual(self.model.path_at(4), self.paths[4])
+        self.assertEqual(self.model.row_of(self.paths[3]), 3)
+        self.assertEqual(self.model.row_of(self.paths[5]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Pruebas de la cola de trabajos persistente y de la reanudación de lotes.
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from audio_converter import AudioConverter
+from job_queue import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING, JobQueue
+from output_profiles import DEFAULT_PROFILE_NAME, get_profile
+
+# Proceso hijo: convierte un lote y se mata con SIGKILL tras la segunda salida
+_CRASHING_BATCH = '''
+import os, signal, sys
+sys.path.insert(0, sys.argv[1])
+from PyQt5.QtCore import QCoreApplication, Qt
+from audio_converter import AudioConverter
+from job_queue import JobQueue
+
+app = QCoreApplication([])
+converter = AudioConverter()
+converter.job_queue = JobQueue(sys.argv[2])
+completed = []
+
+def on_completed(source, output):
+    completed.append(output)
+    if len(completed) == 2:
+        os.kill(os.getpid(), signal.SIGKILL)
+
+converter.conversion_completed.connect(on_completed, Qt.DirectConnection)
+converter.convert_batch(sys.argv[4:], sys.argv[3])
+app.exec_()
+'''
+
+
+class TestJobQueue(unittest.TestCase):
+    """Pruebas de transiciones de estado y de reanudación tras un cierre abrupto."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "jobs.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_flac(self, name):
+        path = os.path.join(self.temp_dir, name)
+        data = np.random.default_rng(len(name)).integers(-20000, 20000, (44100, 2), dtype=np.int16)
+        sf.write(path, data, 44100, subtype='PCM_16')
+        return path
+
+    def test_state_transitions_survive_reopening(self):
+        """Verificar los estados por archivo, la reanudación de los en curso y el cierre del lote."""
+        queue = JobQueue(self.db_path)
+        profile = get_profile(DEFAULT_PROFILE_NAME)
+        batch_id = queue.create_batch(["a", "b", "c", "d"], "/salida", [profile], {'verify': True})
+        queue.mark_running(batch_id, {"a": ["/salida/a.wav"], "b": ["/salida/b.wav"]})
+        queue.mark_done(batch_id, ["a"], ["/salida/a.wav"])
+        queue.mark_failed(batch_id, ["c"], "roto")
+        queue.close()
+
+        queue = JobQueue(self.db_path)
+        batch = queue.unfinished_batches()[0]
+        self.assertEqual(batch.id, batch_id)
+        self.assertEqual(batch.profiles, [profile])
+        self.assertEqual(batch.options, {'verify': True})
+        self.assertEqual(batch.counts, {JOB_DONE: 1, JOB_RUNNING: 1, JOB_FAILED: 1, JOB_PENDING: 1})
+
+        # Solo las salidas del archivo en curso pueden estar a medias
+        self.assertEqual(queue.reset_interrupted(batch_id), ["/salida/b.wav"])
+        self.assertEqual(queue.pending_files(batch_id), ["b", "d"])
+        self.assertFalse(queue.finish_batch(batch_id))
+        queue.mark_done(batch_id, ["b", "d"])
+        self.assertTrue(queue.finish_batch(batch_id))
+        self.assertEqual(queue.unfinished_batches(), [])
+
+        # La poda olvida los lotes completados antiguos junto con sus archivos
+        queue.prune()
+        self.assertIsNotNone(queue.get_batch(batch_id))
+        queue.prune(max_age_days=-1)
+        self.assertIsNone(queue.get_batch(batch_id))
+        self.assertEqual(queue.counts(batch_id), {})
+        queue.close()
+
+    def test_batch_resumes_after_process_is_killed(self):
+        """Matar el proceso a mitad de lote y verificar que la reanudación completa solo lo que faltaba."""
+        output_dir = os.path.join(self.temp_dir, "salida")
+        files = [self._write_flac(f"pista{i}.flac") for i in range(6)]
+        process = subprocess.run(
+            [sys.executable, '-c', _CRASHING_BATCH, ROOT, self.db_path, output_dir] + files,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60,
+            env=dict(os.environ, QT_QPA_PLATFORM='offscreen'))
+        self.assertEqual(process.returncode, -signal.SIGKILL, process.stderr)
+
+        queue = JobQueue(self.db_path)
+        batch = queue.unfinished_batches()[0]
+        finished = batch.counts.get(JOB_DONE, 0)
+        self.assertLess(finished, len(files))
+
+        converter = AudioConverter()
+        converter.job_queue = queue
+        done = threading.Event()
+        resumed = []
+        converter.conversion_completed.connect(lambda src, dst: resumed.append(src), Qt.DirectConnection)
+        converter.batch_completed.connect(done.set, Qt.DirectConnection)
+        pending = converter.resume_batch(batch.id)
+        self.assertTrue(done.wait(60), "El lote reanudado no terminó a tiempo")
+
+        self.assertEqual(len(pending), len(files) - finished)
+        self.assertEqual(sorted(resumed), sorted(pending))
+        self.assertEqual(queue.counts(batch.id), {JOB_DONE: len(files)})
+        self.assertEqual(queue.unfinished_batches(), [])
+        for path in files:
+            output = os.path.join(output_dir, os.path.basename(path)[:-5] + ".wav")
+            np.testing.assert_array_equal(sf.read(output, dtype='int16')[0], sf.read(path, dtype='int16')[0])
+        queue.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
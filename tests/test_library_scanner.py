@@ -0,0 +1,46 @@
+"""
+Pruebas del explorador de bibliotecas.
+Verifican el recorrido de directorios sin depender de la GUI.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from library_scanner import scan_audio_files
+
+
+class TestLibraryScanner(unittest.TestCase):
+    """Pruebas del recorrido con os.scandir."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for relative in ["b.flac", "a.FLAC", "notas.txt",
+                         os.path.join("sub", "c.flac"),
+                         os.path.join("sub", "profundo", "d.flac")]:
+            path = os.path.join(self.temp_dir, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_finds_flac_files_recursively(self):
+        """Verificar que se encuentran todos los FLAC en orden y sin otros archivos."""
+        found = [os.path.relpath(p, self.temp_dir) for p in scan_audio_files(self.temp_dir)]
+        self.assertEqual(found, ["a.FLAC", "b.flac",
+                                 os.path.join("sub", "c.flac"),
+                                 os.path.join("sub", "profundo", "d.flac")])
+
+    def test_stop_interrupts_scan(self):
+        """Verificar que la función de parada interrumpe el recorrido."""
+        self.assertEqual(list(scan_audio_files(self.temp_dir, should_stop=lambda: True)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
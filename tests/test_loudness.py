@@ -0,0 +1,86 @@
+"""
+Pruebas del análisis de sonoridad EBU R128 y de su caché persistente.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import loudness
+from loudness import LoudnessCache, LoudnessMeasurement, measure_loudness, normalization_gain
+
+
+@unittest.skipUnless(loudness.SCIPY_AVAILABLE, "scipy no está instalado")
+class TestLoudness(unittest.TestCase):
+    """Pruebas de medición con las señales de referencia de EBU Tech 3341."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, signal, sample_rate=48000):
+        path = os.path.join(self.temp_dir, name)
+        sf.write(path, signal, sample_rate, subtype='FLOAT')
+        return path
+
+    def _sine(self, level_db, seconds, frequency=1000, sample_rate=48000, phase=0.0):
+        t = np.arange(int(sample_rate * seconds)) / sample_rate
+        signal = 10 ** (level_db / 20) * np.sin(2 * np.pi * frequency * t + phase)
+        return np.stack([signal, signal], axis=1)
+
+    def test_reference_sine_measures_minus_23_lufs(self):
+        """Verificar que un seno estéreo de 1 kHz a -23 dBFS mide -23 LUFS (±0.1 LU)."""
+        for sample_rate in (44100, 48000, 96000):
+            path = self._write(f"ref_{sample_rate}.wav", self._sine(-23, 20, sample_rate=sample_rate), sample_rate)
+            measurement = measure_loudness(path)
+            self.assertAlmostEqual(measurement.integrated_lufs, -23.0, delta=0.1)
+
+    def test_relative_gate_ignores_quiet_passages(self):
+        """Verificar que un pasaje 30 dB más bajo no altera la sonoridad integrada (Tech 3341, caso 3)."""
+        signal = np.concatenate([self._sine(-36, 10), self._sine(-23, 60), self._sine(-36, 10)])
+        measurement = measure_loudness(self._write("gate.wav", signal))
+        self.assertAlmostEqual(measurement.integrated_lufs, -23.0, delta=0.1)
+
+    def test_true_peak_finds_intersample_peaks(self):
+        """Verificar que el pico real supera al pico de muestra en un seno a fs/4 desfasado 45°."""
+        signal = self._sine(-6, 3, frequency=12000, phase=np.pi / 4)
+        measurement = measure_loudness(self._write("peak.wav", signal))
+        self.assertLess(20 * np.log10(np.abs(signal).max()), -8.9)
+        self.assertAlmostEqual(measurement.true_peak_dbtp, -6.0, delta=0.2)
+
+    def test_gain_respects_true_peak_ceiling(self):
+        """Verificar que la ganancia se limita para no superar el techo de pico real."""
+        self.assertEqual(normalization_gain(LoudnessMeasurement(-20.0, -10.0, 48000, 1.0)), 6.0)
+        self.assertEqual(normalization_gain(LoudnessMeasurement(-20.0, -3.0, 48000, 1.0)), 2.0)
+        self.assertEqual(normalization_gain(LoudnessMeasurement(None, None, 48000, 1.0)), 0.0)
+
+    def test_cache_reuses_measurements_across_instances(self):
+        """Verificar que una segunda ejecución lee la medida de disco sin volver a analizar el audio."""
+        path = self._write("cache.wav", self._sine(-23, 5))
+        cache_path = os.path.join(self.temp_dir, "cache.json")
+        first = LoudnessCache(cache_path)
+        expected = first.measure(path)
+        first.save()
+
+        with mock.patch('loudness.measure_loudness') as measure:
+            self.assertEqual(LoudnessCache(cache_path).measure(path), expected)
+            measure.assert_not_called()
+
+        # Un archivo modificado cambia de huella y se vuelve a medir
+        os.utime(path, ns=(0, 0))
+        self.assertIsNone(LoudnessCache(cache_path).get(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
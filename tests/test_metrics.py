@@ -0,0 +1,93 @@
+"""
+Pruebas de las métricas de conversión y sus exportadores (Prometheus y JSON).
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import urllib.request
+from urllib.error import HTTPError
+
+# Añadir el directorio raíz al path para poder importar los módulos
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from metrics import ConversionMetrics, MetricsDumper, MetricsRegistry, MetricsServer
+
+
+class TestMetrics(unittest.TestCase):
+    """Pruebas del registro, el punto HTTP y el volcado periódico."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_histogram_exposition_format(self):
+        """Verificar los cubos acumulados, la suma y el recuento en formato Prometheus."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latencia_seconds', "Latencia", buckets=(0.5, 1.0))
+        for value in (0.2, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        registry.counter('archivos_total', "Archivos").inc(2)
+        registry.gauge('cola', "Cola", lambda: 7)
+
+        text = registry.to_prometheus()
+        for line in ('# TYPE latencia_seconds histogram',
+                     'latencia_seconds_bucket{le="0.5"} 2',
+                     'latencia_seconds_bucket{le="1"} 3',
+                     'latencia_seconds_bucket{le="+Inf"} 4',
+                     'latencia_seconds_sum 4.4',
+                     'latencia_seconds_count 4',
+                     '# TYPE archivos_total counter',
+                     'archivos_total 2',
+                     'cola 7'):
+            self.assertIn(line, text.splitlines())
+        self.assertAlmostEqual(histogram.mean(), 1.1)
+        with self.assertRaises(ValueError):
+            registry.counter('cola', "Duplicada")
+
+    def test_http_endpoint_serves_prometheus_and_json(self):
+        """Verificar /metrics, /metrics.json y el 404 del punto HTTP local."""
+        metrics = ConversionMetrics()
+        metrics.file_finished(2.0, True)
+        metrics.file_finished(1.0, False)
+        server = MetricsServer(metrics).start()
+        try:
+            host, port = server.address
+            base = f"http://{host}:{port}"
+            with urllib.request.urlopen(base + "/metrics", timeout=5) as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+                text = response.read().decode('utf-8')
+            self.assertIn('flac2wav_files_converted_total 1', text)
+            self.assertIn('flac2wav_files_failed_total 1', text)
+            with urllib.request.urlopen(base + "/metrics.json", timeout=5) as response:
+                data = json.load(response)
+            self.assertEqual(data['summary']['failure_rate'], 0.5)
+            self.assertEqual(data['metrics']['flac2wav_file_seconds']['count'], 1)
+            with self.assertRaises(HTTPError):
+                urllib.request.urlopen(base + "/otra", timeout=5)
+        finally:
+            server.stop()
+
+    def test_dumper_writes_final_snapshot_on_stop(self):
+        """Verificar que el volcado JSON se escribe periódicamente y una última vez al parar."""
+        metrics = ConversionMetrics()
+        path = os.path.join(self.temp_dir, "metricas", "estado.json")
+        dumper = MetricsDumper(metrics, path, interval=3600).start()
+        metrics.files_converted.inc(3)
+        dumper.stop()
+
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(data['summary']['files_converted'], 3)
+        self.assertIn('dumped_at', data)
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Pruebas del registro de perfiles de salida y del constructor de comandos ffmpeg.
+"""
+
+import os
+import sys
+import unittest
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from output_profiles import (DEFAULT_PROFILE_NAME, build_ffmpeg_command, compile_output_args,
+                             get_profile, make_flac_profile, output_path_for)
+
+
+class TestOutputProfiles(unittest.TestCase):
+    """Pruebas de perfiles y comandos."""
+
+    def test_default_profile_keeps_ds1200_settings(self):
+        """Verificar que el perfil por defecto conserva la configuración para Denon DS-1200."""
+        args = compile_output_args(get_profile(DEFAULT_PROFILE_NAME))
+        for pair in [('-c:a', 'pcm_s16le'), ('-ar', '44100'), ('-ac', '2'),
+                     ('-rf64', 'never'), ('-f', 'wav'), ('-map_metadata', '-1')]:
+            position = args.index(pair[0])
+            self.assertEqual(args[position + 1], pair[1])
+        self.assertIn('-bitexact', args)
+
+    def test_multiple_outputs_share_one_input(self):
+        """Verificar que varias salidas se generan con una sola entrada (una decodificación)."""
+        cmd = build_ffmpeg_command('ffmpeg', 'tema.flac', [
+            (get_profile(DEFAULT_PROFILE_NAME), 'tema.wav'),
+            (get_profile('mp3_320'), 'tema.mp3'),
+        ], threads=2)
+        self.assertEqual(cmd.count('-i'), 1)
+        self.assertEqual(cmd[-1], 'tema.mp3')
+        self.assertIn('tema.wav', cmd)
+        self.assertLess(cmd.index('tema.wav'), cmd.index('libmp3lame'))
+
+    def test_flac_profile_never_overwrites_input(self):
+        """Verificar que recodificar FLAC en la misma carpeta no sobrescribe la entrada."""
+        profile = make_flac_profile(5)
+        self.assertIn('-compression_level', compile_output_args(profile))
+        output = output_path_for('/musica/tema.flac', '/musica', profile)
+        self.assertEqual(output, os.path.join('/musica', 'tema_flac_l5.flac'))
+
+
+if __name__ == '__main__':
+    unittest.main()
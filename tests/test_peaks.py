@@ -0,0 +1,71 @@
+"""
+Pruebas de las envolventes de picos por canal.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from peaks import PeakAnalyzer, file_peaks
+
+
+def reference_peaks(samples, bucket_frames):
+    """Picos por tramo y canal calculados sobre el array completo."""
+    magnitude = np.abs(samples.astype(np.float64))
+    return np.array([magnitude[i:i + bucket_frames].max(axis=0) for i in range(0, len(samples), bucket_frames)])
+
+
+class TestPeaks(unittest.TestCase):
+    """Pruebas del analizador de picos por bloques."""
+
+    def test_blocks_of_any_size_match_reference(self):
+        """Verificar que el resultado no depende del tamaño de los bloques."""
+        samples = np.random.default_rng(1).standard_normal((5003, 2)).astype(np.float32) * 0.3
+        expected = reference_peaks(samples, 97)
+        for block_frames in (1, 50, 97, 1000, 5003):
+            analyzer = PeakAnalyzer(2, 97)
+            for start in range(0, len(samples), block_frames):
+                analyzer.process(samples[start:start + block_frames])
+            np.testing.assert_allclose(analyzer.channel_peaks(), expected, rtol=1e-6)
+            np.testing.assert_allclose(analyzer.peaks(), expected.max(axis=1), rtol=1e-6)
+        self.assertEqual(analyzer.channel_peaks().dtype, np.float32)
+
+    def test_integer_blocks_are_scaled_without_overflow(self):
+        """Verificar la escala de bloques int16 y que -32768 da un pico de 1.0."""
+        samples = np.zeros((300, 2), dtype=np.int16)
+        samples[5, 1] = -32768
+        samples[250, 0] = 8192
+        analyzer = PeakAnalyzer(2, 100)
+        analyzer.process(samples)
+        np.testing.assert_array_equal(analyzer.channel_peaks(), [[0, 1.0], [0, 0], [0.25, 0]])
+
+    def test_file_peaks_keep_left_and_right_apart(self):
+        """Verificar que los picos por canal de un archivo conservan la diferencia entre L y R."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "pista.flac")
+            t = np.arange(44100 * 2) / 44100
+            left = 0.8 * np.sin(2 * np.pi * 220 * t)
+            sf.write(path, np.stack([left, 0.1 * left], axis=1), 44100, subtype='PCM_16')
+
+            lanes, rate = file_peaks(path, points=100, per_channel=True, block_frames=1000)
+            mono, _ = file_peaks(path, points=100)
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(lanes.shape, (100, 2))
+        self.assertAlmostEqual(rate, 44100 / 882)
+        np.testing.assert_allclose(lanes[:, 0], 0.8, atol=1e-3)
+        np.testing.assert_allclose(lanes[:, 1], 0.08, atol=1e-3)
+        np.testing.assert_array_equal(mono, lanes[:, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Pruebas del perfilado por fases con cProfile y tracemalloc.
+"""
+
+import json
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+# Añadir el directorio raíz al path para poder importar los módulos
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import profiling
+
+
+def _allocate(count):
+    return [bytearray(1024) for _ in range(count)]
+
+
+class TestProfiling(unittest.TestCase):
+    """Pruebas de las fases, el trabajo repartido a otros hilos y el índice."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        profiling.disable()
+        shutil.rmtree(self.temp_dir)
+
+    def _index(self):
+        with open(os.path.join(self.temp_dir, profiling.INDEX_FILE), encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_disabled_phases_write_nothing(self):
+        """Verificar que desactivado no se perfila ni se escribe nada."""
+        self.assertFalse(profiling.is_enabled())
+        with profiling.phase("waveform") as phase:
+            self.assertIs(phase.wrap(_allocate), _allocate)
+        self.assertEqual(profiling.profiled("carga")(_allocate)(1)[0], bytearray(1024))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_phase_merges_worker_threads_and_records_allocations(self):
+        """Verificar el .prof con los hilos de la fase, el informe y la línea del índice."""
+        profiling.enable(self.temp_dir)
+        kept = []
+        with profiling.phase("batch_conversion", files=2) as phase:
+            worker = threading.Thread(target=phase.wrap(lambda: kept.append(_allocate(2000))))
+            worker.start()
+            worker.join()
+        profiling.profiled("file_load")(_allocate)(10)
+
+        entries = self._index()
+        self.assertEqual([entry['phase'] for entry in entries], ["batch_conversion", "file_load"])
+        batch = entries[0]
+        self.assertEqual((batch['info'], batch['threads']), ({'files': 2}, 2))
+        self.assertGreater(batch['peak_bytes'], 2000 * 1024)
+        self.assertGreater(batch['allocated_bytes'], 2000 * 1024)
+        # La función del otro hilo aparece en las estadísticas de la fase
+        stats = pstats.Stats(os.path.join(self.temp_dir, batch['profile']))
+        self.assertIn('_allocate', {name for _, _, name in stats.stats})
+        with open(os.path.join(self.temp_dir, batch['report']), encoding='utf-8') as f:
+            report = f.read()
+        self.assertIn("Fase: batch_conversion", report)
+        self.assertIn("test_profiling.py", report.split("tracemalloc")[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
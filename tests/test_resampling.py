@@ -0,0 +1,62 @@
+"""
+Pruebas del remuestreador polifásico compartido.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from resampling import StreamingResampler, polyphase_kernel, resample
+
+
+def _sine(frequency, sample_rate, seconds, channels=1):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    signal = 0.5 * np.sin(2 * np.pi * frequency * t)
+    return np.repeat(signal[:, None], channels, axis=1) if channels > 1 else signal
+
+
+class TestResampling(unittest.TestCase):
+    """Pruebas de precisión y de procesamiento por bloques."""
+
+    def test_sine_matches_analytic_reference(self):
+        """Verificar que un seno remuestreado coincide con el seno generado a la frecuencia destino."""
+        for src_rate, dst_rate in [(48000, 44100), (96000, 44100), (44100, 48000), (192000, 44100)]:
+            output = resample(_sine(1000, src_rate, 1), src_rate, dst_rate)
+            reference = _sine(1000, dst_rate, 1)
+            self.assertEqual(len(output), dst_rate)
+            # Ignorar los bordes, donde el filtro ve ceros fuera de la señal
+            error = np.abs(output[1000:-1000] - reference[1000:-1000]).max()
+            self.assertLess(error, 1e-4, f"{src_rate} -> {dst_rate}")
+
+    def test_stopband_rejects_aliases(self):
+        """Verificar que el contenido por encima del nuevo Nyquist queda atenuado más de 70 dB."""
+        output = resample(_sine(23000, 48000, 1), 48000, 44100)[1000:-1000]
+        level = 20 * np.log10(np.sqrt(np.mean(output ** 2)) / (0.5 / np.sqrt(2)))
+        self.assertLess(level, -70)
+
+    def test_streaming_blocks_match_one_shot(self):
+        """Verificar que procesar por bloques de tamaño irregular da la misma salida."""
+        signal = np.random.default_rng(0).standard_normal((48000, 2)).astype(np.float32) * 0.1
+        expected = resample(signal, 48000, 44100)
+
+        resampler = StreamingResampler(48000, 44100, channels=2)
+        pieces = [resampler.process(signal[start:start + size])
+                  for start, size in zip(range(0, 48000, 997), [997] * 49)]
+        pieces.append(resampler.flush())
+        np.testing.assert_allclose(np.concatenate(pieces), expected, atol=1e-6)
+
+    def test_kernel_is_cached_per_rate_pair(self):
+        """Verificar que el núcleo se calcula una sola vez y no puede modificarse."""
+        kernel = polyphase_kernel(88200, 44100)
+        self.assertIs(kernel, polyphase_kernel(88200, 44100))
+        self.assertEqual((kernel.up, kernel.down), (1, 2))
+        self.assertFalse(kernel.taps.flags.writeable)
+
+
+if __name__ == '__main__':
+    unittest.main()
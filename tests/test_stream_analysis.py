@@ -0,0 +1,132 @@
+"""
+Pruebas de la conversión con análisis simultáneo por tubería.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from audio_converter import AudioConverter
+from audio_metadata import read_audio_metadata
+from job_queue import JobQueue
+from loudness import SCIPY_AVAILABLE, measure_loudness
+from output_profiles import DEFAULT_PROFILE_NAME, get_profile, output_paths_for
+from stream_analysis import StreamAnalyzer, stream_convert
+
+FFMPEG_AVAILABLE = shutil.which('ffmpeg') is not None
+
+
+class TestStreamAnalysis(unittest.TestCase):
+    """Pruebas del reparto del PCM entre el escritor y los analizadores."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _tone(self, seconds, sample_rate=44100):
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        envelope = np.linspace(0.1, 0.9, len(t))
+        left = envelope * np.sin(2 * np.pi * 440 * t)
+        return np.stack([left, -0.5 * left], axis=1).astype(np.float32)
+
+    def test_peaks_do_not_depend_on_block_size(self):
+        """Verificar que los tramos de picos que cruzan bloques dan el mismo resultado."""
+        audio = self._tone(3)
+        reference = StreamAnalyzer(44100, 2, len(audio), peak_points=100, detect_bpm=False)
+        reference.process(audio)
+        chunked = StreamAnalyzer(44100, 2, len(audio), peak_points=100, detect_bpm=False)
+        for start in range(0, len(audio), 777):
+            chunked.process(audio[start:start + 777])
+
+        expected = reference.result()
+        result = chunked.result()
+        self.assertEqual(result.frames, len(audio))
+        self.assertEqual(len(result.peaks), 100)
+        np.testing.assert_array_equal(result.peaks, expected.peaks)
+        np.testing.assert_allclose(result.peaks[-1], np.abs(audio[-reference.bucket_frames:]).max())
+
+    @unittest.skipUnless(FFMPEG_AVAILABLE, "ffmpeg no está instalado")
+    def test_tee_writes_same_wav_as_ffmpeg_and_analyzes_it(self):
+        """Verificar que la rama WAV coincide con la salida de ffmpeg y que el análisis es el del WAV."""
+        source = os.path.join(self.temp_dir, "tono.flac")
+        sf.write(source, self._tone(4, 48000), 48000, subtype='PCM_24')
+        wav, mp3 = output_paths_for(source, self.temp_dir, [get_profile(DEFAULT_PROFILE_NAME),
+                                                            get_profile('mp3_320')])
+
+        analysis = stream_convert('ffmpeg', source, read_audio_metadata(source), [mp3], wav, block_frames=4096)
+
+        # Referencia: el mismo perfil generado solo por ffmpeg
+        reference_dir = os.path.join(self.temp_dir, "referencia")
+        converter = AudioConverter()
+        try:
+            reference = converter.convert_file(source, reference_dir)
+        finally:
+            converter.job_queue.close()
+        written = sf.read(wav[1], dtype='int16')[0]
+        np.testing.assert_array_equal(written, sf.read(reference, dtype='int16')[0])
+        self.assertGreater(os.path.getsize(mp3[1]), 0)
+        self.assertFalse(os.path.exists(wav[1] + '.part'))
+
+        self.assertEqual((analysis.sample_rate, analysis.channels, analysis.frames), (44100, 2, len(written)))
+        magnitude = np.abs(written.astype(np.float32) / 32768).max(axis=1)
+        self.assertAlmostEqual(float(analysis.peaks.max()), float(magnitude.max()), places=6)
+        self.assertAlmostEqual(len(analysis.peaks) / analysis.peak_rate, 4.0, delta=0.01)
+        if SCIPY_AVAILABLE:
+            self.assertAlmostEqual(analysis.loudness.integrated_lufs,
+                                   measure_loudness(wav[1]).integrated_lufs, places=2)
+
+    @unittest.skipUnless(FFMPEG_AVAILABLE, "ffmpeg no está instalado")
+    def test_batch_emits_analysis_and_removes_outputs_on_failure(self):
+        """Verificar analysis_ready en lotes (ffmpeg y directo) y la limpieza tras un fallo."""
+        resampled = os.path.join(self.temp_dir, "remuestreo.flac")
+        sf.write(resampled, self._tone(2, 48000), 48000, subtype='PCM_24')
+        direct = os.path.join(self.temp_dir, "directo.flac")
+        sf.write(direct, self._tone(2), 44100, subtype='PCM_16')
+        broken = os.path.join(self.temp_dir, "roto.flac")
+        with open(broken, 'wb') as f:
+            f.write(b"fLaC" + os.urandom(2048))
+        output_dir = os.path.join(self.temp_dir, "salida")
+
+        converter = AudioConverter()
+        converter.job_queue = JobQueue(os.path.join(self.temp_dir, "jobs.sqlite3"))
+        done = threading.Event()
+        analyses = {}
+        errors = []
+        converter.analysis_ready.connect(lambda path, result: analyses.__setitem__(path, result),
+                                         Qt.DirectConnection)
+        converter.conversion_error.connect(lambda src, msg: errors.append(src), Qt.DirectConnection)
+        converter.batch_completed.connect(done.set, Qt.DirectConnection)
+        try:
+            converter.convert_batch([resampled, direct, broken], output_dir, analyze=True)
+            self.assertTrue(done.wait(60), "El lote no terminó a tiempo")
+        finally:
+            converter.job_queue.close()
+
+        self.assertEqual(errors, [broken])
+        self.assertEqual(sorted(os.listdir(output_dir)), ["directo.wav", "remuestreo.wav"])
+        for name in ("directo.wav", "remuestreo.wav"):
+            result = analyses[os.path.join(output_dir, name)]
+            self.assertEqual(result.frames, 88200 if name == "directo.wav" else sf.info(
+                os.path.join(output_dir, name)).frames)
+            self.assertGreater(result.peaks.max(), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
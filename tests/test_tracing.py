@@ -0,0 +1,102 @@
+"""
+Pruebas de los tramos de rendimiento y su exportación a traza de Chrome.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+# Añadir el directorio raíz al path para poder importar los módulos
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import tracing
+
+
+class TestTracing(unittest.TestCase):
+    """Pruebas de tramos síncronos, asíncronos y de la activación por entorno."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        tracing.clear()
+
+    def tearDown(self):
+        tracing.disable()
+        tracing.clear()
+        shutil.rmtree(self.temp_dir)
+
+    def test_disabled_spans_record_nothing(self):
+        """Verificar que desactivadas no se crean tramos ni eventos."""
+        self.assertFalse(tracing.is_enabled())
+        with tracing.span("carga", path="x") as span:
+            span.set(frames=1)
+        self.assertIs(tracing.span("otro"), tracing.async_span("otro"))
+        self.assertEqual(tracing.events(), [])
+
+    def test_nested_async_and_decorated_spans_export(self):
+        """Verificar la anidación, los errores, los tramos asíncronos y el JSON exportado."""
+        tracing.enable(path=False)
+
+        @tracing.traced("decorada")
+        def work():
+            return 42
+
+        with tracing.span("exterior", path="pista.flac"):
+            with tracing.span("interior") as inner:
+                inner.set(points=10)
+                self.assertEqual(work(), 42)
+        with self.assertRaises(ValueError):
+            with tracing.span("fallida"):
+                raise ValueError("x")
+
+        async def convert(name):
+            with tracing.async_span("convertir", file=name):
+                await asyncio.sleep(0.01)
+
+        async def both():
+            await asyncio.gather(convert("a"), convert("b"))
+
+        thread = threading.Thread(target=lambda: asyncio.run(both()), name="motor")
+        thread.start()
+        thread.join()
+
+        path = tracing.export_chrome_trace(os.path.join(self.temp_dir, "trazas", "traza.json"))
+        with open(path, encoding='utf-8') as f:
+            trace = json.load(f)
+        events = trace['traceEvents']
+        complete = {event['name']: event for event in events if event['ph'] == 'X'}
+        self.assertEqual(set(complete), {"exterior", "interior", "decorada", "fallida"})
+        outer, inner = complete["exterior"], complete["interior"]
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], inner['ts'] + inner['dur'])
+        self.assertEqual(outer['args'], {'path': "pista.flac"})
+        self.assertEqual(inner['args'], {'points': 10})
+        self.assertEqual(complete["fallida"]['args'], {'error': "ValueError"})
+
+        begins = [event for event in events if event['ph'] == 'b']
+        ends = [event for event in events if event['ph'] == 'e']
+        self.assertEqual(len(begins), 2)
+        self.assertEqual(sorted(event['id'] for event in begins), sorted(event['id'] for event in ends))
+        self.assertEqual(len({event['tid'] for event in begins}), 1)
+        names = {event['args']['name'] for event in events if event['ph'] == 'M'}
+        self.assertIn("motor", names)
+
+    def test_environment_variable_saves_trace_at_exit(self):
+        """Verificar que FLAC2WAV_TRACE activa las trazas y las guarda al salir."""
+        path = os.path.join(self.temp_dir, "salida.json")
+        env = dict(os.environ, FLAC2WAV_TRACE=path)
+        script = "import tracing\nwith tracing.span('fase'):\n    pass\n"
+        subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True, capture_output=True)
+        with open(path, encoding='utf-8') as f:
+            trace = json.load(f)
+        self.assertIn("fase", [event['name'] for event in trace['traceEvents']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Pruebas del triaje previo de archivos dañados.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from triage import (STATUS_BAD_CRC, STATUS_OK, STATUS_TRUNCATED, STATUS_UNREADABLE,
+                    STATUS_UNSUPPORTED, probe_decode, triage_files)
+
+
+def write_damaged_library(directory):
+    """Genera un FLAC válido y variantes truncada, con un bit alterado y no reconocible."""
+    samples = np.random.default_rng(0).integers(-20000, 20000, (44100 * 3, 2), dtype=np.int16)
+    good = os.path.join(directory, "bueno.flac")
+    sf.write(good, samples, 44100, subtype='PCM_16')
+    with open(good, 'rb') as f:
+        data = f.read()
+
+    paths = {STATUS_OK: good}
+    paths[STATUS_TRUNCATED] = os.path.join(directory, "truncado.flac")
+    with open(paths[STATUS_TRUNCATED], 'wb') as f:
+        f.write(data[:len(data) // 2])
+
+    # Un solo bit alterado: la trama sigue sincronizada pero su CRC no cuadra
+    damaged = bytearray(data)
+    damaged[len(data) // 2] ^= 0x10
+    paths[STATUS_BAD_CRC] = os.path.join(directory, "crc.flac")
+    with open(paths[STATUS_BAD_CRC], 'wb') as f:
+        f.write(bytes(damaged))
+
+    paths[STATUS_UNSUPPORTED] = os.path.join(directory, "texto.flac")
+    with open(paths[STATUS_UNSUPPORTED], 'wb') as f:
+        f.write(b"esto no es audio" * 64)
+    return paths
+
+
+class TestTriage(unittest.TestCase):
+    """Pruebas de clasificación y del informe de triaje."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = write_damaged_library(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_probe_decode_classifies_failures(self):
+        """Verificar la clasificación de cada tipo de daño."""
+        for status, path in self.paths.items():
+            self.assertEqual(probe_decode(path).status, status, path)
+        self.assertEqual(probe_decode(os.path.join(self.temp_dir, "no-existe.flac")).status, STATUS_UNREADABLE)
+
+    def test_triage_files_in_process_pool(self):
+        """Verificar que el pool de procesos conserva el orden y el informe se exporta."""
+        files = list(self.paths.values())
+        report = triage_files(files, max_workers=2)
+
+        self.assertEqual([result.path for result in report.results], files)
+        self.assertEqual(report.good_files, [self.paths[STATUS_OK]])
+        self.assertEqual(report.summary()['failed'], 3)
+
+        with open(report.export_json(os.path.join(self.temp_dir, "informe.json")), encoding='utf-8') as f:
+            exported = json.load(f)
+        self.assertEqual(sorted(entry['status'] for entry in exported['failures']),
+                         sorted([STATUS_TRUNCATED, STATUS_BAD_CRC, STATUS_UNSUPPORTED]))
+
+
+if __name__ == '__main__':
+    unittest.main()
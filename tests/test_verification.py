@@ -0,0 +1,63 @@
+"""
+Pruebas de la verificación de salidas WAV contra la firma MD5 de STREAMINFO.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_metadata import read_audio_metadata
+from output_profiles import DEFAULT_PROFILE_NAME, get_profile
+from verification import can_verify, verify_output
+
+
+class TestVerification(unittest.TestCase):
+    """Pruebas de firmas MD5 de salidas."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.source = os.path.join(self.temp_dir, "tema.flac")
+        self.samples = rng.integers(-2 ** 23, 2 ** 23, (48000, 2), dtype=np.int32) << 8
+        sf.write(self.source, self.samples, 48000, subtype='PCM_24')
+        self.output = os.path.join(self.temp_dir, "tema.wav")
+        sf.write(self.output, self.samples, 48000, subtype='PCM_24')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_identical_output_matches_streaminfo(self):
+        """Verificar que un WAV con las mismas muestras reproduce la firma del FLAC."""
+        result = verify_output(self.source, self.output)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.expected, read_audio_metadata(self.source).md5)
+
+    def test_corrupted_output_is_detected(self):
+        """Verificar que un solo byte cambiado en el fragmento data invalida la firma."""
+        metadata = read_audio_metadata(self.output)
+        with open(self.output, 'r+b') as f:
+            f.seek(metadata.data_offset + metadata.data_size // 2)
+            value = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([value[0] ^ 0xFF]))
+        self.assertFalse(verify_output(self.source, self.output).ok)
+
+    def test_only_sample_preserving_profiles_are_verified(self):
+        """Verificar que se omiten las salidas con remuestreo, otra profundidad o ganancia."""
+        metadata = read_audio_metadata(self.source)
+        self.assertTrue(can_verify(metadata, get_profile('wav_24_48')))
+        self.assertFalse(can_verify(metadata, get_profile('wav_24_48'), gain_db=3.0))
+        self.assertFalse(can_verify(metadata, get_profile(DEFAULT_PROFILE_NAME)))
+        self.assertFalse(can_verify(metadata, get_profile('mp3_320')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Pruebas del modo de carpeta vigilada.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt5.QtCore import QCoreApplication
+
+from audio_converter import AudioConverter
+from watch_folder import ConversionManifest, Debouncer, WatchFolderService
+
+
+class FakeClock:
+    """Reloj controlado por la prueba."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestWatchFolder(unittest.TestCase):
+    """Pruebas del antirrebote, el manifiesto y el servicio completo."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.temp_dir, "entrada")
+        self.output_dir = os.path.join(self.temp_dir, "salida")
+        os.makedirs(self.input_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_flac(self, name, seconds=1):
+        path = os.path.join(self.input_dir, name)
+        data = np.random.default_rng(0).integers(-20000, 20000, (44100 * seconds, 2), dtype=np.int16)
+        sf.write(path, data, 44100, subtype='PCM_16')
+        return path
+
+    def test_debouncer_waits_until_file_stops_growing(self):
+        """Verificar que un archivo solo sale cuando no cambia durante el tiempo de espera."""
+        clock = FakeClock()
+        debouncer = Debouncer(settle_seconds=2.0, clock=clock)
+        path = os.path.join(self.temp_dir, "creciendo.flac")
+        with open(path, 'wb') as f:
+            f.write(b"a" * 100)
+        debouncer.touch(path)
+
+        self.assertEqual(debouncer.ready(), [])  # Primera observación
+        clock.now = 1.5
+        with open(path, 'ab') as f:
+            f.write(b"b" * 100)
+        self.assertEqual(debouncer.ready(), [])  # Ha crecido: la espera empieza de nuevo
+        clock.now = 3.0
+        self.assertEqual(debouncer.ready(), [])
+        clock.now = 3.6
+        self.assertEqual(debouncer.ready(), [path])
+        self.assertEqual(len(debouncer), 0)
+
+        # Los archivos que desaparecen se descartan
+        debouncer.touch(os.path.join(self.temp_dir, "borrado.flac"))
+        self.assertEqual(debouncer.ready(), [])
+        self.assertEqual(len(debouncer), 0)
+
+    def test_manifest_survives_restart_and_detects_rewrites(self):
+        """Verificar la persistencia del manifiesto y que un archivo reescrito deja de estar hecho."""
+        source = self._write_flac("pista.flac")
+        output = os.path.join(self.temp_dir, "pista.wav")
+        with open(output, 'wb') as f:
+            f.write(b"salida")
+        manifest_path = os.path.join(self.temp_dir, "manifiesto.jsonl")
+        ConversionManifest(manifest_path).record(source, [output])
+
+        manifest = ConversionManifest(manifest_path)
+        self.assertTrue(manifest.is_done(source))
+        self.assertEqual(manifest.stale_outputs(source), [])
+
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertFalse(manifest.is_done(source))
+        self.assertEqual(manifest.stale_outputs(source), [output])
+
+    def test_service_converts_new_files_once(self):
+        """Verificar la conversión de archivos existentes y nuevos, y que un reinicio no repite trabajo."""
+        self._write_flac("existente.flac")
+        service = WatchFolderService([self.input_dir], self.output_dir, converter=AudioConverter(),
+                                     settle_seconds=0.2, workers=2, use_inotify=False, poll_interval=0.2)
+        service.start()
+        try:
+            os.makedirs(os.path.join(self.input_dir, "sub"))
+            self._write_flac(os.path.join("sub", "nueva.flac"))
+            deadline = time.monotonic() + 30
+            while service.snapshot()['converted'] < 2 and time.monotonic() < deadline:
+                time.sleep(0.1)
+        finally:
+            service.stop()
+
+        metrics = service.snapshot()
+        self.assertEqual(metrics['converted'], 2)
+        self.assertEqual(metrics['failed'], 0)
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "existente.wav")))
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "nueva.wav")))
+
+        # Un segundo servicio encuentra todo en el manifiesto
+        service = WatchFolderService([self.input_dir], self.output_dir, converter=AudioConverter(),
+                                     settle_seconds=0.1, workers=1, use_inotify=False, poll_interval=0.1)
+        service.start()
+        try:
+            deadline = time.monotonic() + 10
+            while service.snapshot()['skipped'] < 2 and time.monotonic() < deadline:
+                time.sleep(0.1)
+        finally:
+            service.stop()
+        self.assertEqual(service.snapshot()['skipped'], 2)
+        self.assertEqual(service.snapshot()['converted'], 0)
+
+    def test_service_reconverts_file_rewritten_during_conversion(self):
+        """Verificar que un archivo reescrito mientras se convierte se vuelve a convertir."""
+        source = self._write_flac("pista.flac")
+        rewritten = []
+        write_flac = self._write_flac
+
+        class RewritingConverter(AudioConverter):
+            def convert_to_profiles(self, path, *args, **kwargs):
+                if not rewritten:
+                    rewritten.append(path)
+                    write_flac("pista.flac", seconds=2)
+                    # Tiempo para que el vigilante vea el cambio con la conversión en curso
+                    time.sleep(1.0)
+                return super().convert_to_profiles(path, *args, **kwargs)
+
+        service = WatchFolderService([self.input_dir], self.output_dir, converter=RewritingConverter(),
+                                     settle_seconds=0.1, workers=1, use_inotify=False, poll_interval=0.1)
+        service.start()
+        try:
+            deadline = time.monotonic() + 30
+            while service.snapshot()['converted'] < 2 and time.monotonic() < deadline:
+                time.sleep(0.1)
+        finally:
+            service.stop()
+
+        self.assertEqual(service.snapshot()['converted'], 2)
+        self.assertEqual(sf.info(os.path.join(self.output_dir, "pista.wav")).frames, 44100 * 2)
+        self.assertTrue(service.manifest.is_done(source))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Pruebas de la lectura de WAV por mapeo de memoria.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from wav_mmap import map_wav, mapped_peaks, wav_peaks
+
+
+class TestWavMmap(unittest.TestCase):
+    """Pruebas del mapeo del fragmento de datos y del cálculo de picos."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_mapped_samples_match_decoded_file(self):
+        """Verificar que el mapeo salta los fragmentos previos y coincide con soundfile."""
+        path = os.path.join(self.temp_dir, "pista.wav")
+        data = np.random.default_rng(0).integers(-32768, 32767, (10007, 2), dtype=np.int16)
+        with sf.SoundFile(path, 'w', 44100, 2, 'PCM_16') as f:
+            # Los metadatos obligan a escribir un fragmento LIST antes de los datos
+            f.title = "Pista de prueba"
+            f.write(data)
+
+        samples, metadata = map_wav(path)
+        self.assertIsInstance(samples, np.memmap)
+        self.assertEqual(metadata.sample_rate, 44100)
+        np.testing.assert_array_equal(samples, sf.read(path, dtype='int16')[0])
+        del samples
+
+        peaks, rate = wav_peaks(path, points=100)
+        bucket = 10007 // 100
+        self.assertAlmostEqual(rate, 44100 / bucket)
+        expected = [np.abs(data[i:i + bucket].astype(np.int32)).max() / 32768 for i in range(0, 10007, bucket)]
+        np.testing.assert_allclose(peaks, expected, rtol=1e-6)
+
+        # 24 bits no se puede ver como un array de NumPy
+        sf.write(path, data, 44100, subtype='PCM_24')
+        with self.assertRaises(ValueError):
+            map_wav(path)
+
+    def test_peaks_across_blocks_and_full_scale_negative(self):
+        """Verificar los tramos que cruzan bloques y que -32768 da un pico de 1.0."""
+        samples = np.zeros((1000, 2), dtype=np.int16)
+        samples[999, 1] = -32768
+        samples[10, 0] = 16384
+        peaks, bucket = mapped_peaks(samples, points=7, block_frames=300)
+        self.assertEqual(bucket, 142)
+        self.assertEqual(len(peaks), 8)
+        self.assertEqual(peaks[0], 0.5)
+        self.assertEqual(peaks[-1], 1.0)
+        self.assertEqual(peaks[1:-1].max(), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Pruebas de la preparación de la forma de onda fuera del hilo de la interfaz.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from waveform import build_waveform_render
+
+
+class TestWaveformRender(unittest.TestCase):
+    """Pruebas del búfer de dibujo calculado en el trabajador."""
+
+    def test_mono_render_levels_and_segments(self):
+        """Verificar los niveles en dB respecto al máximo y los segmentos consecutivos."""
+        peaks = np.array([0.5, 0.05, 0.0, 0.5], dtype=np.float32)
+        render = build_waveform_render(peaks, 2.0, 120)
+
+        self.assertEqual(len(render.segments), 1)
+        segments = render.segments[0]
+        self.assertEqual(segments.shape, (3, 2, 2))
+        self.assertEqual(segments.dtype, np.float32)
+        np.testing.assert_allclose(render.levels[0], [0.0, -20.0, 20 * np.log10(1e-10 / 0.5)], rtol=1e-5)
+        # Cada segmento empieza donde termina el anterior
+        np.testing.assert_array_equal(segments[1:, 0], segments[:-1, 1])
+        np.testing.assert_allclose(segments[:, 0, 0], [0, 2 / 3, 4 / 3], rtol=1e-6)
+        self.assertEqual(render.duration, 2.0)
+        # Los picos de entrada no se modifican
+        self.assertEqual(peaks[2], 0.0)
+
+    def test_stereo_lanes_and_measure_ticks(self):
+        """Verificar los carriles L arriba y R abajo y las marcas de compás de un archivo corto."""
+        peaks = np.tile(np.array([[1.0, 0.001]], dtype=np.float32), (600, 1))
+        render = build_waveform_render(peaks, 20.0, 120)
+
+        self.assertEqual(len(render.segments), 2)
+        np.testing.assert_allclose(render.segments[0][:, :, 1], 60)
+        np.testing.assert_allclose(render.segments[1][:, :, 1], 0, atol=1e-4)
+        np.testing.assert_allclose(render.levels[1], -60, atol=1e-4)
+        # 30 s a 120 BPM: 15 compases de 2 s, una marca por compás
+        self.assertEqual(render.tick_labels[:3], ["1", "2", "3"])
+        np.testing.assert_allclose(render.ticks[:3], [0, 2, 4])
+
+        long_render = build_waveform_render(np.ones(1000, dtype=np.float32), 10.0, 120)
+        self.assertIsNone(long_render.tick_labels)
+        self.assertEqual(len(long_render.ticks), 10)
+
+    def test_fewer_than_two_peaks_render_empty_segments(self):
+        """Verificar que un archivo de 0 o 1 tramos se dibuja vacío en lugar de fallar."""
+        for peaks in (np.zeros(0, dtype=np.float32), np.array([0.5], dtype=np.float32),
+                      np.zeros((1, 2), dtype=np.float32)):
+            render = build_waveform_render(peaks, 10.0, 120)
+            for segments, levels in zip(render.segments, render.levels):
+                self.assertEqual(segments.shape, (0, 2, 2))
+                self.assertEqual(len(levels), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
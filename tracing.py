@@ -0,0 +1,239 @@
+'''
+Módulo de trazas de rendimiento para la aplicación Convertidor FLAC a WAV.
+Permite medir con tramos (span) cuánto tarda cada fase del camino
+carga -> análisis -> dibujo y de la conversión, y exportarlos en el formato
+de eventos de traza de Chrome (chrome://tracing o https://ui.perfetto.dev).
+Desactivado, cada tramo cuesta una comprobación de un booleano; se activa con
+la variable de entorno FLAC2WAV_TRACE (1 o la ruta del archivo de salida)
+o con la opción --trace de la aplicación.
+'''
+
+import atexit
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from platform_utils import get_app_data_directory
+
+# Variable de entorno que activa las trazas ("1" usa la ruta predeterminada)
+TRACE_ENV = 'FLAC2WAV_TRACE'
+# Eventos que se conservan como máximo (los más antiguos se descartan)
+MAX_EVENTS = 200000
+
+_enabled = False
+_output_path = None
+_events = deque(maxlen=MAX_EVENTS)
+_thread_names = {}
+_async_ids = itertools.count(1)
+_origin = time.perf_counter()
+_atexit_registered = False
+
+
+def default_trace_path():
+    """Ruta predeterminada de la traza en el directorio de datos de la aplicación."""
+    return os.path.join(get_app_data_directory(), 'traces', time.strftime("trace_%Y%m%d_%H%M%S.json"))
+
+
+def enable(path=None):
+    """
+    Activa las trazas.
+
+    Args:
+        path: Archivo donde se guardan al salir del programa (None: ruta predeterminada;
+              False: no guardar automáticamente)
+    """
+    global _enabled, _output_path, _atexit_registered
+    _enabled = True
+    _output_path = default_trace_path() if path is None else path
+    if _output_path and not _atexit_registered:
+        atexit.register(_save_at_exit)
+        _atexit_registered = True
+
+
+def disable():
+    """Desactiva las trazas (los eventos ya registrados se conservan)."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """True si las trazas están activas."""
+    return _enabled
+
+
+def clear():
+    """Descarta los eventos registrados."""
+    _events.clear()
+
+
+def events():
+    """Copia de los eventos registrados, en formato de traza de Chrome."""
+    return list(_events)
+
+
+def _now_us():
+    return (time.perf_counter() - _origin) * 1e6
+
+
+def _thread_id():
+    tid = threading.get_ident()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    return tid
+
+
+class _NullSpan:
+    """Tramo vacío que se devuelve con las trazas desactivadas."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Tramo síncrono: un evento completo ("X") en el hilo que lo abre."""
+
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_us()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        event = {'name': self.name, 'ph': 'X', 'ts': self.start, 'dur': end - self.start,
+                 'pid': os.getpid(), 'tid': _thread_id()}
+        if self.args:
+            event['args'] = self.args
+        _events.append(event)
+        return False
+
+    def set(self, **args):
+        """Añade argumentos al tramo (se guardan al cerrarlo)."""
+        self.args.update(args)
+
+
+class _AsyncSpan(_Span):
+    """
+    Tramo asíncrono ("b"/"e" con identificador): para corrutinas que se
+    intercalan en el mismo hilo y no se anidan entre sí.
+    """
+
+    __slots__ = ('id',)
+
+    def __enter__(self):
+        self.id = next(_async_ids)
+        self.start = _now_us()
+        _events.append({'name': self.name, 'cat': 'async', 'ph': 'b', 'id': self.id, 'ts': self.start,
+                        'pid': os.getpid(), 'tid': _thread_id()})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        event = {'name': self.name, 'cat': 'async', 'ph': 'e', 'id': self.id, 'ts': _now_us(),
+                 'pid': os.getpid(), 'tid': _thread_id()}
+        if self.args:
+            event['args'] = self.args
+        _events.append(event)
+        return False
+
+
+def span(name, **args):
+    """
+    Mide un bloque de código:
+
+        with tracing.span("waveform.peaks", path=path):
+            ...
+
+    Returns:
+        Un gestor de contexto (sin coste apreciable si las trazas están desactivadas)
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def async_span(name, **args):
+    """Como span, pero para corrutinas que se ejecutan intercaladas en un mismo bucle."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _AsyncSpan(name, args)
+
+
+def traced(name=None):
+    """Decorador que mide cada llamada a una función con un tramo."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def export_chrome_trace(path):
+    """
+    Guarda los eventos en formato JSON de eventos de traza de Chrome.
+
+    Args:
+        path: Archivo de salida
+
+    Returns:
+        La ruta escrita
+    """
+    pid = os.getpid()
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}}
+                for tid, thread_name in list(_thread_names.items())]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': metadata + list(_events), 'displayTimeUnit': 'ms'}, f)
+    os.replace(temp_path, path)
+    return path
+
+
+def _save_at_exit():
+    if not _output_path or not _events:
+        return
+    try:
+        print(f"Traza guardada en {export_chrome_trace(_output_path)}")
+    except OSError as e:
+        print(f"Error al guardar la traza: {e}")
+
+
+def _configure_from_environment():
+    value = os.environ.get(TRACE_ENV, '').strip()
+    if not value or value.lower() in ('0', 'false', 'no'):
+        return
+    enable(None if value.lower() in ('1', 'true', 'yes', 'si', 'sí') else value)
+
+
+_configure_from_environment()
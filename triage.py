@@ -0,0 +1,280 @@
+'''
+Módulo de triaje de archivos dañados para la aplicación Convertidor FLAC a WAV.
+Antes de un lote se puede decodificar de prueba cada archivo en un pool de
+procesos (con soundfile o con `ffmpeg -f null`) y clasificar los fallos
+(truncado, CRC incorrecto, formato no admitido...). Los archivos dañados se
+apartan con un informe JSON, de modo que el lote real solo recibe archivos
+válidos y no se detiene a mitad por errores de ffmpeg.
+
+Uso desde la línea de comandos:
+    python triage.py [--ffmpeg] [--workers N] [--report informe.json] RUTA...
+'''
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from collections import Counter, namedtuple
+
+import soundfile as sf
+
+# Clasificaciones posibles de un archivo
+STATUS_OK = 'ok'
+STATUS_TRUNCATED = 'truncated'      # El flujo termina antes de lo que indica la cabecera
+STATUS_BAD_CRC = 'bad_crc'          # Alguna trama no supera su comprobación de integridad
+STATUS_UNSUPPORTED = 'unsupported'  # Formato no reconocido o no implementado
+STATUS_CORRUPT = 'corrupt'          # Error de decodificación sin causa más concreta
+STATUS_UNREADABLE = 'unreadable'    # El archivo no se puede abrir (permisos, no existe...)
+
+STATUS_LABELS = {
+    STATUS_OK: "correcto",
+    STATUS_TRUNCATED: "truncado",
+    STATUS_BAD_CRC: "CRC incorrecto",
+    STATUS_UNSUPPORTED: "formato no admitido",
+    STATUS_CORRUPT: "dañado",
+    STATUS_UNREADABLE: "ilegible",
+}
+
+# Fragmentos de los mensajes de libsndfile y ffmpeg que identifican cada fallo
+_SOUNDFILE_PATTERNS = [
+    ('lost sync', STATUS_TRUNCATED),  # El decodificador deja de encontrar tramas
+    ('unknown error in flac decoder', STATUS_BAD_CRC),
+    ('not recognised', STATUS_UNSUPPORTED),
+    ('unimplemented format', STATUS_UNSUPPORTED),
+    ('system error', STATUS_UNREADABLE),
+]
+_FFMPEG_PATTERNS = [
+    ('no such file', STATUS_UNREADABLE),
+    ('permission denied', STATUS_UNREADABLE),
+    ('crc', STATUS_BAD_CRC),
+    ('error opening input', STATUS_UNSUPPORTED),
+    ('cannot determine format', STATUS_UNSUPPORTED),
+    ('end of file', STATUS_TRUNCATED),
+]
+
+TriageResult = namedtuple('TriageResult', [
+    'path',             # Archivo analizado
+    'status',           # Una de las constantes STATUS_*
+    'message',          # Mensaje del decodificador (None si es correcto)
+    'frames_decoded',   # Muestras por canal decodificadas (None con ffmpeg)
+    'frames_expected',  # Muestras por canal según la cabecera (None si no se pudo abrir)
+    'seconds',          # Tiempo empleado en la prueba
+])
+
+
+def _classify(message, patterns):
+    """Clasifica un mensaje de error según la primera coincidencia de patterns."""
+    lowered = message.lower()
+    for fragment, status in patterns:
+        if fragment in lowered:
+            return status
+    return STATUS_CORRUPT
+
+
+class _SequentialSoundFile(sf.SoundFile):
+    """
+    SoundFile que lee siempre hacia delante. soundfile consulta la posición
+    (un seek) antes de cada lectura, y en un FLAC dañado ese seek falla antes
+    de llegar a la trama defectuosa, ocultando el error real del decodificador.
+    """
+
+    def seekable(self):
+        return False
+
+
+def probe_decode(path, block_frames=65536):
+    """
+    Decodifica un archivo completo con soundfile sin guardar las muestras.
+    Es una función de módulo para poder ejecutarse en un pool de procesos.
+
+    Args:
+        path: Ruta al archivo de audio
+        block_frames: Muestras por canal en cada bloque
+
+    Returns:
+        Un TriageResult
+    """
+    start = time.perf_counter()
+    decoded = 0
+    expected = None
+    try:
+        with _SequentialSoundFile(path) as source:
+            expected = source.frames
+            while True:
+                block_length = len(source.read(block_frames, dtype='int16'))
+                decoded += block_length
+                if block_length < block_frames:
+                    break
+    except OSError as e:
+        return TriageResult(path, STATUS_UNREADABLE, str(e), decoded, expected, time.perf_counter() - start)
+    except RuntimeError as e:
+        # Los errores de libsndfile son RuntimeError con el mensaje del decodificador
+        return TriageResult(path, _classify(str(e), _SOUNDFILE_PATTERNS), str(e), decoded, expected,
+                            time.perf_counter() - start)
+
+    if decoded < expected:
+        return TriageResult(path, STATUS_TRUNCATED, f"Decodificadas {decoded} de {expected} muestras",
+                            decoded, expected, time.perf_counter() - start)
+    return TriageResult(path, STATUS_OK, None, decoded, expected, time.perf_counter() - start)
+
+
+def probe_decode_ffmpeg(path, ffmpeg_path='ffmpeg'):
+    """
+    Decodifica un archivo con `ffmpeg -f null` comprobando los CRC de cada trama.
+
+    Args:
+        path: Ruta al archivo de audio
+        ffmpeg_path: Ruta al binario de ffmpeg
+
+    Returns:
+        Un TriageResult
+    """
+    start = time.perf_counter()
+    process = subprocess.run(
+        [ffmpeg_path, '-nostdin', '-v', 'error', '-xerror', '-err_detect', 'crccheck',
+         '-i', path, '-f', 'null', '-'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=False,
+    )
+    # ffmpeg informa de los CRC incorrectos sin cambiar el código de salida
+    message = process.stderr.strip()
+    if process.returncode == 0 and not message:
+        return TriageResult(path, STATUS_OK, None, None, None, time.perf_counter() - start)
+    return TriageResult(path, _classify(message, _FFMPEG_PATTERNS), message, None, None,
+                        time.perf_counter() - start)
+
+
+class TriageReport:
+    """Resultado de un triaje: archivos válidos, fallos clasificados y exportación a JSON."""
+
+    def __init__(self, results, method):
+        """
+        Args:
+            results: Lista de TriageResult en el orden de entrada
+            method: 'soundfile' o 'ffmpeg'
+        """
+        self.results = list(results)
+        self.method = method
+        self.created_at = time.time()
+
+    @property
+    def good_files(self):
+        """Archivos que se decodificaron sin errores."""
+        return [result.path for result in self.results if result.status == STATUS_OK]
+
+    @property
+    def failures(self):
+        """Resultados con algún fallo."""
+        return [result for result in self.results if result.status != STATUS_OK]
+
+    def summary(self):
+        """Totales por clasificación."""
+        counts = Counter(result.status for result in self.results)
+        return {
+            "total": len(self.results),
+            "ok": counts.get(STATUS_OK, 0),
+            "failed": len(self.results) - counts.get(STATUS_OK, 0),
+            "by_status": {status: count for status, count in counts.items() if status != STATUS_OK},
+        }
+
+    def summary_text(self):
+        """Resumen legible para mostrar en la interfaz."""
+        summary = self.summary()
+        if not summary['failed']:
+            return f"{summary['ok']} archivos válidos"
+        details = ", ".join(f"{count} {STATUS_LABELS[status]}" for status, count in summary['by_status'].items())
+        return f"{summary['ok']} archivos válidos, {summary['failed']} apartados ({details})"
+
+    def to_dict(self):
+        """Convierte el informe en un diccionario serializable."""
+        return {
+            "method": self.method,
+            "created_at": self.created_at,
+            "summary": self.summary(),
+            "failures": [result._asdict() for result in self.failures],
+        }
+
+    def export_json(self, path):
+        """
+        Exporta el informe a un archivo JSON.
+
+        Args:
+            path: Ruta del archivo de destino
+
+        Returns:
+            La ruta escrita
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def triage_files(file_list, max_workers=None, use_ffmpeg=False, ffmpeg_path='ffmpeg', should_stop=None):
+    """
+    Decodifica de prueba una lista de archivos en un pool de procesos.
+
+    Args:
+        file_list: Lista de rutas
+        max_workers: Número de procesos (por defecto, uno por CPU)
+        use_ffmpeg: Usar `ffmpeg -f null` en lugar de soundfile
+        ffmpeg_path: Ruta al binario de ffmpeg
+        should_stop: Función opcional que devuelve True para cancelar
+
+    Returns:
+        Un TriageReport (los archivos no analizados por cancelación se omiten)
+    """
+    if not file_list:
+        return TriageReport([], 'ffmpeg' if use_ffmpeg else 'soundfile')
+
+    # 'spawn' evita heredar los hilos de Qt del proceso principal
+    context = multiprocessing.get_context('spawn')
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(file_list)))
+    results = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        if use_ffmpeg:
+            futures = {pool.submit(probe_decode_ffmpeg, path, ffmpeg_path): path for path in file_list}
+        else:
+            futures = {pool.submit(probe_decode, path): path for path in file_list}
+        for future in concurrent.futures.as_completed(futures):
+            if should_stop and should_stop():
+                for pending in futures:
+                    pending.cancel()
+                break
+            results[futures[future]] = future.result()
+
+    return TriageReport([results[path] for path in file_list if path in results],
+                        'ffmpeg' if use_ffmpeg else 'soundfile')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decodifica de prueba archivos de audio y clasifica los dañados.")
+    parser.add_argument('paths', nargs='+', help="Archivos o carpetas a analizar")
+    parser.add_argument('--ffmpeg', action='store_true', help="Usar ffmpeg -f null en lugar de soundfile")
+    parser.add_argument('--workers', type=int, default=None, help="Número de procesos")
+    parser.add_argument('--report', default=None, help="Archivo JSON donde guardar el informe")
+    args = parser.parse_args(argv)
+
+    from library_scanner import scan_audio_files
+    from platform_utils import get_ffmpeg_binary
+
+    files = []
+    for path in args.paths:
+        files.extend(scan_audio_files(path) if os.path.isdir(path) else [path])
+
+    report = triage_files(files, args.workers, args.ffmpeg, get_ffmpeg_binary())
+    for result in report.failures:
+        print(f"{STATUS_LABELS[result.status]:>20}: {result.path} ({result.message})")
+    print(report.summary_text())
+    if args.report:
+        report.export_json(args.report)
+    return 1 if report.failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
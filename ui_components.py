@@ -1,55 +1,72 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
-                         QListWidget, QProgressBar, QFileDialog, QSlider, QListWidgetItem,
-                         QMessageBox, QSplitter, QFrame, QTabWidget, QScrollArea, QStatusBar)
-from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QSize, QMimeData, QEvent
+                         QListView, QProgressBar, QFileDialog, QSlider,
+                         QMessageBox, QSplitter, QFrame, QTabWidget, QScrollArea, QStatusBar,
+                         QToolButton, QMenu, QCheckBox)
+from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QSize, QMimeData, QEvent, QStringListModel
 from PyQt5.QtGui import QDrag, QIcon, QColor, QPalette, QFont, QPixmap
 import os
 
-class DragDropListWidget(QListWidget):
-    """Lista personalizada que admite arrastrar y soltar archivos."""
+from file_list_model import FileListModel
+from library_scanner import LibraryScanner
+from output_profiles import DEFAULT_PROFILE_NAME, get_profile, list_profiles
+from loudness import DEFAULT_TARGET_LUFS, SCIPY_AVAILABLE
+
+class DragDropListView(QListView):
+    """Vista de lista respaldada por FileListModel que admite arrastrar y soltar archivos."""
     
     files_dropped = pyqtSignal(list)  # Lista de rutas de archivo
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.setModel(FileListModel(self))
         self.setAcceptDrops(True)
-        self.setSelectionMode(QListWidget.ExtendedSelection)
+        self.setSelectionMode(QListView.ExtendedSelection)
         self.setMinimumHeight(100)
         
+        # Todas las filas tienen la misma altura: evita medir 100k elementos
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        
         # Permitir que elementos sean arrastrados (reordenamiento)
         self.setDragEnabled(True)
-        self.setDragDropMode(QListWidget.InternalMove)
+        self.setDragDropMode(QListView.DragDrop)
+        self.setDefaultDropAction(Qt.MoveAction)
         
     def dragEnterEvent(self, event):
         """Procesa el evento cuando un elemento es arrastrado sobre la lista."""
-        # Aceptar archivos arrastrables
-        if event.mimeData().hasUrls():
+        # Aceptar archivos arrastrables y el reordenamiento interno
+        if event.mimeData().hasUrls() or event.source() is self:
             event.acceptProposedAction()
         else:
             super().dragEnterEvent(event)
     
     def dragMoveEvent(self, event):
         """Procesa el evento cuando un elemento es movido sobre la lista."""
-        if event.mimeData().hasUrls():
+        if event.mimeData().hasUrls() or event.source() is self:
             event.acceptProposedAction()
         else:
             super().dragMoveEvent(event)
     
     def dropEvent(self, event):
         """Procesa el evento cuando un elemento es soltado en la lista."""
-        if event.mimeData().hasUrls():
-            # Extraer las URLs como rutas de archivo
+        if event.source() is self:
+            # Reordenamiento interno: mover las filas seleccionadas
+            target = self.indexAt(event.pos())
+            destination = target.row() if target.isValid() else self.model().rowCount()
+            rows = [index.row() for index in self.selectionModel().selectedRows()]
+            self.model().move_rows(rows, destination)
+            # Indicar copia para que la vista no intente eliminar las filas de origen
+            event.setDropAction(Qt.CopyAction)
+            event.accept()
+        elif event.mimeData().hasUrls():
+            # Extraer las URLs como rutas de archivo; el widget contenedor se
+            # encarga de añadirlas (evitando duplicados) y de explorar carpetas
             file_paths = []
             for url in event.mimeData().urls():
                 file_path = url.toLocalFile()
-                # Solo admitir archivos con extensión .flac
-                if file_path.lower().endswith('.flac'):
+                # Solo admitir archivos con extensión .flac o directorios
+                if file_path.lower().endswith('.flac') or os.path.isdir(file_path):
                     file_paths.append(file_path)
-                    
-                    # Añadir archivo a la lista
-                    item = QListWidgetItem(file_path.split('/')[-1])
-                    item.setData(Qt.UserRole, file_path)
-                    self.addItem(item)
             
             if file_paths:
                 self.files_dropped.emit(file_paths)
@@ -60,26 +77,23 @@ class DragDropListWidget(QListWidget):
     
     def get_selected_files(self):
         """Obtiene las rutas de archivo de los elementos seleccionados."""
-        selected_files = []
-        for item in self.selectedItems():
-            file_path = item.data(Qt.UserRole)
-            selected_files.append(file_path)
-        return selected_files
+        model = self.model()
+        rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+        return [model.path_at(row) for row in rows]
     
     def get_all_files(self):
         """Obtiene las rutas de archivo de todos los elementos."""
-        all_files = []
-        for i in range(self.count()):
-            item = self.item(i)
-            file_path = item.data(Qt.UserRole)
-            all_files.append(file_path)
-        return all_files
+        return self.model().all_paths()
     
     def remove_selected_items(self):
-        """Elimina los elementos seleccionados de la lista."""
-        for item in self.selectedItems():
-            row = self.row(item)
-            self.takeItem(row)
+        """
+        Elimina los elementos seleccionados de la lista.
+        
+        Returns:
+            Lista de rutas eliminadas
+        """
+        rows = [index.row() for index in self.selectionModel().selectedRows()]
+        return self.model().remove_rows(rows)
 
 
 class CustomProgressBar(QProgressBar):
@@ -131,13 +145,13 @@ class FileListWidget(QWidget):
         layout.addWidget(title_label)
         
         # Instrucciones
-        instruction_label = QLabel("Arrastra archivos FLAC aquí o usa el botón 'Añadir'")
+        instruction_label = QLabel("Arrastra archivos o carpetas FLAC aquí o usa el botón 'Añadir'")
         instruction_label.setStyleSheet("font-style: italic; color: #AAAAAA;")
         layout.addWidget(instruction_label)
         
         # Lista de archivos
-        self.file_list = DragDropListWidget()
-        self.file_list.itemClicked.connect(self._on_item_clicked)
+        self.file_list = DragDropListView()
+        self.file_list.clicked.connect(self._on_index_clicked)
         self.file_list.files_dropped.connect(self._on_files_dropped)
         layout.addWidget(self.file_list)
         
@@ -147,14 +161,73 @@ class FileListWidget(QWidget):
         self.add_button = QPushButton("Añadir Archivos")
         self.add_button.clicked.connect(self._on_add_clicked)
         
+        self.add_folder_button = QPushButton("Añadir Carpeta")
+        self.add_folder_button.clicked.connect(self._on_add_folder_clicked)
+        
         self.remove_button = QPushButton("Eliminar Seleccionados")
         self.remove_button.clicked.connect(self._on_remove_clicked)
         
         buttons_layout.addWidget(self.add_button)
+        buttons_layout.addWidget(self.add_folder_button)
         buttons_layout.addWidget(self.remove_button)
         
         layout.addLayout(buttons_layout)
         
+        # Selector de perfiles de salida (se pueden marcar varios: cada archivo
+        # se decodifica una sola vez y se generan todos los formatos marcados)
+        profile_layout = QHBoxLayout()
+        profile_label = QLabel("Formatos de salida:")
+        self.profile_button = QToolButton()
+        self.profile_button.setPopupMode(QToolButton.InstantPopup)
+        self.profile_menu = QMenu(self.profile_button)
+        self.profile_actions = []
+        for profile in list_profiles():
+            action = self.profile_menu.addAction(profile.label)
+            action.setCheckable(True)
+            action.setChecked(profile.name == DEFAULT_PROFILE_NAME)
+            action.setData(profile.name)
+            action.toggled.connect(self._update_profile_button)
+            self.profile_actions.append(action)
+        self.profile_button.setMenu(self.profile_menu)
+        self._update_profile_button()
+        profile_layout.addWidget(profile_label)
+        profile_layout.addWidget(self.profile_button, 1)
+        
+        # Normalización de sonoridad en dos pasadas (medición EBU R128 + ganancia)
+        self.normalize_checkbox = QCheckBox(f"Normalizar ({DEFAULT_TARGET_LUFS:g} LUFS)")
+        self.normalize_checkbox.setToolTip("Mide la sonoridad de cada archivo (con caché) "
+                                           "y ajusta la ganancia al convertir")
+        # Sin scipy no se puede medir la sonoridad: la opción no se ofrece
+        self.normalize_checkbox.setEnabled(SCIPY_AVAILABLE)
+        self.normalize_checkbox.setVisible(SCIPY_AVAILABLE)
+        profile_layout.addWidget(self.normalize_checkbox)
+        
+        # Deduplicación: las copias del mismo audio se convierten una sola vez
+        self.dedup_checkbox = QCheckBox("Omitir duplicados")
+        self.dedup_checkbox.setToolTip("Convierte una sola vez los archivos con el mismo audio "
+                                       "y enlaza (o clona) sus salidas")
+        profile_layout.addWidget(self.dedup_checkbox)
+        
+        # Verificación de las salidas contra la firma MD5 de STREAMINFO
+        self.verify_checkbox = QCheckBox("Verificar MD5")
+        self.verify_checkbox.setToolTip("Comprueba que cada WAV sin remuestreo contiene "
+                                        "exactamente las muestras del FLAC original")
+        profile_layout.addWidget(self.verify_checkbox)
+        
+        # Triaje previo: decodificar de prueba y apartar los archivos dañados
+        self.preflight_checkbox = QCheckBox("Analizar antes")
+        self.preflight_checkbox.setToolTip("Decodifica de prueba todos los archivos y aparta "
+                                           "los dañados antes de convertir")
+        profile_layout.addWidget(self.preflight_checkbox)
+        
+        # Análisis simultáneo: forma de onda, BPM y sonoridad de la misma decodificación
+        self.analyze_checkbox = QCheckBox("Analizar al convertir")
+        self.analyze_checkbox.setToolTip("Calcula la forma de onda, el BPM y la sonoridad durante "
+                                         "la conversión, sin volver a leer los WAV del disco")
+        profile_layout.addWidget(self.analyze_checkbox)
+        
+        layout.addLayout(profile_layout)
+        
         # Botones de conversión
         convert_layout = QHBoxLayout()
         
@@ -176,8 +249,8 @@ class FileListWidget(QWidget):
         # Establecer layout
         self.setLayout(layout)
         
-        # Diccionario para mantener el estado de los archivos
-        self.file_statuses = {}  # Clave: ruta del archivo, Valor: estado (convirtiendo, convertido, etc.)
+        # Exploradores de carpetas en curso
+        self._scanners = []
 
     def set_file_status(self, file_path, status):
         """
@@ -187,51 +260,109 @@ class FileListWidget(QWidget):
             file_path: Ruta al archivo
             status: Estado del archivo ('convirtiendo', 'convertido', 'error', etc.)
         """
-        # Guardar el estado del archivo
-        self.file_statuses[file_path] = status
-        
-        # Buscar el item en la lista
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            if item.data(Qt.UserRole) == file_path:
-                # Actualizar el texto del item con el estado
-                file_name = os.path.basename(file_path)
-                
-                # Cambiar el color del texto según el estado
-                if status == "convirtiendo":
-                    item.setText(f"{file_name} [Convirtiendo...]")
-                    item.setForeground(QColor("#FFCC00"))  # Amarillo
-                elif status == "convertido":
-                    item.setText(f"{file_name} [Convertido]")
-                    item.setForeground(QColor("#00FF00"))  # Verde
-                elif status == "error":
-                    item.setText(f"{file_name} [Error]")
-                    item.setForeground(QColor("#FF0000"))  # Rojo
-                else:
-                    item.setText(file_name)
-                    item.setForeground(QColor("#FFFFFF"))  # Blanco
-                
-                break
-    
-    def _on_item_clicked(self, item):
+        # Búsqueda O(1) por ruta; la vista se repinta una vez por ciclo de eventos
+        self.file_list.model().set_status(file_path, status)
+    
+    def set_file_statuses(self, statuses):
+        """
+        Establece el estado de varios archivos a la vez.
+        
+        Args:
+            statuses: Diccionario ruta -> estado
+        """
+        self.file_list.model().set_statuses(statuses)
+    
+    def get_file_status(self, file_path):
+        """Devuelve el estado de un archivo o None si no está en la lista."""
+        return self.file_list.model().status_of(file_path)
+    
+    def selected_profiles(self):
+        """Devuelve los perfiles de salida marcados (el predeterminado si no hay ninguno)."""
+        profiles = [get_profile(action.data()) for action in self.profile_actions if action.isChecked()]
+        return profiles or [get_profile(DEFAULT_PROFILE_NAME)]
+    
+    def normalize_enabled(self):
+        """Indica si se ha pedido normalizar la sonoridad del lote."""
+        return self.normalize_checkbox.isChecked()
+    
+    def dedup_enabled(self):
+        """Indica si se ha pedido deduplicar el lote por contenido de audio."""
+        return self.dedup_checkbox.isChecked()
+    
+    def verify_enabled(self):
+        """Indica si se ha pedido verificar las salidas con la firma MD5 del FLAC."""
+        return self.verify_checkbox.isChecked()
+    
+    def preflight_enabled(self):
+        """Indica si se ha pedido el triaje previo de archivos dañados."""
+        return self.preflight_checkbox.isChecked()
+    
+    def analyze_enabled(self):
+        """Indica si se ha pedido analizar los archivos durante la conversión."""
+        return self.analyze_checkbox.isChecked()
+    
+    def _update_profile_button(self, *args):
+        """Actualiza el texto del selector con los perfiles marcados."""
+        labels = [action.text() for action in self.profile_actions if action.isChecked()]
+        if len(labels) == 1:
+            self.profile_button.setText(labels[0])
+        elif labels:
+            self.profile_button.setText(f"{len(labels)} formatos")
+        else:
+            self.profile_button.setText(get_profile(DEFAULT_PROFILE_NAME).label)
+    
+    def _on_index_clicked(self, index):
         """Maneja el evento de clic en un elemento de la lista."""
-        file_path = item.data(Qt.UserRole)
+        file_path = index.data(Qt.UserRole)
         self.file_selected.emit(file_path)
     
+    def add_files(self, file_paths):
+        """
+        Añade archivos a la lista ignorando los que ya están presentes.
+        
+        Args:
+            file_paths: Iterable de rutas de archivo
+            
+        Returns:
+            Número de archivos añadidos
+        """
+        # El modelo descarta duplicados con su índice ruta -> fila
+        return self.file_list.model().add_paths(file_paths)
+    
+    def import_directories(self, directories):
+        """
+        Importa todos los archivos FLAC de uno o varios directorios en segundo plano.
+        
+        Args:
+            directories: Lista de rutas de directorio
+        """
+        scanner = LibraryScanner(directories)
+        scanner.files_found.connect(self.add_files)
+        scanner.scan_finished.connect(lambda total, s=scanner: self._on_scan_finished(s))
+        self._scanners.append(scanner)
+        scanner.start()
+    
+    def stop_scans(self):
+        """Detiene los escaneos de biblioteca en curso y espera a que terminen sus hilos."""
+        for scanner in list(self._scanners):
+            scanner.stop()
+        for scanner in list(self._scanners):
+            scanner.wait()
+    
+    def _on_scan_finished(self, scanner):
+        """Libera el explorador de carpetas al terminar."""
+        if scanner in self._scanners:
+            self._scanners.remove(scanner)
+        scanner.deleteLater()
+    
     def _on_files_dropped(self, file_paths):
         """Maneja el evento de archivos arrastrados y soltados en la lista."""
-        for file_path in file_paths:
-            # Verificar si el archivo ya está en la lista
-            found = False
-            for i in range(self.file_list.count()):
-                if self.file_list.item(i).data(Qt.UserRole) == file_path:
-                    found = True
-                    break
-            
-            if not found:
-                item = QListWidgetItem(file_path.split('/')[-1])
-                item.setData(Qt.UserRole, file_path)
-                self.file_list.addItem(item)
+        directories = [path for path in file_paths if os.path.isdir(path)]
+        self.add_files(path for path in file_paths if not os.path.isdir(path))
+        
+        # Las carpetas soltadas se exploran en un hilo separado
+        if directories:
+            self.import_directories(directories)
     
     def _on_add_clicked(self):
         """Maneja el evento de clic en el botón Añadir."""
@@ -240,20 +371,15 @@ class FileListWidget(QWidget):
         file_dialog.setNameFilter("Archivos FLAC (*.flac)")
         
         if file_dialog.exec_():
-            file_paths = file_dialog.selectedFiles()
-            
-            for file_path in file_paths:
-                # Verificar si el archivo ya está en la lista
-                found = False
-                for i in range(self.file_list.count()):
-                    if self.file_list.item(i).data(Qt.UserRole) == file_path:
-                        found = True
-                        break
-                
-                if not found:
-                    item = QListWidgetItem(file_path.split('/')[-1])
-                    item.setData(Qt.UserRole, file_path)
-                    self.file_list.addItem(item)
+            self.add_files(file_dialog.selectedFiles())
+    
+    def _on_add_folder_clicked(self):
+        """Maneja el evento de clic en el botón Añadir Carpeta."""
+        directory = QFileDialog.getExistingDirectory(
+            self, "Seleccionar Carpeta de la Biblioteca")
+        
+        if directory:
+            self.import_directories([directory])
     
     def _on_remove_clicked(self):
         """Maneja el evento de clic en el botón Eliminar."""
@@ -703,3 +829,116 @@ class StatusBar(QStatusBar):
         """
         self.progress_bar.show()
         self.progress_bar.setValue(progress)
+
+
+class BatchSummaryPanel(QFrame):
+    """Panel no modal con el resumen y los errores de la última conversión por lotes."""
+    
+    load_converted_requested = pyqtSignal(str)  # Ruta del archivo convertido a cargar
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.report = None
+        self._converted_file = None
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 5, 10, 5)
+        
+        # Cabecera con título, resumen y botones
+        header_layout = QHBoxLayout()
+        
+        title_label = QLabel("Resumen del lote")
+        title_label.setStyleSheet("color: #00FFFF; font-weight: bold; font-size: 14px;")
+        header_layout.addWidget(title_label)
+        
+        self.summary_label = QLabel("")
+        header_layout.addWidget(self.summary_label)
+        header_layout.addStretch()
+        
+        self.load_button = QPushButton("Cargar Convertido")
+        self.load_button.clicked.connect(self._on_load_clicked)
+        self.load_button.hide()
+        header_layout.addWidget(self.load_button)
+        
+        self.export_button = QPushButton("Exportar JSON")
+        self.export_button.clicked.connect(self._on_export_clicked)
+        header_layout.addWidget(self.export_button)
+        
+        self.close_button = QPushButton("Cerrar")
+        self.close_button.clicked.connect(self.hide)
+        header_layout.addWidget(self.close_button)
+        
+        layout.addLayout(header_layout)
+        
+        # Lista de errores (solo texto, sin elementos interactivos)
+        self.error_list = QListView()
+        self.error_list.setUniformItemSizes(True)
+        self.error_list.setMaximumHeight(120)
+        self.error_model = QStringListModel(self)
+        self.error_list.setModel(self.error_model)
+        layout.addWidget(self.error_list)
+        
+        self.setLayout(layout)
+        self.setStyleSheet("""
+            BatchSummaryPanel {
+                background-color: #1A1A1A;
+                border-top: 1px solid #00AACC;
+            }
+        """)
+    
+    def show_report(self, report):
+        """
+        Muestra (o actualiza) el resumen de un informe de lote.
+        
+        Args:
+            report: Instancia de BatchReport
+        """
+        self.report = report
+        self.summary_label.setText(report.summary_text())
+        
+        errors = report.errors
+        self.error_model.setStringList([
+            f"{os.path.basename(entry.file_path)}: {entry.message}" for entry in errors
+        ])
+        self.error_list.setVisible(bool(errors))
+        self.show()
+    
+    def offer_converted_file(self, converted_file):
+        """
+        Ofrece cargar un archivo convertido sin interrumpir el lote.
+        
+        Args:
+            converted_file: Ruta al archivo convertido
+        """
+        self._converted_file = converted_file
+        self.load_button.setToolTip(converted_file)
+        self.load_button.show()
+    
+    def clear(self):
+        """Reinicia el panel para un lote nuevo."""
+        self.report = None
+        self._converted_file = None
+        self.load_button.hide()
+        self.summary_label.setText("")
+        self.error_model.setStringList([])
+        self.hide()
+    
+    def _on_load_clicked(self):
+        """Maneja el evento de clic en el botón Cargar Convertido."""
+        if self._converted_file:
+            self.load_converted_requested.emit(self._converted_file)
+    
+    def _on_export_clicked(self):
+        """Maneja el evento de clic en el botón Exportar JSON."""
+        if self.report is None:
+            return
+        default_name = "informe_lote.json"
+        if self.report.output_dir:
+            default_name = os.path.join(self.report.output_dir, default_name)
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar Informe del Lote", default_name, "JSON (*.json)")
+        if path:
+            try:
+                self.report.export_json(path)
+            except OSError as e:
+                self.summary_label.setText(f"Error al exportar: {e}")
@@ -0,0 +1,105 @@
+'''
+Módulo de verificación de integridad para la aplicación Convertidor FLAC a WAV.
+Los FLAC guardan en STREAMINFO el MD5 de sus muestras decodificadas. Cuando una
+salida WAV conserva el formato de muestra de la entrada (sin remuestreo, cambio
+de profundidad ni ganancia), su fragmento data contiene exactamente esos bytes,
+así que basta con calcular su MD5 leyendo el archivo mediante mmap para
+comprobar que la conversión es idéntica al original.
+'''
+
+import hashlib
+import mmap
+from collections import namedtuple
+
+from audio_metadata import read_audio_metadata
+
+# Bytes entregados a hashlib en cada llamada (libera el GIL durante el cálculo)
+_HASH_SLICE = 8 << 20
+
+# Códecs de salida cuyo fragmento data es PCM entero little-endian
+_VERIFIABLE_CODECS = {
+    'pcm_s16le': 16,
+    'pcm_s24le': 24,
+}
+
+_VerificationResultBase = namedtuple('VerificationResult', [
+    'source',    # Archivo de entrada
+    'output',    # Archivo verificado
+    'expected',  # MD5 de STREAMINFO del FLAC
+    'actual',    # MD5 del fragmento data del WAV
+])
+
+
+class VerificationResult(_VerificationResultBase):
+    """Resultado de comparar una salida con la firma de su entrada."""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """True si las firmas coinciden."""
+        return self.expected is not None and self.expected == self.actual
+
+
+def wav_data_md5(metadata):
+    """
+    Calcula el MD5 del fragmento data de un WAV leyéndolo mediante mmap.
+    Para PCM de 16 y 24 bits esos bytes son exactamente las muestras
+    intercaladas en little-endian sobre las que FLAC calcula su firma.
+
+    Args:
+        metadata: AudioMetadata de un archivo WAV
+
+    Returns:
+        El MD5 en hexadecimal
+    """
+    digest = hashlib.md5()
+    if not metadata.data_size:
+        return digest.hexdigest()
+    with open(metadata.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        end = min(metadata.data_offset + metadata.data_size, len(mapped))
+        view = memoryview(mapped)
+        try:
+            for start in range(metadata.data_offset, end, _HASH_SLICE):
+                digest.update(view[start:min(start + _HASH_SLICE, end)])
+        finally:
+            view.release()
+    return digest.hexdigest()
+
+
+def can_verify(metadata, profile, gain_db=None):
+    """
+    Indica si una salida puede verificarse contra la firma MD5 de su entrada.
+
+    Args:
+        metadata: AudioMetadata del archivo de entrada
+        profile: OutputProfile de la salida
+        gain_db: Ganancia aplicada en la conversión (si la hay, no se puede verificar)
+
+    Returns:
+        True si la salida debe tener exactamente las muestras de la entrada
+    """
+    if not metadata.md5 or gain_db:
+        return False
+    if profile.container != 'wav' or _VERIFIABLE_CODECS.get(profile.codec) != metadata.bits_per_sample:
+        return False
+    if profile.sample_rate and profile.sample_rate != metadata.sample_rate:
+        return False
+    return not profile.channels or profile.channels == metadata.channels
+
+
+def verify_output(source, output):
+    """
+    Compara el MD5 del fragmento data de una salida WAV con la firma del FLAC.
+
+    Args:
+        source: Archivo FLAC de entrada (con firma MD5 en STREAMINFO)
+        output: Archivo WAV generado
+
+    Returns:
+        Un VerificationResult (consultar .ok)
+    """
+    expected = read_audio_metadata(source).md5
+    output_metadata = read_audio_metadata(output)
+    actual = wav_data_md5(output_metadata) if output_metadata.format == 'WAV' else None
+    return VerificationResult(source, output, expected, actual)
@@ -0,0 +1,600 @@
+'''
+Modo de carpeta vigilada para la aplicación Convertidor FLAC a WAV.
+Este archivo contiene un servicio de larga duración, sin interfaz gráfica, que
+vigila directorios de entrada (con inotify en Linux o por sondeo en el resto
+de sistemas) y convierte con AudioConverter cada archivo nuevo en cuanto deja
+de crecer. Los archivos listos pasan por una cola acotada hacia un número fijo
+de hilos de conversión; un manifiesto JSONL y la comprobación de salidas
+existentes evitan repetir trabajo entre ejecuciones. Las métricas de
+rendimiento y profundidad de cola se publican periódicamente mientras corre.
+
+Uso desde la línea de comandos:
+    python watch_folder.py --output SALIDA [--profile NOMBRE] [--poll] ENTRADA...
+'''
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import queue
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+from library_scanner import AUDIO_EXTENSIONS, scan_audio_files
+from output_profiles import OutputProfile, get_profile, output_paths_for
+from metrics import add_metrics_arguments, start_exporters
+from platform_utils import get_app_data_directory, get_platform
+
+# Constantes de inotify (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+# Segundos sin cambios de tamaño ni fecha para considerar un archivo terminado
+DEFAULT_SETTLE_SECONDS = 2.0
+# Archivos listos que pueden esperar en la cola de conversión
+DEFAULT_QUEUE_SIZE = 64
+# Intervalo entre recorridos completos cuando no hay inotify
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class InotifyWatcher:
+    """Vigilancia recursiva de directorios con inotify (mediante ctypes)."""
+
+    def __init__(self, roots, extensions=AUDIO_EXTENSIONS):
+        """
+        Args:
+            roots: Directorios a vigilar (incluidos sus subdirectorios)
+            extensions: Extensiones de archivo que interesan
+
+        Raises:
+            OSError: si inotify no está disponible
+        """
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.roots = list(roots)
+        self.extensions = extensions
+        self._directories = {}  # wd -> directorio
+        for root in self.roots:
+            self._add_tree(root)
+
+    def _add_tree(self, root):
+        """Añade vigilancias a un directorio y a todos sus subdirectorios."""
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                continue
+            self._directories[wd] = directory
+            try:
+                with os.scandir(directory) as iterator:
+                    pending.extend(entry.path for entry in iterator if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def initial_files(self):
+        """Archivos ya presentes al arrancar."""
+        for root in self.roots:
+            yield from scan_audio_files(root, self.extensions)
+
+    def poll(self, timeout):
+        """
+        Espera eventos durante un máximo de timeout segundos.
+
+        Returns:
+            Lista de rutas de archivo creadas o modificadas
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            raw_name = buffer[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+            if mask & _IN_Q_OVERFLOW:
+                # La cola del núcleo se desbordó: volver a recorrer todo
+                paths.extend(self.initial_files())
+                continue
+            if mask & _IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(raw_name.rstrip(b'\0')))
+            if mask & _IN_ISDIR:
+                # Directorio nuevo: vigilarlo y recoger lo que ya se haya escrito dentro
+                self._add_tree(path)
+                paths.extend(scan_audio_files(path, self.extensions))
+            elif path.lower().endswith(self.extensions):
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Vigilancia por recorridos periódicos (para sistemas sin inotify)."""
+
+    def __init__(self, roots, extensions=AUDIO_EXTENSIONS, interval=DEFAULT_POLL_INTERVAL):
+        self.roots = list(roots)
+        self.extensions = extensions
+        self.interval = interval
+        self._known = {}  # ruta -> (tamaño, mtime_ns)
+        self._next_scan = 0.0
+
+    def initial_files(self):
+        """Archivos ya presentes al arrancar (el primer recorrido los registra)."""
+        return self._scan()
+
+    def _scan(self):
+        changed = []
+        seen = {}
+        for root in self.roots:
+            for path in scan_audio_files(root, self.extensions):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                seen[path] = (stat.st_size, stat.st_mtime_ns)
+                if self._known.get(path) != seen[path]:
+                    changed.append(path)
+        self._known = seen
+        self._next_scan = time.monotonic() + self.interval
+        return changed
+
+    def poll(self, timeout):
+        """Espera hasta el siguiente recorrido (como máximo timeout segundos)."""
+        remaining = self._next_scan - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, remaining))
+        return self._scan()
+
+    def close(self):
+        pass
+
+
+def create_watcher(roots, extensions=AUDIO_EXTENSIONS, use_inotify=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Crea el vigilante más adecuado para la plataforma.
+
+    Args:
+        roots: Directorios a vigilar
+        extensions: Extensiones de archivo que interesan
+        use_inotify: True/False para forzarlo, None para usarlo si está disponible
+        poll_interval: Intervalo de sondeo si no se usa inotify
+    """
+    if use_inotify is not False and get_platform() == 'linux':
+        try:
+            return InotifyWatcher(roots, extensions)
+        except (OSError, AttributeError) as e:
+            if use_inotify:
+                raise
+            print(f"inotify no disponible ({e}); se usará sondeo")
+    return PollingWatcher(roots, extensions, poll_interval)
+
+
+class Debouncer:
+    """Retiene los archivos hasta que su tamaño y fecha dejan de cambiar."""
+
+    def __init__(self, settle_seconds=DEFAULT_SETTLE_SECONDS, clock=time.monotonic):
+        self.settle_seconds = settle_seconds
+        self._clock = clock
+        self._candidates = {}  # ruta -> ((tamaño, mtime_ns), instante del último cambio)
+
+    def __len__(self):
+        return len(self._candidates)
+
+    def touch(self, path):
+        """Registra actividad en un archivo (reinicia su espera)."""
+        self._candidates[path] = (None, self._clock())
+
+    def ready(self):
+        """
+        Comprueba los candidatos.
+
+        Returns:
+            Lista de rutas estables (se retiran de los candidatos)
+        """
+        now = self._clock()
+        stable = []
+        for path, (signature, since) in list(self._candidates.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Borrado o renombrado mientras se escribía
+                del self._candidates[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self._candidates[path] = (current, now)
+            elif now - since >= self.settle_seconds:
+                del self._candidates[path]
+                stable.append(path)
+        return stable
+
+
+class ConversionManifest:
+    """Registro JSONL de entradas convertidas, indexado por huella de archivo."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}  # ruta absoluta -> entrada
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Última línea a medias tras un corte
+                    self._entries[entry['input']] = entry
+        except OSError:
+            pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def signature(path):
+        """Huella (tamaño, mtime_ns) con la que se registra un archivo."""
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def is_done(self, path):
+        """True si el archivo no ha cambiado desde su conversión y sus salidas siguen ahí."""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+        if entry is None:
+            return False
+        try:
+            if (entry['size'], entry['mtime_ns']) != self.signature(path):
+                return False
+        except OSError:
+            return False
+        return all(os.path.exists(output) for output in entry['outputs'])
+
+    def stale_outputs(self, path):
+        """
+        Salidas registradas de un archivo que se ha reescrito desde su conversión.
+
+        Returns:
+            Lista de rutas (vacía si el archivo no cambió o no está registrado)
+        """
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+        if entry is None:
+            return []
+        try:
+            if (entry['size'], entry['mtime_ns']) == self.signature(path):
+                return []
+        except OSError:
+            return []
+        return list(entry['outputs'])
+
+    def record(self, path, outputs, signature=None):
+        """
+        Añade (o actualiza) la entrada de un archivo convertido.
+
+        Args:
+            path: Archivo de entrada
+            outputs: Rutas de sus salidas
+            signature: Huella tomada antes de convertirlo (por defecto, la actual); si
+                       el archivo se reescribe durante la conversión, la entrada no
+                       coincide y sus salidas se regeneran
+        """
+        size, mtime_ns = signature or self.signature(path)
+        entry = {
+            'input': os.path.abspath(path),
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'outputs': list(outputs),
+            'converted_at': time.time(),
+        }
+        with self._lock:
+            self._entries[entry['input']] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+class WatchMetrics:
+    """Contadores del servicio y rendimiento en una ventana deslizante."""
+
+    def __init__(self, window_seconds=60.0):
+        self.window_seconds = window_seconds
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=10000)  # Instantes de las últimas conversiones terminadas
+        self.detected = 0
+        self.queued = 0
+        self.converted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.conversion_seconds = 0.0
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def conversion_started(self):
+        self.increment('in_flight')
+
+    def conversion_finished(self, seconds, ok):
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.converted += 1
+                self.conversion_seconds += seconds
+                self._recent.append(time.monotonic())
+            else:
+                self.failed += 1
+
+    def snapshot(self, queue_depth=0, pending=0):
+        """
+        Devuelve las métricas actuales.
+
+        Args:
+            queue_depth: Archivos esperando en la cola de conversión
+            pending: Archivos que todavía se están escribiendo
+        """
+        with self._lock:
+            horizon = time.monotonic() - self.window_seconds
+            recent = sum(1 for moment in self._recent if moment >= horizon)
+            return {
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'detected': self.detected,
+                'queued': self.queued,
+                'converted': self.converted,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'in_flight': self.in_flight,
+                'queue_depth': queue_depth,
+                'pending_writes': pending,
+                'files_per_minute': round(recent * 60.0 / self.window_seconds, 2),
+                'avg_conversion_seconds': round(self.conversion_seconds / self.converted, 3)
+                if self.converted else None,
+            }
+
+
+class WatchFolderService:
+    """Servicio que vigila carpetas de entrada y convierte los archivos nuevos."""
+
+    def __init__(self, input_dirs, output_dir=None, profiles=None, converter=None,
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, queue_size=DEFAULT_QUEUE_SIZE, workers=None,
+                 use_inotify=None, poll_interval=DEFAULT_POLL_INTERVAL, extensions=AUDIO_EXTENSIONS,
+                 manifest_path=None, verify=False):
+        """
+        Args:
+            input_dirs: Directorios a vigilar
+            output_dir: Directorio de salida (por defecto, junto a cada entrada)
+            profiles: OutputProfile o lista de perfiles a generar
+            converter: AudioConverter a usar (se crea uno si no se indica)
+            settle_seconds: Segundos sin cambios para considerar un archivo terminado
+            queue_size: Capacidad de la cola de conversión
+            workers: Hilos de conversión (por defecto, la mitad de los del conversor)
+            use_inotify: True/False para forzarlo, None para detectarlo
+            poll_interval: Intervalo de sondeo sin inotify
+            extensions: Extensiones de archivo a convertir
+            manifest_path: Manifiesto JSONL (por defecto, en la salida o en los datos de la aplicación)
+            verify: Verificar las salidas con la firma MD5 del FLAC
+        """
+        if converter is None:
+            from audio_converter import AudioConverter
+            converter = AudioConverter()
+        if not profiles:
+            profiles = [converter.default_profile]
+        elif isinstance(profiles, OutputProfile):
+            profiles = [profiles]
+        self.converter = converter
+        self.input_dirs = [os.path.abspath(directory) for directory in input_dirs]
+        self.output_dir = output_dir
+        self.profiles = profiles
+        self.verify = verify
+        self.watcher = create_watcher(self.input_dirs, extensions, use_inotify, poll_interval)
+        self.debouncer = Debouncer(settle_seconds)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.workers = workers or max(1, converter._thread_count // 2)
+        self.manifest = ConversionManifest(manifest_path or os.path.join(
+            output_dir or get_app_data_directory(), '.conversion_manifest.jsonl'))
+        self.metrics = WatchMetrics()
+        self._ready = deque()      # Archivos estables que no cupieron en la cola
+        self._queued = set()       # Rutas en cola o en conversión
+        self._queued_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Arranca el hilo vigilante y los hilos de conversión."""
+        for path in self.watcher.initial_files():
+            self._detected(path)
+        self._threads = [threading.Thread(target=self._watch_loop, name="watch-folder", daemon=True)]
+        self._threads += [threading.Thread(target=self._worker_loop, name=f"watch-worker-{i}", daemon=True)
+                          for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """Detiene el servicio; las conversiones en curso terminan antes de salir."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.watcher.close()
+
+    def snapshot(self):
+        """Métricas actuales del servicio."""
+        return self.metrics.snapshot(self.queue.qsize(), len(self.debouncer) + len(self._ready))
+
+    def _detected(self, path):
+        self.metrics.increment('detected')
+        self.debouncer.touch(path)
+
+    def _watch_loop(self):
+        while not self._stop.is_set():
+            for path in self.watcher.poll(0.5):
+                self._detected(path)
+            self._ready.extend(self.debouncer.ready())
+            # Mover a la cola acotada lo que quepa; el resto espera (contrapresión)
+            while self._ready:
+                path = self._ready[0]
+                with self._queued_lock:
+                    if path in self._queued:
+                        # Cambió mientras esperaba o se convertía: se vuelve a
+                        # comprobar cuando termine la conversión en curso
+                        self._ready.popleft()
+                        self.debouncer.touch(path)
+                        continue
+                if self._already_converted(path):
+                    self._ready.popleft()
+                    self.metrics.increment('skipped')
+                    continue
+                try:
+                    self.queue.put_nowait(path)
+                except queue.Full:
+                    break
+                self._ready.popleft()
+                with self._queued_lock:
+                    self._queued.add(path)
+                self.metrics.increment('queued')
+
+    def _already_converted(self, path):
+        """
+        Comprueba el manifiesto y las salidas existentes. Las salidas de un
+        archivo reescrito se borran para que la conversión las regenere.
+        """
+        if self.manifest.is_done(path):
+            return True
+        for output in self.manifest.stale_outputs(path):
+            try:
+                os.remove(output)
+            except OSError:
+                pass
+        outputs = [output for _, output in
+                   output_paths_for(path, self.output_dir or os.path.dirname(path), self.profiles)]
+        if all(os.path.exists(output) for output in outputs):
+            # Convertido por otra vía (la interfaz, otra ejecución): registrarlo sin tocarlo
+            self.manifest.record(path, outputs)
+            return True
+        return False
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                path = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.metrics.conversion_started()
+            start = time.perf_counter()
+            outputs = None
+            try:
+                # La huella de antes de convertir: una reescritura durante la conversión
+                # deja la entrada desfasada y las salidas se regeneran
+                signature = self.manifest.signature(path)
+                outputs = self.converter.convert_to_profiles(path, self.output_dir, self.profiles, self.verify)
+                if outputs:
+                    self.manifest.record(path, outputs, signature)
+            except Exception as e:
+                print(f"Error al convertir {path}: {e}")
+            finally:
+                self.metrics.conversion_finished(time.perf_counter() - start, bool(outputs))
+                with self._queued_lock:
+                    self._queued.discard(path)
+                self.queue.task_done()
+
+    def run_forever(self, report_interval=30.0, status_file=None):
+        """
+        Ejecuta el servicio hasta recibir SIGINT/SIGTERM, publicando métricas.
+
+        Args:
+            report_interval: Segundos entre informes de métricas
+            status_file: Archivo JSON donde escribir las métricas (opcional)
+        """
+        def request_stop(signum, frame):
+            self._stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        self.start()
+        print(f"Vigilando {', '.join(self.input_dirs)} con {type(self.watcher).__name__} "
+              f"({self.workers} hilos de conversión)")
+        while not self._stop.wait(report_interval):
+            metrics = self.snapshot()
+            print(json.dumps(metrics, ensure_ascii=False))
+            if status_file:
+                temp_path = status_file + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(metrics, f, ensure_ascii=False, indent=2)
+                os.replace(temp_path, status_file)
+        self.stop()
+        print(json.dumps(self.snapshot(), ensure_ascii=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vigila carpetas y convierte los archivos nuevos.")
+    parser.add_argument('inputs', nargs='+', help="Directorios de entrada")
+    parser.add_argument('--output', default=None, help="Directorio de salida")
+    parser.add_argument('--profile', action='append', default=None,
+                        help="Perfil de salida (se puede repetir)")
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Segundos sin cambios antes de convertir un archivo")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--poll', action='store_true', help="Usar sondeo en lugar de inotify")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument('--verify', action='store_true', help="Verificar salidas con el MD5 del FLAC")
+    parser.add_argument('--report-interval', type=float, default=30.0)
+    parser.add_argument('--status-file', default=None, help="Archivo JSON con las métricas actuales")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+
+    profiles = [get_profile(name) for name in args.profile] if args.profile else None
+    service = WatchFolderService(
+        args.inputs, args.output, profiles,
+        settle_seconds=args.settle, queue_size=args.queue_size, workers=args.workers,
+        use_inotify=False if args.poll else None, poll_interval=args.poll_interval, verify=args.verify,
+    )
+    # La cola propia del servicio se exporta junto a las métricas del conversor
+    registry = service.converter.metrics.registry
+    registry.gauge('flac2wav_watch_queue_depth', "Archivos en la cola de vigilancia", service.queue.qsize)
+    registry.gauge('flac2wav_watch_pending', "Archivos detectados que aún no están en la cola",
+                   lambda: len(service.debouncer) + len(service._ready))
+    exporters = start_exporters(service.converter.metrics, args)
+    try:
+        service.run_forever(args.report_interval, args.status_file)
+    finally:
+        for exporter in exporters:
+            exporter.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
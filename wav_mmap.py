@@ -0,0 +1,88 @@
+'''
+Módulo de lectura de WAV por mapeo de memoria para la aplicación Convertidor FLAC a WAV.
+Los archivos convertidos son PCM sin comprimir, así que no hace falta
+decodificarlos: basta con localizar el fragmento de datos en la cabecera RIFF
+y ver sus bytes como un array de NumPy (np.memmap) sin copiarlos. Los picos de
+la forma de onda se calculan directamente sobre ese búfer mapeado, de modo
+que el tiempo de carga queda limitado por la velocidad de la caché de páginas.
+'''
+
+import numpy as np
+
+from audio_metadata import read_audio_metadata
+from peaks import DEFAULT_PEAK_POINTS, PeakAnalyzer, bucket_frames_for
+
+# Subtipos que se pueden ver tal cual como enteros o flotantes (little endian)
+_MAPPED_DTYPES = {
+    'PCM_16': np.dtype('<i2'),
+    'PCM_32': np.dtype('<i4'),
+    'FLOAT': np.dtype('<f4'),
+}
+
+# Muestras por canal reducidas en cada paso (acota los temporales)
+BLOCK_FRAMES = 1 << 18
+
+
+def can_map(metadata):
+    """Indica si un archivo (AudioMetadata) puede mapearse sin decodificar."""
+    return (metadata.format == 'WAV' and metadata.subtype in _MAPPED_DTYPES
+            and metadata.data_offset is not None and metadata.frames > 0)
+
+
+def map_wav(path):
+    """
+    Mapea en memoria las muestras de un WAV PCM.
+
+    Args:
+        path: Ruta al archivo WAV
+
+    Returns:
+        Tupla (np.memmap de solo lectura con forma (muestras, canales), AudioMetadata)
+
+    Raises:
+        ValueError: si el archivo no es un WAV que se pueda mapear (por ejemplo, PCM de 24 bits)
+    """
+    metadata = read_audio_metadata(path)
+    if not can_map(metadata):
+        raise ValueError(f"No se puede mapear {path}: {metadata.format} {metadata.subtype}")
+    samples = np.memmap(path, dtype=_MAPPED_DTYPES[metadata.subtype], mode='r',
+                        offset=metadata.data_offset, shape=(metadata.frames, metadata.channels))
+    return samples, metadata
+
+
+def mapped_peaks(samples, points=DEFAULT_PEAK_POINTS, per_channel=False, block_frames=BLOCK_FRAMES):
+    """
+    Calcula la envolvente de picos de un array de muestras por bloques y sin
+    convertirlo: max y min se reducen sobre vistas del búfer y solo los
+    resultados por tramo pasan a float.
+
+    Args:
+        samples: Array (muestras, canales), normalmente el memmap de map_wav
+        points: Puntos aproximados de la envolvente
+        per_channel: Devolver los picos de cada canal (tramos, canales) en lugar de la envolvente mono
+        block_frames: Muestras por canal reducidas en cada paso
+
+    Returns:
+        Tupla (picos float32 en [0, 1], muestras por tramo)
+    """
+    analyzer = PeakAnalyzer(samples.shape[1], bucket_frames_for(len(samples), points))
+    for start in range(0, len(samples), block_frames):
+        analyzer.process(samples[start:start + block_frames])
+    peaks = analyzer.channel_peaks() if per_channel else analyzer.peaks()
+    return peaks, analyzer.bucket_frames
+
+
+def wav_peaks(path, points=DEFAULT_PEAK_POINTS, per_channel=False):
+    """
+    Envolvente de picos de un WAV PCM leída por mapeo de memoria.
+
+    Returns:
+        Tupla (picos float32 en [0, 1], puntos por segundo)
+
+    Raises:
+        ValueError: si el archivo no se puede mapear
+    """
+    samples, metadata = map_wav(path)
+    peaks, bucket_frames = mapped_peaks(samples, points, per_channel)
+    # El mapeo se libera al salir: los picos no guardan referencias al búfer
+    return peaks, metadata.sample_rate / bucket_frames
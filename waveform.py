@@ -1,67 +1,160 @@
 import numpy as np
-import soundfile as sf
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from PyQt5.QtCore import QObject, pyqtSignal, QThread, pyqtSlot
-from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QCheckBox
 from matplotlib.collections import LineCollection
 from matplotlib.colors import LinearSegmentedColormap
 import os
+from collections import namedtuple
+from numpy.lib.stride_tricks import sliding_window_view
 
-# Hacer librosa opcional
-try:
-    import librosa
-    LIBROSA_AVAILABLE = True
-except ImportError:
-    LIBROSA_AVAILABLE = False
+import profiling
+import tracing
+from audio_metadata import read_audio_metadata
+from resampling import load_mono
+from stream_analysis import LIBROSA_AVAILABLE, estimate_tempo  # librosa es opcional
+from peaks import file_peaks
+from wav_mmap import wav_peaks
 
-from mutagen.flac import FLAC
 from mutagen.mp3 import MP3
 from mutagen.wave import WAVE
 
+
+WaveformRender = namedtuple('WaveformRender', [
+    'segments',     # Tupla con los segmentos (n-1, 2, 2) float32 de cada carril (1 mono, 2 estéreo)
+    'levels',       # Tupla con el nivel en dB de cada segmento (color), por carril
+    'duration',     # Duración en segundos
+    'peak_rate',    # Puntos de la envolvente por segundo
+    'bpm',          # Tempo mostrado
+    'ticks',        # Marcas del eje X (None para las automáticas)
+    'tick_labels',  # Etiquetas de las marcas (None para las numéricas)
+])
+
+
+def build_waveform_render(peaks, peak_rate, bpm):
+    """
+    Prepara todo lo que necesita el gráfico a partir de los picos ya agrupados:
+    niveles en dB respecto al máximo, segmentos de cada carril y marcas de
+    tiempo. Se llama en el hilo de trabajo para que la interfaz solo dibuje.
+    
+    Args:
+        peaks: Picos float32 por tramo (n,) o por canal (n, canales)
+        peak_rate: Tramos por segundo
+        bpm: Tempo para las marcas de compás en archivos cortos
+        
+    Returns:
+        Un WaveformRender
+    """
+    # Picos por canal: dos carriles si es estéreo, si no la envolvente de todos los canales
+    lanes = peaks.ndim == 2 and peaks.shape[1] == 2
+    if peaks.ndim == 2 and not lanes:
+        peaks = peaks.max(axis=1)
+    count = len(peaks)
+    duration = count / peak_rate
+    
+    # dB respecto al máximo en un único array (del tamaño de la envolvente, no del audio)
+    levels = np.maximum(peaks, np.float32(1e-10))
+    if count:
+        levels /= levels.max()
+    np.log10(levels, out=levels)
+    levels *= 20
+    
+    time = np.linspace(0, duration, count, dtype=np.float32)
+    segments = []
+    colors = []
+    for channel, sign in (((0, 1), (1, -1)) if lanes else ((None, 1),)):
+        lane_db = levels if channel is None else levels[:, channel]
+        points = np.empty((count, 2), dtype=np.float32)
+        points[:, 0] = time
+        if channel is None:
+            points[:, 1] = lane_db
+        else:
+            # Carril de 0 a 60 desde el centro: izquierdo hacia arriba y derecho hacia abajo
+            np.clip(lane_db, -60, 0, out=points[:, 1])
+            points[:, 1] += 60
+            points[:, 1] *= sign
+        # Segmentos consecutivos como vista (n-1, 2, 2) de los puntos, sin copiarlos
+        # (con menos de dos puntos no hay segmentos: la ventana no cabe)
+        if count < 2:
+            segments.append(np.empty((0, 2, 2), dtype=np.float32))
+        else:
+            segments.append(sliding_window_view(points, 2, axis=0).transpose(0, 2, 1))
+        colors.append(lane_db[:-1])
+    
+    # Simplificar las marcas de tiempo para mejorar el rendimiento
+    ticks = None
+    tick_labels = None
+    if duration > 60:  # Solo para archivos largos
+        ticks = np.linspace(0, duration, min(10, int(duration/10)+1))
+    elif bpm:
+        # Duración de un beat en segundos (60 segundos / BPM)
+        beat_duration = 60 / bpm
+        
+        # Para archivos cortos, mostrar menos compases para mejor rendimiento
+        # Mostrar solo compases principales (cada 4 beats)
+        total_measures = int(duration / (4 * beat_duration))
+        if total_measures > 10:  # Si hay muchos compases, mostrar solo algunos
+            measure_interval = max(1, total_measures // 10)
+            ticks = np.arange(0, total_measures + 1, measure_interval) * 4 * beat_duration
+            tick_labels = [f"{int(i/measure_interval)+1}" for i in range(0, len(ticks))]
+    
+    return WaveformRender(tuple(segments), tuple(colors), duration, peak_rate, bpm, ticks, tick_labels)
+
+
 class WaveformWorker(QThread):
     """Trabajador para generar la forma de onda en un hilo separado."""
     
-    finished = pyqtSignal(object, object)  # Emite (datos de forma de onda, tasa de muestreo)
+    finished = pyqtSignal(object)  # Emite un WaveformRender listo para dibujar
     error = pyqtSignal(str)
     
-    def __init__(self, file_path, parent=None):
+    def __init__(self, file_path, parent=None, stereo=False):
         super().__init__(parent)
         self.file_path = file_path
+        self.stereo = stereo  # Picos de cada canal (tramos, canales) para la vista de dos carriles
         
     def run(self):
         try:
-            # Usar soundfile en lugar de librosa para cargar audio (mucho más rápido)
-            data, sr = sf.read(self.file_path, dtype='float32')
-            
-            # Si es estéreo, convertir a mono para la visualización
-            if len(data.shape) > 1 and data.shape[1] > 1:
-                data = np.mean(data, axis=1)
-                
-            # Reducir datos para visualización más rápida (submuestreo)
-            # Solo tomar 1 de cada N muestras para acelerar el rendering
-            if len(data) > 100000:
-                # Calcular factor de reducción más agresivo para archivos grandes
-                target_samples = 10000  # Número ideal de muestras para visualización fluida
-                reduction_factor = max(1, len(data) // target_samples)
-                data = data[::reduction_factor]
-                sr = sr // reduction_factor
-            
-            self.finished.emit(data, sr)
+            with tracing.span("waveform.worker", path=os.path.basename(self.file_path)), \
+                    profiling.phase("waveform", path=self.file_path, stereo=self.stereo):
+                self.finished.emit(self._render())
         except Exception as e:
             self.error.emit(str(e))
+    
+    def _render(self):
+        # WAV PCM: picos calculados sobre el archivo mapeado en memoria, sin decodificar
+        peaks = None
+        if self.file_path.lower().endswith('.wav'):
+            try:
+                with tracing.span("waveform.mmap_peaks"):
+                    peaks, peak_rate = wav_peaks(self.file_path, per_channel=self.stereo)
+            except ValueError:
+                # PCM de 24 bits u otro formato que no se puede ver tal cual: decodificar
+                pass
+        
+        # Resto de formatos: decodificar por bloques con soundfile y reducir cada
+        # canal por tramos, sin mezclar a mono todo el archivo
+        if peaks is None:
+            with tracing.span("waveform.decode_peaks"):
+                peaks, peak_rate = file_peaks(self.file_path, per_channel=self.stereo)
+        
+        # dB, coordenadas y marcas de tiempo se preparan aquí, fuera del hilo de la interfaz
+        bpm = get_song_bpm(self.file_path)
+        with tracing.span("waveform.build_render"):
+            return build_waveform_render(peaks, peak_rate, bpm)
 
 
 class WaveformGenerator(QObject):
     """Clase para generar la forma de onda del audio."""
     
-    generation_complete = pyqtSignal(object, object)  # Emite (datos de forma de onda, tasa de muestreo)
+    generation_complete = pyqtSignal(object)  # Emite un WaveformRender
     generation_error = pyqtSignal(str)
-    waveform_generated = pyqtSignal(object, object)  # Señal que será usada por la UI
+    waveform_generated = pyqtSignal(object)  # Señal que será usada por la UI
     
     def __init__(self):
         super().__init__()
         self.worker = None
+        self.stereo = False  # Generar los picos de cada canal (vista de dos carriles)
         self.generation_complete.connect(self.waveform_generated.emit)
     
     def generate_waveform(self, file_path):
@@ -77,7 +170,7 @@ class WaveformGenerator(QObject):
             self.worker.wait()
         
         # Crear y configurar el nuevo trabajador
-        self.worker = WaveformWorker(file_path)
+        self.worker = WaveformWorker(file_path, stereo=self.stereo)
         self.worker.finished.connect(self.generation_complete.emit)
         self.worker.error.connect(self.generation_error.emit)
         
@@ -95,26 +188,8 @@ class WaveformGenerator(QObject):
             Un diccionario con información del audio
         """
         try:
-            # Cargar metadatos sin cargar todo el audio
-            info = sf.info(file_path)
-            
-            # Calcular duración en formato legible
-            duration_seconds = info.duration
-            minutes = int(duration_seconds // 60)
-            seconds = int(duration_seconds % 60)
-            
-            # Recopilar información
-            audio_info = {
-                "samplerate": info.samplerate,
-                "channels": info.channels,
-                "format": info.format,
-                "subtype": info.subtype,
-                "duration": f"{minutes}:{seconds:02d}",
-                "duration_seconds": duration_seconds,
-                "bit_depth": getattr(info, "bits_per_sample", "N/A")
-            }
-            
-            return audio_info
+            # Cargar metadatos sin cargar todo el audio (solo cabeceras, con caché)
+            return read_audio_metadata(file_path).to_info_dict()
             
         except Exception as e:
             return {"error": str(e)}
@@ -135,6 +210,11 @@ class WaveformCanvas(FigureCanvasQTAgg):
         self.current_position = 0
         self.position_line = None
         self.audio_path = None
+        self.stereo_lanes = False  # Canal izquierdo arriba y derecho abajo en archivos estéreo
+        
+        # Escala de color de la envolvente (más eficiente con menos puntos en el gradiente)
+        self._norm = plt.Normalize(-60, 0)  # Rango típico para dB: -60dB a 0dB
+        self._cmap = LinearSegmentedColormap.from_list("", ["#0088FF", "#00FFFF"])
         
         # Configurar estilo futurista para el gráfico
         self.ax.set_facecolor('#212121')  # Fondo oscuro moderno
@@ -175,6 +255,7 @@ class WaveformCanvas(FigureCanvasQTAgg):
             self.generator.generation_error.connect(self._handle_error)
         
         # Generar la forma de onda
+        self.generator.stereo = self.stereo_lanes
         self.generator.generate_waveform(audio_path)
         
         # Limpiar la línea de posición
@@ -189,72 +270,81 @@ class WaveformCanvas(FigureCanvasQTAgg):
         
         return True
     
-    @pyqtSlot(object, object)
-    def _update_plot(self, audio_data, sr):
-        """Actualiza el gráfico con los datos de audio."""
-        # Guardar tasa de muestreo para cálculos posteriores
-        self.sr = sr
-        
-        # Duración total en segundos
-        duration = len(audio_data) / sr
-        
-        # Limpiar el gráfico anterior
-        self.ax.clear()
+    def show_analysis(self, audio_path, analysis):
+        """
+        Muestra la forma de onda de un archivo ya analizado durante la conversión,
+        sin volver a leerlo del disco.
         
-        # Convertir a decibeles para el eje Y
-        # Añadimos pequeño valor para evitar log(0)
-        eps = 1e-10
-        audio_data_abs = np.abs(audio_data) + eps
-        # Convertir a dB: 20 * log10(|x|)
-        audio_db = 20 * np.log10(audio_data_abs / np.max(audio_data_abs))
+        Args:
+            audio_path: Ruta al archivo de audio
+            analysis: AnalysisResult de stream_analysis
+        """
+        self.audio_path = audio_path
         
-        # Crear array de tiempo
-        time = np.linspace(0, duration, len(audio_data))
+        # Cancelar generación previa si existe (su resultado ya no corresponde)
+        if hasattr(self, 'generator') and self.generator:
+            if hasattr(self.generator, 'worker') and self.generator.worker and self.generator.worker.isRunning():
+                self.generator.worker.terminate()
+                self.generator.worker.wait()
         
-        # Usar LineCollection para renderizado más eficiente
-        points = np.array([time, audio_db]).T.reshape(-1, 1, 2)
-        segments = np.concatenate([points[:-1], points[1:]], axis=1)
+        if analysis.bpm:
+            _bpm_cache[audio_path] = analysis.bpm
+        self.current_position = 0
+        # Los picos ya están agrupados (unos miles de puntos): prepararlos aquí es inmediato
+        peaks = analysis.channel_peaks if self.stereo_lanes else analysis.peaks
+        self._update_plot(build_waveform_render(peaks, analysis.peak_rate, get_song_bpm(audio_path)))
+        return True
+    
+    @pyqtSlot(object)
+    def _update_plot(self, render):
+        """
+        Dibuja un WaveformRender ya preparado en el hilo de trabajo: aquí solo
+        se entregan sus arrays a matplotlib, sin cálculos con NumPy.
+        """
+        with tracing.span("waveform.plot", points=len(render.levels[0]), lanes=len(render.levels)):
+            self._plot(render)
+    
+    def _plot(self, render):
+        # Guardar tasa de la envolvente para cálculos posteriores
+        self.sr = render.peak_rate
+        lanes = len(render.segments) == 2
         
-        # Configurar escala de color (más eficiente con menos puntos en el gradiente)
-        norm = plt.Normalize(-60, 0)  # Rango típico para dB: -60dB a 0dB
-        cmap = LinearSegmentedColormap.from_list("", ["#0088FF", "#00FFFF"])
-        lc = LineCollection(segments, cmap=cmap, norm=norm)
-        lc.set_array(audio_db)
-        lc.set_linewidth(1.5)
+        # Limpiar el gráfico anterior
+        self.ax.clear()
         
-        # Añadir al gráfico
-        line = self.ax.add_collection(lc)
+        # Usar LineCollection para renderizado más eficiente (una por carril)
+        for segments, levels in zip(render.segments, render.levels):
+            lc = LineCollection(segments, cmap=self._cmap, norm=self._norm)
+            lc.set_array(levels)
+            lc.set_linewidth(1.5)
+            self.ax.add_collection(lc)
+        
+        if lanes:
+            # Carril izquierdo hacia arriba y derecho hacia abajo desde -60 dB (y = 0)
+            self.ax.set_ylim(-65, 65)
+            self.ax.set_yticks([-60, -30, 0, 30, 60])
+            self.ax.set_yticklabels(["0", "-30", "-60", "-30", "0"])
+            self.ax.axhline(0, color='#444444', linewidth=0.8)
+            self.ax.text(0.01, 0.95, "L", transform=self.ax.transAxes, va='top', color='#00FFFF')
+            self.ax.text(0.01, 0.05, "R", transform=self.ax.transAxes, va='bottom', color='#00FFFF')
+        else:
+            self.ax.set_ylim(-60, 5)  # Rango de dB con pequeño margen positivo
         
-        # Configurar límites
-        self.ax.set_xlim(0, duration)
-        self.ax.set_ylim(-60, 5)  # Rango de dB con pequeño margen positivo
+        # Configurar límites (un archivo vacío no tiene duración: eje de 1 s)
+        self.ax.set_xlim(0, render.duration or 1.0)
         
         # Etiquetas de los ejes
-        self.ax.set_ylabel("Amplitud (dB)", color='#00FFFF', fontsize=10)
+        self.ax.set_ylabel("L / R (dB)" if lanes else "Amplitud (dB)", color='#00FFFF', fontsize=10)
         self.ax.set_xlabel("Tiempo (s)", color='#00FFFF', fontsize=10)
         
         # Añadir línea de posición actual
         self.position_line = self.ax.axvline(x=0, color='#FF00FF', linewidth=1.0)
         
-        # Obtener BPM para mostrar marcadores de tiempo
-        bpm = get_song_bpm(self.audio_path)
-        
-        # Simplificar las marcas de tiempo para mejorar el rendimiento
-        if duration > 60:  # Solo para archivos largos
-            self.ax.set_xticks(np.linspace(0, duration, min(10, int(duration/10)+1)))
-        else:
-            # Duración de un beat en segundos (60 segundos / BPM)
-            beat_duration = 60 / bpm
-            
-            # Para archivos cortos, mostrar menos compases para mejor rendimiento
-            # Mostrar solo compases principales (cada 4 beats)
-            total_measures = int(duration / (4 * beat_duration))
-            if total_measures > 10:  # Si hay muchos compases, mostrar solo algunos
-                measure_interval = max(1, total_measures // 10)
-                measures = np.arange(0, total_measures + 1, measure_interval) * 4 * beat_duration
-                measure_labels = [f"{int(i/measure_interval)+1}" for i in range(0, len(measures))]
-                self.ax.set_xticks(measures)
-                self.ax.set_xticklabels(measure_labels)
+        # Marcas de tiempo (o de compás) calculadas junto con la envolvente
+        if render.ticks is not None:
+            self.ax.set_xticks(render.ticks)
+        if render.tick_labels is not None:
+            self.ax.set_xticklabels(render.tick_labels)
         
         # Configurar estilo del gráfico
         self.ax.set_facecolor('#212121')
@@ -266,7 +356,7 @@ class WaveformCanvas(FigureCanvasQTAgg):
         self.ax.spines['right'].set_color('#444444')
         
         # BPM más visible - crear una caja destacada en la esquina
-        bpm_text = f"BPM: {bpm}"
+        bpm_text = f"BPM: {render.bpm:.0f}"
         bpm_bbox = dict(
             boxstyle="round,pad=0.5",
             fc="#FF00FF",
@@ -285,7 +375,8 @@ class WaveformCanvas(FigureCanvasQTAgg):
         
         # Actualizar figura (optimizado)
         self.fig.set_facecolor('#212121')
-        self.fig.tight_layout()
+        with tracing.span("waveform.tight_layout"):
+            self.fig.tight_layout()
         
         # Usar draw_idle para mejorar rendimiento en vez de draw completo
         self.draw_idle()
@@ -334,6 +425,12 @@ class WaveformWidget(QWidget):
         self.canvas = WaveformCanvas()
         layout.addWidget(self.canvas)
         
+        # Vista de dos carriles para archivos estéreo
+        self.stereo_checkbox = QCheckBox("Canales L/R")
+        self.stereo_checkbox.setToolTip("Muestra el canal izquierdo y el derecho por separado")
+        self.stereo_checkbox.toggled.connect(self._on_stereo_toggled)
+        layout.addWidget(self.stereo_checkbox)
+        
         # Establecer layout
         self.setLayout(layout)
         
@@ -354,6 +451,29 @@ class WaveformWidget(QWidget):
         """
         return self.canvas.update_waveform(audio_path)
     
+    def show_analysis(self, audio_path, analysis):
+        """
+        Muestra la forma de onda a partir del análisis hecho durante la conversión.
+        
+        Args:
+            audio_path: Ruta al archivo de audio
+            analysis: AnalysisResult de stream_analysis
+        """
+        return self.canvas.show_analysis(audio_path, analysis)
+    
+    def set_stereo_lanes(self, enabled):
+        """
+        Activa la vista de dos carriles (izquierdo y derecho) para archivos estéreo.
+        Se aplica a la siguiente forma de onda que se cargue.
+        """
+        self.canvas.stereo_lanes = enabled
+    
+    def _on_stereo_toggled(self, enabled):
+        """Cambia la vista y vuelve a generar la forma de onda del archivo actual."""
+        self.set_stereo_lanes(enabled)
+        if self.canvas.audio_path:
+            self.canvas.update_waveform(self.canvas.audio_path)
+    
     def update_position(self, position_ms):
         """
         Actualiza la posición del cursor de reproducción.
@@ -378,9 +498,10 @@ def get_bpm_from_metadata(audio_path):
         file_ext = os.path.splitext(audio_path)[1].lower()
         
         if file_ext == '.flac':
-            audio = FLAC(audio_path)
-            if 'BPM' in audio:
-                return float(audio['BPM'][0])
+            # Reutilizar los comentarios Vorbis ya leídos con la cabecera
+            bpm = read_audio_metadata(audio_path).get_tag('BPM')
+            if bpm:
+                return float(bpm)
             
         elif file_ext == '.mp3':
             audio = MP3(audio_path)
@@ -396,6 +517,7 @@ def get_bpm_from_metadata(audio_path):
         
     return None
     
+@tracing.traced("bpm.librosa")
 def detect_bpm_with_librosa(audio_path):
     """
     Detecta el BPM usando librosa (análisis de audio).
@@ -410,20 +532,18 @@ def detect_bpm_with_librosa(audio_path):
         return None
     
     try:
-        # Cargar solo los primeros 60 segundos para análisis más rápido
-        y, sr = librosa.load(audio_path, sr=None, duration=60)
-        
-        # Detectar el tempo (BPM)
-        onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-        tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
+        # Cargar solo los primeros 60 segundos a 22050 Hz (la frecuencia de análisis de librosa)
+        y, sr = load_mono(audio_path, 22050, duration=60, quality='fast')
         
-        return tempo
+        # Detectar el tempo (BPM) con el mismo estimador que el análisis durante la conversión
+        return estimate_tempo(y, sr)
     except Exception as e:
         print(f"Error al detectar BPM con librosa: {e}")
         return None
         
 _bpm_cache = {}
 
+@tracing.traced("bpm.get_song_bpm")
 def get_song_bpm(audio_path):
     """
     Obtiene el BPM de una canción usando una combinación de métodos.